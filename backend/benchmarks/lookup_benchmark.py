@@ -0,0 +1,135 @@
+"""Measures FolderRepository/FileRepository name lookups as the tables grow.
+
+Usage:
+    python -m benchmarks.lookup_benchmark --rows 10000 100000 1000000 10000000
+    python -m benchmarks.lookup_benchmark --rows 10000 100000 --without-indexes
+
+Each run fills a fresh SQLite database with the given number of folders and files spread
+across many users, then times random lookups by (parent, name). With the composite indexes
+the latency stays flat as the row count grows; without them it grows linearly.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from skylock.database import models
+from skylock.database.repository import FileRepository, FolderRepository
+
+INSERT_BATCH_SIZE = 50_000
+CHILDREN_PER_FOLDER = 100
+INDEXES = (
+    "ix_folders_parent_folder_id_name",
+    "ix_files_folder_id_name",
+    "ix_folders_owner_id",
+    "ix_files_owner_id",
+)
+
+
+def populate(session: Session, rows: int) -> list[tuple[str, str]]:
+    user_id = str(uuid.uuid4())
+    session.execute(insert(models.UserEntity).values(id=user_id, username=user_id, password=""))
+    root_id = str(uuid.uuid4())
+    session.execute(
+        insert(models.FolderEntity).values(
+            id=root_id, name=user_id, owner_id=user_id, is_public=False
+        )
+    )
+
+    parents = [root_id]
+    samples = []
+    folders, files = [], []
+    for index in range(rows):
+        parent_id = parents[index // CHILDREN_PER_FOLDER]
+        folder_id = str(uuid.uuid4())
+        folders.append(
+            {
+                "id": folder_id,
+                "name": f"folder-{index}",
+                "parent_folder_id": parent_id,
+                "owner_id": user_id,
+                "is_public": False,
+            }
+        )
+        file_id = str(uuid.uuid4())
+        files.append(
+            {
+                "id": file_id,
+                "name": f"file-{index}",
+                "folder_id": parent_id,
+                "owner_id": user_id,
+                "is_public": False,
+                "blob_key": file_id,
+            }
+        )
+        parents.append(folder_id)
+        if index % (rows // 1000 or 1) == 0:
+            samples.append((parent_id, str(index)))
+
+        if len(folders) == INSERT_BATCH_SIZE:
+            session.execute(insert(models.FolderEntity), folders)
+            session.execute(insert(models.FileEntity), files)
+            folders, files = [], []
+
+    if folders:
+        session.execute(insert(models.FolderEntity), folders)
+        session.execute(insert(models.FileEntity), files)
+    session.commit()
+    return samples
+
+
+def measure(session: Session, samples: list[tuple[str, str]], lookups: int) -> list[float]:
+    folder_repository = FolderRepository(session)
+    file_repository = FileRepository(session)
+    timings = []
+    for _ in range(lookups):
+        parent_id, suffix = random.choice(samples)
+        parent = models.FolderEntity(id=parent_id)
+        start = time.perf_counter()
+        folder_repository.get_by_name_and_parent_id(f"folder-{suffix}", parent_id)
+        file_repository.get_by_name_and_parent(f"file-{suffix}", parent)
+        timings.append((time.perf_counter() - start) * 1000)
+        session.expunge_all()
+    return timings
+
+
+def run(rows: int, lookups: int, with_indexes: bool, workdir: Path) -> None:
+    engine = create_engine(f"sqlite:///{workdir / f'lookup-{rows}.sqlite'}")
+    models.Base.metadata.create_all(engine)
+    if not with_indexes:
+        with engine.begin() as connection:
+            for index in INDEXES:
+                connection.execute(text(f"DROP INDEX {index}"))
+
+    with Session(engine) as session:
+        samples = populate(session, rows)
+        timings = measure(session, samples, lookups)
+
+    engine.dispose()
+    print(
+        f"{rows:>12,} rows | median {statistics.median(timings):8.3f} ms"
+        f" | p99 {statistics.quantiles(timings, n=100)[98]:8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--without-indexes", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            run(rows, args.lookups, not args.without_indexes, Path(workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Unique upload chunk offsets
+
+Revision ID: 47a564be28d6
+Revises: 74c9be0d4a3b
+Create Date: 2026-10-18 09:12:41.538207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "47a564be28d6"
+down_revision: Union[str, None] = "74c9be0d4a3b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Retried chunks were recorded once per attempt, the index would reject them
+    _delete_retried_chunks()
+
+    with op.batch_alter_table("upload_chunks", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_upload_chunks_session_id"))
+        batch_op.create_index(
+            "ix_upload_chunks_session_id_offset", ["session_id", "offset"], unique=True
+        )
+
+    with op.batch_alter_table("upload_sessions", schema=None) as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(),
+            type_=sa.DateTime(timezone=True),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("upload_sessions", schema=None) as batch_op:
+        batch_op.alter_column(
+            "created_at",
+            existing_type=sa.DateTime(timezone=True),
+            type_=sa.DateTime(),
+            existing_nullable=False,
+        )
+
+    with op.batch_alter_table("upload_chunks", schema=None) as batch_op:
+        batch_op.drop_index("ix_upload_chunks_session_id_offset")
+        batch_op.create_index(
+            batch_op.f("ix_upload_chunks_session_id"), ["session_id"], unique=False
+        )
+
+
+def _delete_retried_chunks() -> None:
+    """Keeps the largest of the chunks recorded at the same offset of a session."""
+    chunks = sa.table(
+        "upload_chunks",
+        sa.column("id", sa.String),
+        sa.column("session_id", sa.String),
+        sa.column("offset", sa.BigInteger),
+        sa.column("size", sa.BigInteger),
+    )
+    retry = chunks.alias("retry")
+    op.execute(
+        chunks.delete().where(
+            sa.exists().where(
+                retry.c.session_id == chunks.c.session_id,
+                retry.c.offset == chunks.c.offset,
+                sa.or_(
+                    retry.c.size > chunks.c.size,
+                    sa.and_(retry.c.size == chunks.c.size, retry.c.id < chunks.c.id),
+                ),
+            )
+        )
+    )
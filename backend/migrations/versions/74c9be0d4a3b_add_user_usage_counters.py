@@ -0,0 +1,50 @@
+"""add user usage counters
+
+Revision ID: 74c9be0d4a3b
+Revises: f83522ca510a
+Create Date: 2026-10-18 07:18:07.004122
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "74c9be0d4a3b"
+down_revision: Union[str, None] = "f83522ca510a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("used_bytes", sa.BigInteger(), server_default="0", nullable=False)
+        )
+        batch_op.add_column(
+            sa.Column("file_count", sa.Integer(), server_default="0", nullable=False)
+        )
+        batch_op.add_column(sa.Column("quota_bytes", sa.BigInteger(), nullable=True))
+
+    # Files whose size is not recorded yet are counted once the metadata backfill reads them
+    users = sa.table("users", sa.column("id"), sa.column("used_bytes"), sa.column("file_count"))
+    files = sa.table("files", sa.column("owner_id"), sa.column("size"))
+    owned = files.c.owner_id == users.c.id
+    op.execute(
+        users.update().values(
+            used_bytes=sa.select(sa.func.coalesce(sa.func.sum(files.c.size), 0))
+            .where(owned)
+            .scalar_subquery(),
+            file_count=sa.select(sa.func.count()).where(owned).scalar_subquery(),
+        )
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("quota_bytes")
+        batch_op.drop_column("file_count")
+        batch_op.drop_column("used_bytes")
@@ -0,0 +1,31 @@
+"""Add blob encoding and size to files
+
+Revision ID: 88d340476e67
+Revises: ec968ced1825
+Create Date: 2026-10-18 07:02:50.105195
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "88d340476e67"
+down_revision: Union[str, None] = "ec968ced1825"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("blob_encoding", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("size", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.drop_column("size")
+        batch_op.drop_column("blob_encoding")
@@ -0,0 +1,64 @@
+"""Add reference counted blobs
+
+Revision ID: ceee42b25831
+Revises: 33010fd1d308
+Create Date: 2026-10-18 06:39:53.779606
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ceee42b25831"
+down_revision: Union[str, None] = "33010fd1d308"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "blobs",
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("blobs", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_blobs_ref_count"), ["ref_count"], unique=False)
+
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("blob_key", sa.String(), nullable=True))
+
+    # Existing blobs are stored under the id of their file
+    op.execute("UPDATE files SET blob_key = id")
+    op.execute("INSERT INTO blobs (id, ref_count) SELECT id, 1 FROM files")
+    op.execute("INSERT INTO blobs (id, ref_count) SELECT id, 0 FROM blob_deletions")
+
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.alter_column("blob_key", existing_type=sa.String(), nullable=False)
+        batch_op.create_index(batch_op.f("ix_files_blob_key"), ["blob_key"], unique=False)
+
+    op.drop_table("blob_deletions")
+
+
+def downgrade() -> None:
+    # Files sharing a content-addressed blob cannot be mapped back to per-file blobs,
+    # only blobs awaiting removal are carried over to the queue
+    op.create_table(
+        "blob_deletions",
+        sa.Column("id", sa.VARCHAR(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO blob_deletions (id) SELECT id FROM blobs WHERE ref_count <= 0")
+
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_files_blob_key"))
+        batch_op.drop_column("blob_key")
+
+    with op.batch_alter_table("blobs", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_blobs_ref_count"))
+
+    op.drop_table("blobs")
@@ -0,0 +1,64 @@
+"""Add upload sessions
+
+Revision ID: ec968ced1825
+Revises: ceee42b25831
+Create Date: 2026-10-18 06:56:36.019608
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ec968ced1825"
+down_revision: Union[str, None] = "ceee42b25831"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_sessions",
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("force", sa.Boolean(), nullable=False),
+        sa.Column("is_public", sa.Boolean(), nullable=False),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("upload_sessions", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_upload_sessions_owner_id"), ["owner_id"], unique=False)
+
+    op.create_table(
+        "upload_chunks",
+        sa.Column("session_id", sa.String(), nullable=False),
+        sa.Column("offset", sa.BigInteger(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["session_id"], ["upload_sessions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("upload_chunks", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_upload_chunks_session_id"), ["session_id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("upload_chunks", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_upload_chunks_session_id"))
+
+    op.drop_table("upload_chunks")
+    with op.batch_alter_table("upload_sessions", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_upload_sessions_owner_id"))
+
+    op.drop_table("upload_sessions")
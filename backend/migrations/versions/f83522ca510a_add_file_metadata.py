@@ -0,0 +1,35 @@
+"""Add file metadata
+
+Revision ID: f83522ca510a
+Revises: 88d340476e67
+Create Date: 2026-10-18 07:06:05.286670
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f83522ca510a"
+down_revision: Union[str, None] = "88d340476e67"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("sha256", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("mime_type", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("created_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("modified_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("files", schema=None) as batch_op:
+        batch_op.drop_column("modified_at")
+        batch_op.drop_column("created_at")
+        batch_op.drop_column("mime_type")
+        batch_op.drop_column("sha256")
@@ -5,24 +5,35 @@ from skylock.api.routes import (
     download_routes,
     file_routes,
     folder_routes,
+    health_routes,
     public_routes,
     share_routes,
     upload_routes,
+    upload_session_routes,
+    user_routes,
 )
 from skylock.utils.exception_handlers import (
     folder_not_empty_handler,
     forbidden_action_handler,
+    invalid_chunk_handler,
     invalid_credentials_handler,
+    invalid_cursor_handler,
+    quota_exceeded_handler,
     resource_already_exists_handler,
     resource_not_found_handler,
+    upload_incomplete_handler,
     user_already_exists_handler,
 )
 from skylock.utils.exceptions import (
     FolderNotEmptyException,
     ForbiddenActionException,
+    InvalidChunkException,
     InvalidCredentialsException,
+    InvalidCursorException,
+    QuotaExceededException,
     ResourceAlreadyExistsException,
     ResourceNotFoundException,
+    UploadIncompleteException,
     UserAlreadyExists,
 )
 
@@ -35,6 +46,10 @@ api.add_exception_handler(ResourceAlreadyExistsException, resource_already_exist
 api.add_exception_handler(ResourceNotFoundException, resource_not_found_handler)
 api.add_exception_handler(FolderNotEmptyException, folder_not_empty_handler)
 api.add_exception_handler(ForbiddenActionException, forbidden_action_handler)
+api.add_exception_handler(InvalidCursorException, invalid_cursor_handler)
+api.add_exception_handler(InvalidChunkException, invalid_chunk_handler)
+api.add_exception_handler(UploadIncompleteException, upload_incomplete_handler)
+api.add_exception_handler(QuotaExceededException, quota_exceeded_handler)
 
 
 api.include_router(auth_routes.router)
@@ -44,3 +59,6 @@ api.include_router(public_routes.router)
 api.include_router(share_routes.router)
 api.include_router(download_routes.router)
 api.include_router(upload_routes.router)
+api.include_router(upload_session_routes.router)
+api.include_router(user_routes.router)
+api.include_router(health_routes.router)
@@ -1,19 +1,61 @@
-from typing import Annotated
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import timedelta
+from functools import cache
+from typing import Annotated, Any, Callable, Optional
 
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from skylock.config import (
+    ARCHIVE_COMPRESSION_THREADS,
+    DB_ASYNC,
+    S3_BUCKET,
+    S3_ENDPOINT_URL,
+    S3_MAX_CONCURRENCY,
+    S3_PART_SIZE_MB,
+    S3_PREFIX,
+    STORAGE_BACKEND,
+    STORAGE_COMPRESSION,
+    STORAGE_CONTENT_ADDRESSED,
+    STORAGE_DURABILITY,
+    UPLOAD_SESSION_TTL_HOURS,
+    USER_QUOTA_MB,
+)
+from skylock.async_skylock_facade import (
+    AsyncSkylockFacade,
+    DownloadFacade,
+    ThreadedDownloadFacade,
+)
+from skylock.database.async_repository import (
+    AsyncFileRepository,
+    AsyncFolderRepository,
+    AsyncUserRepository,
+)
 from skylock.database.models import UserEntity
-from skylock.database.repository import FileRepository, FolderRepository, UserRepository
-from skylock.database.session import get_db_session
-from skylock.service.path_resolver import PathResolver
+from skylock.database.repository import (
+    BlobRepository,
+    FileRepository,
+    FolderRepository,
+    UploadSessionRepository,
+    UserRepository,
+)
+from skylock.database.session import database_engine, get_async_db_session, get_db_session
+from skylock.service.async_resource_service import AsyncResourceService
+from skylock.service.blob_reaper import BlobReaper
+from skylock.service.path_resolver import AsyncPathResolver, PathResolver
 from skylock.service.resource_service import ResourceService
 from skylock.service.response_builder import ResponseBuilder
+from skylock.service.upload_session_reaper import UploadSessionReaper
+from skylock.service.upload_session_service import UploadSessionService
+from skylock.service.usage_service import UsageService
 from skylock.service.user_service import UserService
 from skylock.service.zip_service import ZipService
 from skylock.skylock_facade import SkylockFacade
-from skylock.utils.security import get_user_from_jwt, oauth2_scheme
-from skylock.utils.storage import FileStorageService
+from skylock.upload_session_facade import UploadSessionFacade
+from skylock.utils.durability import DurabilityMode
+from skylock.utils.security import get_user_from_jwt, get_user_from_jwt_async, oauth2_scheme
+from skylock.utils.storage import FileStorageService, LocalStorageBackend, StorageBackend
 from skylock.utils.url_generator import UrlGenerator
 
 
@@ -29,6 +71,16 @@ def get_file_repository(db: Annotated[Session, Depends(get_db_session)]) -> File
     return FileRepository(db)
 
 
+def get_blob_repository(db: Annotated[Session, Depends(get_db_session)]) -> BlobRepository:
+    return BlobRepository(db)
+
+
+def get_upload_session_repository(
+    db: Annotated[Session, Depends(get_db_session)]
+) -> UploadSessionRepository:
+    return UploadSessionRepository(db)
+
+
 def get_user_service(
     user_repository: Annotated[UserRepository, Depends(get_user_repository)]
 ) -> UserService:
@@ -44,11 +96,45 @@ def get_path_resolver(
         file_repository=file_repository,
         folder_repository=folder_repository,
         user_repository=user_repository,
+        single_query=True,
+    )
+
+
+@cache
+def get_storage_backend() -> StorageBackend:
+    if STORAGE_BACKEND == "s3":
+        # boto3 is an optional extra, only imported when the S3 backend is configured
+        from skylock.utils.s3_storage import (  # pylint: disable=import-outside-toplevel
+            S3StorageBackend,
+        )
+
+        return S3StorageBackend(
+            bucket=S3_BUCKET,
+            endpoint_url=S3_ENDPOINT_URL,
+            prefix=S3_PREFIX,
+            part_size=S3_PART_SIZE_MB * 1024 * 1024,
+            max_concurrency=S3_MAX_CONCURRENCY,
+        )
+    return LocalStorageBackend(durability=DurabilityMode(STORAGE_DURABILITY))
+
+
+def get_storage_service() -> FileStorageService:
+    return FileStorageService(
+        content_addressed=STORAGE_CONTENT_ADDRESSED,
+        backend=get_storage_backend(),
+        compression=STORAGE_COMPRESSION,
     )
 
 
-def get_storage_service():
-    return FileStorageService()
+def get_usage_service(
+    user_repository: Annotated[UserRepository, Depends(get_user_repository)],
+    path_resolver: Annotated[PathResolver, Depends(get_path_resolver)],
+) -> UsageService:
+    return UsageService(
+        user_repository=user_repository,
+        path_resolver=path_resolver,
+        default_quota=USER_QUOTA_MB * 1024 * 1024 or None,
+    )
 
 
 def get_resource_service(
@@ -56,12 +142,32 @@ def get_resource_service(
     folder_repository: Annotated[FolderRepository, Depends(get_folder_repository)],
     path_resolver: Annotated[PathResolver, Depends(get_path_resolver)],
     storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
+    blob_repository: Annotated[BlobRepository, Depends(get_blob_repository)],
+    usage_service: Annotated[UsageService, Depends(get_usage_service)],
 ) -> ResourceService:
     return ResourceService(
         file_repository=file_repository,
         folder_repository=folder_repository,
         path_resolver=path_resolver,
         file_storage_service=storage_service,
+        blob_repository=blob_repository,
+        usage_service=usage_service,
+    )
+
+
+def get_blob_reaper(
+    storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
+) -> BlobReaper:
+    return BlobReaper(database_engine.session_factory, storage_service)
+
+
+def get_upload_session_reaper(
+    storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
+) -> UploadSessionReaper:
+    return UploadSessionReaper(
+        database_engine.session_factory,
+        storage_service,
+        ttl=timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
     )
 
 
@@ -73,10 +179,38 @@ def get_url_generator() -> UrlGenerator:
     return UrlGenerator()
 
 
+@cache
+def get_archive_executor() -> Optional[Executor]:
+    if ARCHIVE_COMPRESSION_THREADS <= 0:
+        return None
+    return ThreadPoolExecutor(ARCHIVE_COMPRESSION_THREADS, thread_name_prefix="archive")
+
+
 def get_zip_service(
     storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
 ) -> ZipService:
-    return ZipService(storage_service)
+    # Reading ahead twice as many blocks as there are threads keeps all of them busy
+    return ZipService(
+        storage_service,
+        executor=get_archive_executor(),
+        max_pending_blocks=max(2 * ARCHIVE_COMPRESSION_THREADS, 1),
+    )
+
+
+def get_upload_session_service(
+    upload_session_repository: Annotated[
+        UploadSessionRepository, Depends(get_upload_session_repository)
+    ],
+    resource_service: Annotated[ResourceService, Depends(get_resource_service)],
+    usage_service: Annotated[UsageService, Depends(get_usage_service)],
+    storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
+) -> UploadSessionService:
+    return UploadSessionService(
+        upload_session_repository=upload_session_repository,
+        resource_service=resource_service,
+        usage_service=usage_service,
+        file_storage_service=storage_service,
+    )
 
 
 def get_skylock_facade(
@@ -86,6 +220,7 @@ def get_skylock_facade(
     response_builder: Annotated[ResponseBuilder, Depends(get_response_builder)],
     url_generator: Annotated[UrlGenerator, Depends(get_url_generator)],
     zip_service: Annotated[ZipService, Depends(get_zip_service)],
+    usage_service: Annotated[UsageService, Depends(get_usage_service)],
 ) -> SkylockFacade:
     return SkylockFacade(
         user_service=user_service,
@@ -94,6 +229,17 @@ def get_skylock_facade(
         path_resolver=path_resolver,
         response_builder=response_builder,
         zip_service=zip_service,
+        usage_service=usage_service,
+    )
+
+
+def get_upload_session_facade(
+    upload_session_service: Annotated[UploadSessionService, Depends(get_upload_session_service)],
+    response_builder: Annotated[ResponseBuilder, Depends(get_response_builder)],
+) -> UploadSessionFacade:
+    return UploadSessionFacade(
+        upload_session_service=upload_session_service,
+        response_builder=response_builder,
     )
 
 
@@ -102,3 +248,67 @@ def get_current_user(
     user_repository: Annotated[UserRepository, Depends(get_user_repository)],
 ) -> UserEntity:
     return get_user_from_jwt(token=token, user_repository=user_repository)
+
+
+def get_async_user_repository(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)]
+) -> AsyncUserRepository:
+    return AsyncUserRepository(db)
+
+
+def get_async_folder_repository(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)]
+) -> AsyncFolderRepository:
+    return AsyncFolderRepository(db)
+
+
+def get_async_file_repository(
+    db: Annotated[AsyncSession, Depends(get_async_db_session)]
+) -> AsyncFileRepository:
+    return AsyncFileRepository(db)
+
+
+def get_async_path_resolver(
+    file_repository: Annotated[AsyncFileRepository, Depends(get_async_file_repository)],
+    folder_repository: Annotated[AsyncFolderRepository, Depends(get_async_folder_repository)],
+) -> AsyncPathResolver:
+    return AsyncPathResolver(file_repository=file_repository, folder_repository=folder_repository)
+
+
+def get_async_resource_service(
+    file_repository: Annotated[AsyncFileRepository, Depends(get_async_file_repository)],
+    path_resolver: Annotated[AsyncPathResolver, Depends(get_async_path_resolver)],
+    storage_service: Annotated[FileStorageService, Depends(get_storage_service)],
+) -> AsyncResourceService:
+    return AsyncResourceService(
+        file_repository=file_repository,
+        path_resolver=path_resolver,
+        file_storage_service=storage_service,
+    )
+
+
+def get_async_skylock_facade(
+    resource_service: Annotated[AsyncResourceService, Depends(get_async_resource_service)],
+    response_builder: Annotated[ResponseBuilder, Depends(get_response_builder)],
+) -> AsyncSkylockFacade:
+    return AsyncSkylockFacade(resource_service=resource_service, response_builder=response_builder)
+
+
+def get_threaded_download_facade(
+    skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+) -> ThreadedDownloadFacade:
+    return ThreadedDownloadFacade(skylock)
+
+
+async def get_async_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    user_repository: Annotated[AsyncUserRepository, Depends(get_async_user_repository)],
+) -> UserEntity:
+    return await get_user_from_jwt_async(token=token, user_repository=user_repository)
+
+
+# File downloads take the asyncio database path when DB_ASYNC enables it at startup
+get_download_facade: Callable[..., DownloadFacade] = (
+    get_async_skylock_facade if DB_ASYNC else get_threaded_download_facade
+)
+get_download_user: Callable[..., Any] = get_async_current_user if DB_ASYNC else get_current_user
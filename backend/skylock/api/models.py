@@ -1,6 +1,7 @@
-from dataclasses import dataclass
-from typing import IO
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Iterator, Optional
+from pydantic import BaseModel, Field
 
 
 class Token(BaseModel):
@@ -20,6 +21,11 @@ class File(BaseModel):
     name: str
     path: str
     is_public: bool
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    mime_type: Optional[str] = None
+    created_at: Optional[datetime] = None
+    modified_at: Optional[datetime] = None
 
 
 class FolderContents(BaseModel):
@@ -27,18 +33,20 @@ class FolderContents(BaseModel):
     folder_path: str
     files: list[File]
     folders: list[Folder]
+    next_cursor: Optional[str] = None
 
 
 @dataclass
 class FileData:
     name: str
     data: IO[bytes]
+    headers: dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
 class FolderData:
     name: str
-    data: IO[bytes]
+    data: Iterator[bytes]
 
 
 class LoginUserRequest(BaseModel):
@@ -65,5 +73,39 @@ class UploadOptions(BaseModel):
     public: bool
 
 
+class CreateUploadSessionRequest(BaseModel):
+    path: str
+    size: int = Field(ge=0)
+    force: bool = False
+    public: bool = False
+
+
+class ByteRange(BaseModel):
+    start: int
+    end: int
+
+
+class UploadSession(BaseModel):
+    id: str
+    path: str
+    size: int
+    received: list[ByteRange]
+
+
+class Usage(BaseModel):
+    used_bytes: int
+    file_count: int
+    quota_bytes: Optional[int] = None
+
+
 class ResourceLocationResponse(BaseModel):
     location: str
+
+
+class PoolStatistics(BaseModel):
+    pool: str
+    status: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
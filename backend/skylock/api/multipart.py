@@ -0,0 +1,105 @@
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+UPLOAD_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+class _FileFieldParser:
+    """Collects data of the first file part with the given field name, skipping other parts."""
+
+    def __init__(self, field_name: str):
+        self._field_name = field_name.encode()
+        self._header_name = b""
+        self._header_value = b""
+        self._content_disposition = b""
+        self._in_field = False
+        self.found = False
+        self.chunks: list[bytes] = []
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._content_disposition = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self.chunks.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_field = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._content_disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._content_disposition)
+        self._in_field = (
+            not self.found and options.get(b"name") == self._field_name and b"filename" in options
+        )
+        self.found = self.found or self._in_field
+
+
+async def iter_file_field(request: Request, field_name: str) -> AsyncIterator[bytes]:
+    """Yields data of a multipart/form-data file field as it arrives, without buffering the body."""
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise _missing_field_error(field_name)
+
+    fields = _FileFieldParser(field_name)
+    parser = MultipartParser(params[b"boundary"], fields.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for data in fields.chunks:
+                yield data
+            fields.chunks.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="There was an error parsing the body",
+        ) from e
+
+    if not fields.found:
+        raise _missing_field_error(field_name)
+
+
+def _missing_field_error(field_name: str) -> RequestValidationError:
+    return RequestValidationError(
+        [{"type": "missing", "loc": ("body", field_name), "msg": "Field required", "input": None}]
+    )
@@ -0,0 +1,252 @@
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from secrets import token_hex
+from typing import IO, Mapping, Optional
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from skylock.utils.ranges import ByteRange, merge_ranges
+from skylock.utils.storage import BlobReader, stat_blob
+from skylock.utils.streaming import STREAM_CHUNK_SIZE
+
+ZERO_COPY_SEND_EXTENSION = "http.response.zerocopysend"
+
+MAX_RANGES = 64
+
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+# Headers a 304 response repeats from the response it stands for
+_NOT_MODIFIED_HEADERS = ("cache-control", "etag", "expires", "last-modified", "vary")
+
+
+def content_disposition(filename: str, disposition_type: str = "attachment") -> str:
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        return f"{disposition_type}; filename*=utf-8''{quoted_filename}"
+    return f'{disposition_type}; filename="{filename}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compares an If-None-Match header with an ETag, ignoring weakness as RFC 9110 requires."""
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def is_modified_since(last_modified: str, if_modified_since: str) -> bool:
+    try:
+        return parsedate_to_datetime(last_modified) > parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return True
+
+
+def parse_range_header(value: str, size: int) -> Optional[list[ByteRange]]:
+    """Parses a Range header into sorted, merged (start, end) byte ranges with exclusive ends.
+
+    Returns None when the header should be ignored (malformed, other units or too many ranges)
+    and an empty list when none of the requested ranges can be satisfied.
+    """
+    units, _, specs = value.partition("=")
+    if units.strip().lower() != "bytes" or not specs:
+        return None
+
+    range_specs = specs.split(",")
+    if len(range_specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in range_specs:
+        match = _RANGE_SPEC.match(spec)
+        if match is None:
+            return None
+        first, last = match.groups()
+        if (not first and not last) or (first and last and int(first) > int(last)):
+            return None
+
+        if not first:
+            start, end = max(size - int(last), 0), size
+        else:
+            start, end = int(first), min(int(last) + 1, size) if last else size
+
+        if start < end:
+            ranges.append((start, end))
+
+    return merge_ranges(ranges)
+
+
+class BlobResponse(Response):
+    """Streams an open binary file with a known Content-Length, honouring Range requests.
+
+    Requests whose If-None-Match or If-Modified-Since validators still match are answered
+    with 304 Not Modified and no body.
+
+    The file descriptor of a local file is handed to the server when it supports the ASGI
+    zero-copy send extension (sendfile), otherwise the file is read in fixed-size chunks off
+    the event loop.
+    """
+
+    chunk_size = STREAM_CHUNK_SIZE
+
+    def __init__(
+        self,
+        file: IO[bytes],
+        filename: str,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: str = "application/octet-stream",
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.file = file
+        blob_stat = stat_blob(file)
+        self.size = blob_stat.size
+        # The body is streamed from the file, not rendered from content
+        self.headers["content-length"] = str(self.size)
+        self.headers.setdefault("accept-ranges", "bytes")
+        self.headers.setdefault("last-modified", formatdate(blob_stat.modified, usegmt=True))
+        self.headers.setdefault("content-disposition", content_disposition(filename))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        send_body = scope["method"].upper() != "HEAD"
+        try:
+            request_headers = Headers(scope=scope)
+            if self._is_not_modified(request_headers):
+                await self._send_not_modified(send)
+                return
+
+            ranges = self._requested_ranges(request_headers)
+            if ranges == []:
+                await self._send_not_satisfiable(send)
+                return
+
+            if ranges is None:
+                await self._send_start(send, self.status_code)
+                if send_body:
+                    await self._send_range(scope, send, 0, self.size)
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.headers["content-range"] = f"bytes {start}-{end - 1}/{self.size}"
+                self.headers["content-length"] = str(end - start)
+                await self._send_start(send, 206)
+                if send_body:
+                    await self._send_range(scope, send, start, end)
+            else:
+                await self._send_multiple_ranges(send, ranges, send_body)
+
+            if not send_body:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self.file.close()
+
+    def _is_not_modified(self, request_headers: Headers) -> bool:
+        if self.status_code != 200:
+            return False
+
+        # If-Modified-Since is only evaluated without If-None-Match
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = self.headers.get("etag")
+            return etag is not None and etag_matches(if_none_match, etag)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        return if_modified_since is not None and not is_modified_since(
+            self.headers["last-modified"], if_modified_since
+        )
+
+    async def _send_not_modified(self, send: Send) -> None:
+        headers = [
+            (name.encode("latin-1"), self.headers[name].encode("latin-1"))
+            for name in _NOT_MODIFIED_HEADERS
+            if name in self.headers
+        ]
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _requested_ranges(self, request_headers: Headers) -> Optional[list[ByteRange]]:
+        http_range = request_headers.get("range")
+        if http_range is None or self.status_code != 200:
+            return None
+
+        if_range = request_headers.get("if-range")
+        if if_range is not None and not self._matches_validator(if_range):
+            return None
+
+        return parse_range_header(http_range, self.size)
+
+    def _matches_validator(self, if_range: str) -> bool:
+        # Only strong validators may be used with If-Range
+        etag = self.headers.get("etag")
+        if etag is not None and not etag.startswith("W/") and if_range == etag:
+            return True
+        return if_range == self.headers["last-modified"]
+
+    async def _send_start(self, send: Send, status_code: int) -> None:
+        await send(
+            {"type": "http.response.start", "status": status_code, "headers": self.raw_headers}
+        )
+
+    async def _send_not_satisfiable(self, send: Send) -> None:
+        headers = [
+            (b"content-range", f"bytes */{self.size}".encode("latin-1")),
+            (b"content-length", b"0"),
+        ]
+        await send({"type": "http.response.start", "status": 416, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_range(self, scope: Scope, send: Send, start: int, end: int) -> None:
+        zero_copy = not isinstance(self.file, BlobReader)
+        if zero_copy and ZERO_COPY_SEND_EXTENSION in scope.get("extensions", {}):
+            await send(
+                {
+                    "type": ZERO_COPY_SEND_EXTENSION,
+                    "file": self.file,
+                    "offset": start,
+                    "count": end - start,
+                }
+            )
+            return
+
+        await self._send_chunks(send, start, end)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_chunks(self, send: Send, start: int, end: int) -> None:
+        file = anyio.wrap_file(self.file)
+        await file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await file.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def _send_multiple_ranges(
+        self, send: Send, ranges: list[ByteRange], send_body: bool
+    ) -> None:
+        boundary = token_hex(13)
+        part_headers = [self._part_header(boundary, start, end) for start, end in ranges]
+        closing = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = sum(
+            len(header) + end - start + 2 for header, (start, end) in zip(part_headers, ranges)
+        ) + len(closing)
+
+        self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        self.headers["content-length"] = str(content_length)
+        await self._send_start(send, 206)
+        if not send_body:
+            return
+
+        for header, (start, end) in zip(part_headers, ranges):
+            await send({"type": "http.response.body", "body": header, "more_body": True})
+            await self._send_chunks(send, start, end)
+            await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+    def _part_header(self, boundary: str, start: int, end: int) -> bytes:
+        return (
+            f"--{boundary}\r\n"
+            f"Content-Type: {self.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end - 1}/{self.size}\r\n\r\n"
+        ).encode("latin-1")
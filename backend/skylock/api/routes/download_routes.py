@@ -1,10 +1,18 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 
-from skylock.api.dependencies import get_current_user, get_skylock_facade
+from skylock.api.dependencies import (
+    get_current_user,
+    get_download_facade,
+    get_download_user,
+    get_skylock_facade,
+)
+from skylock.api.responses import BlobResponse
 from skylock.api.validation import validate_path_not_empty
+from skylock.async_skylock_facade import DownloadFacade
 from skylock.skylock_facade import SkylockFacade
 from skylock.database import models as db_models
 from skylock.utils.path import UserPath
@@ -32,12 +40,13 @@ router = APIRouter(tags=["Resource", "Download"], prefix="/download")
         },
     },
 )
-def download_folder(
+async def download_folder(
     path: str,
     user: Annotated[db_models.UserEntity, Depends(get_current_user)],
     skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
 ) -> StreamingResponse:
-    folder_data = skylock.download_folder(UserPath(path=path, owner=user))
+    folder_data = await run_in_threadpool(skylock.download_folder, UserPath(path=path, owner=user))
+    # The archive is generated in worker threads while it is sent
     return StreamingResponse(
         content=folder_data.data,
         media_type="application/zip",
@@ -48,12 +57,22 @@ def download_folder(
 @router.get(
     "/files/{path:path}",
     summary="Download a file",
-    description="This endpoint allows users to download a file from a specified path.",
+    description=(
+        "This endpoint allows users to download a file from a specified path. "
+        "Partial downloads are supported with the Range and If-Range headers. "
+        "Files stored compressed are sent as stored when the Accept-Encoding header allows it. "
+        "Conditional requests with If-None-Match or If-Modified-Since are answered with 304."
+    ),
     responses={
         200: {
             "description": "File downloaded successfully",
             "content": {"application/octet-stream": {}},
         },
+        206: {
+            "description": "Requested byte ranges of the file, as multipart/byteranges if many",
+            "content": {"application/octet-stream": {}},
+        },
+        304: {"description": "File not modified since the version the client has"},
         400: {
             "description": "Invalid path provided, most likely empty",
             "content": {"application/json": {"example": {"detail": "Invalid path"}}},
@@ -66,17 +85,20 @@ def download_folder(
             "description": "File not found",
             "content": {"application/json": {"example": {"detail": "File not found"}}},
         },
+        416: {"description": "None of the requested byte ranges can be satisfied"},
     },
 )
-def download_file(
+async def download_file(
     path: Annotated[str, Depends(validate_path_not_empty)],
-    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
-    skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+    user: Annotated[db_models.UserEntity, Depends(get_download_user)],
+    downloads: Annotated[DownloadFacade, Depends(get_download_facade)],
+    accept_encoding: Annotated[Optional[str], Header()] = None,
 ):
     user_path = UserPath(path=path, owner=user)
-    file_data = skylock.download_file(user_path)
-    return StreamingResponse(
-        content=file_data.data,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{file_data.name}"'},
+    file_data = await downloads.download_file(user_path, accept_encoding)
+    # Browsers may keep private files but have to revalidate them, which the ETag makes cheap
+    return BlobResponse(
+        file=file_data.data,
+        filename=file_data.name,
+        headers={**file_data.headers, "cache-control": "private, no-cache"},
     )
@@ -1,14 +1,18 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Response, UploadFile, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 
 
-from skylock.api.dependencies import get_current_user, get_skylock_facade
+from skylock.api.dependencies import get_blob_reaper, get_current_user, get_skylock_facade
+from skylock.api.multipart import UPLOAD_OPENAPI_EXTRA, iter_file_field
 from skylock.api.validation import validate_path_not_empty
 from skylock.database import models as db_models
+from skylock.service.blob_reaper import BlobReaper
 from skylock.skylock_facade import SkylockFacade
 from skylock.utils.path import UserPath
+from skylock.utils.streaming import AsyncStreamReader
 from skylock.api import models
 
 router = APIRouter(tags=["Resource"], prefix="/files")
@@ -24,6 +28,7 @@ router = APIRouter(tags=["Resource"], prefix="/files")
         """
     ),
     status_code=status.HTTP_201_CREATED,
+    openapi_extra=UPLOAD_OPENAPI_EXTRA,
     responses={
         201: {
             "description": "File uploaded successfully",
@@ -41,22 +46,32 @@ router = APIRouter(tags=["Resource"], prefix="/files")
             "description": "Resource already exists",
             "content": {"application/json": {"example": {"detail": "File already exists"}}},
         },
+        413: {
+            "description": "Upload exceeds the storage quota",
+            "content": {"application/json": {"example": {"detail": "Storage quota exceeded"}}},
+        },
     },
 )
-def upload_file(
+async def upload_file(
     path: Annotated[str, Depends(validate_path_not_empty)],
     user: Annotated[db_models.UserEntity, Depends(get_current_user)],
     skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
-    file: UploadFile,
+    blob_reaper: Annotated[BlobReaper, Depends(get_blob_reaper)],
+    background_tasks: BackgroundTasks,
+    request: Request,
     force: bool = False,
     public: bool = False,
 ) -> models.File:
-    return skylock.upload_file(
+    uploaded_file = await run_in_threadpool(
+        skylock.upload_file,
         user_path=UserPath(path=path, owner=user),
-        file_data=file.file.read(),
+        file_data=AsyncStreamReader(iter_file_field(request, "file")),
         force=force,
         public=public,
     )
+    if force:
+        background_tasks.add_task(blob_reaper.reap)
+    return uploaded_file
 
 
 @router.delete(
@@ -96,8 +111,11 @@ def delete_file(
     path: Annotated[str, Depends(validate_path_not_empty)],
     user: Annotated[db_models.UserEntity, Depends(get_current_user)],
     skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+    blob_reaper: Annotated[BlobReaper, Depends(get_blob_reaper)],
+    background_tasks: BackgroundTasks,
 ):
     skylock.delete_file(UserPath(path=path, owner=user))
+    background_tasks.add_task(blob_reaper.reap)
 
 
 @router.patch(
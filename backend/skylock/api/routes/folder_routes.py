@@ -1,17 +1,21 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, status
 from fastapi.responses import StreamingResponse
 
 from skylock.api import models
-from skylock.api.dependencies import get_current_user, get_skylock_facade
+from skylock.api.dependencies import get_blob_reaper, get_current_user, get_skylock_facade
 from skylock.api.validation import validate_path_not_empty
 from skylock.database import models as db_models
+from skylock.service.blob_reaper import BlobReaper
 from skylock.skylock_facade import SkylockFacade
+from skylock.utils.pagination import ResourceType
 from skylock.utils.path import UserPath
 
 router = APIRouter(tags=["Resource"], prefix="/folders")
 
+MAX_PAGE_SIZE = 1000
+
 
 @router.get(
     "/{path:path}",
@@ -21,6 +25,9 @@ router = APIRouter(tags=["Resource"], prefix="/folders")
         This endpoint retrieves the contents of a specified folder.
         It returns a list of files and subfolders contained within the folder at the provided path.
         If path is empty, contents of user's root folder will be listed.
+        Contents are ordered by type (folders first) and name. When 'limit' is given, at most
+        that many resources are returned, and 'next_cursor' can be passed as 'cursor' to
+        fetch the following page. 'type' restricts the listing to folders or files.
         """
     ),
     responses={
@@ -59,10 +66,15 @@ router = APIRouter(tags=["Resource"], prefix="/folders")
                                 "is_public": False,
                             },
                         ],
+                        "next_cursor": "WyJmb2xkZXIiLCAic3ViZm9sZGVyMiJd",
                     }
                 }
             },
         },
+        400: {
+            "description": "Invalid pagination cursor",
+            "content": {"application/json": {"example": {"detail": "Invalid pagination cursor"}}},
+        },
         401: {
             "description": "Unauthorized user",
             "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
@@ -84,8 +96,13 @@ def get_folder_contents(
     path: str,
     user: Annotated[db_models.UserEntity, Depends(get_current_user)],
     skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    resource_type: Annotated[Optional[ResourceType], Query(alias="type")] = None,
 ) -> models.FolderContents:
-    return skylock.get_folder_contents(UserPath(path=path, owner=user))
+    return skylock.get_folder_contents(
+        UserPath(path=path, owner=user), limit=limit, cursor=cursor, resource_type=resource_type
+    )
 
 
 @router.post(
@@ -151,6 +168,7 @@ def create_folder(
         be empty to be deleted unless the 'recursive' parameter is set to True,
         which allows for recursive deletion. If the folder contains any files or
         subfolders and 'recursive' is not set, an error will be raised.
+        Stored data of recursively deleted files is removed after the response is sent.
         """
     ),
     responses={
@@ -194,9 +212,13 @@ def delete_folder(
     path: Annotated[str, Depends(validate_path_not_empty)],
     user: Annotated[db_models.UserEntity, Depends(get_current_user)],
     skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+    blob_reaper: Annotated[BlobReaper, Depends(get_blob_reaper)],
+    background_tasks: BackgroundTasks,
     recursive: bool = False,
 ):
     skylock.delete_folder(UserPath(path=path, owner=user), is_recursively=recursive)
+    if recursive:
+        background_tasks.add_task(blob_reaper.reap)
     return {"message": "Folder deleted"}
 
 
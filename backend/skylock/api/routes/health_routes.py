@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+
+from skylock.api import models
+from skylock.api.dependencies import get_current_user
+from skylock.database.session import database_engine
+
+router = APIRouter(tags=["Health"], prefix="/health")
+
+
+@router.get(
+    "/database",
+    summary="Get database connection pool statistics",
+    description=(
+        """
+        This endpoint returns statistics of the database connection pool of the worker
+        that handled the request. Size and usage counters are only reported for queue based pools.
+        Pool internals are only shown to authenticated users.
+        """
+    ),
+    dependencies=[Depends(get_current_user)],
+    responses={
+        200: {
+            "description": "Pool statistics of the current worker",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "pool": "QueuePool",
+                        "status": "Pool size: 5  Connections in pool: 1 ...",
+                        "size": 5,
+                        "checked_in": 1,
+                        "checked_out": 0,
+                        "overflow": -4,
+                    }
+                }
+            },
+        },
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+    },
+)
+def get_database_pool_statistics() -> models.PoolStatistics:
+    return models.PoolStatistics(**database_engine.pool_statistics())
@@ -1,10 +1,11 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Response
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header, Response
 
-from skylock.api.dependencies import get_skylock_facade
-from skylock.skylock_facade import SkylockFacade
+from skylock.api.dependencies import get_download_facade
+from skylock.config import PUBLIC_FILE_MAX_AGE
+from skylock.api.responses import BlobResponse
+from skylock.async_skylock_facade import DownloadFacade
 
 router = APIRouter(tags=["Resource"], prefix="/public")
 
@@ -12,12 +13,22 @@ router = APIRouter(tags=["Resource"], prefix="/public")
 @router.get(
     "/files/download/{file_id}",
     summary="Download a public file",
-    description="This endpoint allows users to download a shared (public) file by id.",
+    description=(
+        "This endpoint allows users to download a shared (public) file by id. "
+        "Partial downloads are supported with the Range and If-Range headers. "
+        "Files stored compressed are sent as stored when the Accept-Encoding header allows it. "
+        "Conditional requests with If-None-Match or If-Modified-Since are answered with 304."
+    ),
     responses={
         200: {
             "description": "File downloaded successfully",
             "content": {"application/octet-stream": {}},
         },
+        206: {
+            "description": "Requested byte ranges of the file, as multipart/byteranges if many",
+            "content": {"application/octet-stream": {}},
+        },
+        304: {"description": "File not modified since the version the client has"},
         400: {
             "description": "Invalid file id provided, most likely not shared",
             "content": {"application/json": {"example": {"detail": "Invalid path"}}},
@@ -30,15 +41,18 @@ router = APIRouter(tags=["Resource"], prefix="/public")
             "description": "File not found",
             "content": {"application/json": {"example": {"detail": "File not found"}}},
         },
+        416: {"description": "None of the requested byte ranges can be satisfied"},
     },
 )
-def download_public_file(
+async def download_public_file(
     file_id: str,
-    skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+    downloads: Annotated[DownloadFacade, Depends(get_download_facade)],
+    accept_encoding: Annotated[Optional[str], Header()] = None,
 ):
-    file_data = skylock.download_public_file(file_id)
-    return StreamingResponse(
-        content=file_data.data,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{file_data.name}"'},
+    file_data = await downloads.download_public_file(file_id, accept_encoding)
+    # Shared caches may serve a public file for a while after it was made private again
+    return BlobResponse(
+        file=file_data.data,
+        filename=file_data.name,
+        headers={**file_data.headers, "cache-control": f"public, max-age={PUBLIC_FILE_MAX_AGE}"},
     )
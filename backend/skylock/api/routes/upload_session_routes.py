@@ -0,0 +1,220 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from skylock.api import models
+from skylock.api.dependencies import (
+    get_blob_reaper,
+    get_current_user,
+    get_upload_session_facade,
+    get_upload_session_reaper,
+)
+from skylock.database import models as db_models
+from skylock.service.blob_reaper import BlobReaper
+from skylock.service.upload_session_reaper import UploadSessionReaper
+from skylock.upload_session_facade import UploadSessionFacade
+from skylock.utils.path import UserPath
+from skylock.utils.streaming import AsyncStreamReader
+
+router = APIRouter(tags=["Resource", "Upload"], prefix="/upload/sessions")
+
+CHUNK_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+    }
+}
+
+UPLOAD_SESSION_NOT_FOUND_RESPONSE = {
+    "description": "Upload session not found",
+    "content": {
+        "application/json": {
+            "example": {"detail": "Resource not found", "missing": "upload_session_id"}
+        }
+    },
+}
+
+
+@router.post(
+    "",
+    summary="Start a resumable upload",
+    description=(
+        """
+        This endpoint starts an upload session for a file of the given size at the given path.
+        The file content is then sent in chunks, which may be sent in any order and in parallel,
+        and the file is created once the session is completed. Sessions that are not completed
+        within their time to live (24 hours by default) are discarded.
+        """
+    ),
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "Upload session started successfully"},
+        400: {
+            "description": "Invalid path provided",
+            "content": {"application/json": {"example": {"detail": "Invalid path"}}},
+        },
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+        404: {
+            "description": "Parent folder not found",
+            "content": {"application/json": {"example": {"detail": "Resource not found"}}},
+        },
+        409: {
+            "description": "Resource already exists",
+            "content": {"application/json": {"example": {"detail": "File already exists"}}},
+        },
+        413: {
+            "description": "Upload exceeds the storage quota",
+            "content": {"application/json": {"example": {"detail": "Storage quota exceeded"}}},
+        },
+    },
+)
+def create_upload_session(
+    options: models.CreateUploadSessionRequest,
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    uploads: Annotated[UploadSessionFacade, Depends(get_upload_session_facade)],
+    upload_session_reaper: Annotated[UploadSessionReaper, Depends(get_upload_session_reaper)],
+    background_tasks: BackgroundTasks,
+) -> models.UploadSession:
+    upload_session = uploads.create_upload_session(
+        UserPath(path=options.path, owner=user),
+        size=options.size,
+        force=options.force,
+        public=options.public,
+    )
+    # Every new session also ends the ones abandoned long enough ago
+    background_tasks.add_task(upload_session_reaper.reap)
+    return upload_session
+
+
+@router.get(
+    "/{session_id}",
+    summary="Get the state of a resumable upload",
+    description="This endpoint returns the byte ranges received so far by an upload session.",
+    responses={
+        200: {"description": "Upload session returned successfully"},
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+        404: UPLOAD_SESSION_NOT_FOUND_RESPONSE,
+    },
+)
+def get_upload_session(
+    session_id: str,
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    uploads: Annotated[UploadSessionFacade, Depends(get_upload_session_facade)],
+) -> models.UploadSession:
+    return uploads.get_upload_session(session_id, user)
+
+
+@router.put(
+    "/{session_id}/chunks",
+    summary="Upload a chunk of a resumable upload",
+    description=(
+        """
+        This endpoint stores the request body at the given byte offset of the uploaded file.
+        When a SHA-256 checksum is given, the chunk is only accepted if its data matches it.
+        A chunk that failed or was interrupted can be sent again.
+        """
+    ),
+    openapi_extra=CHUNK_OPENAPI_EXTRA,
+    responses={
+        200: {"description": "Chunk stored successfully"},
+        400: {
+            "description": "Chunk does not fit the upload or does not match its checksum",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Chunk checksum does not match its data"}
+                }
+            },
+        },
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+        404: UPLOAD_SESSION_NOT_FOUND_RESPONSE,
+    },
+)
+async def upload_chunk(
+    session_id: str,
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    uploads: Annotated[UploadSessionFacade, Depends(get_upload_session_facade)],
+    request: Request,
+    offset: Annotated[int, Query(ge=0)],
+    checksum: Annotated[Optional[str], Query(description="SHA-256 of the chunk, hex")] = None,
+) -> models.UploadSession:
+    return await run_in_threadpool(
+        uploads.upload_chunk,
+        session_id,
+        user,
+        offset=offset,
+        data=AsyncStreamReader(request.stream()),
+        checksum=checksum,
+    )
+
+
+@router.post(
+    "/{session_id}/complete",
+    summary="Complete a resumable upload",
+    description=(
+        """
+        This endpoint creates the file from all received chunks and ends the upload session.
+        The session also ends when the file conflicts with an existing one, other failures
+        leave it open so that completing it can be retried.
+        """
+    ),
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        201: {"description": "File uploaded successfully"},
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+        404: UPLOAD_SESSION_NOT_FOUND_RESPONSE,
+        409: {
+            "description": "Upload is missing chunks or the file already exists",
+            "content": {"application/json": {"example": {"detail": "Upload is missing chunks"}}},
+        },
+        413: {
+            "description": "Upload exceeds the storage quota",
+            "content": {"application/json": {"example": {"detail": "Storage quota exceeded"}}},
+        },
+    },
+)
+def complete_upload_session(
+    session_id: str,
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    uploads: Annotated[UploadSessionFacade, Depends(get_upload_session_facade)],
+    blob_reaper: Annotated[BlobReaper, Depends(get_blob_reaper)],
+    background_tasks: BackgroundTasks,
+) -> models.File:
+    file = uploads.complete_upload_session(session_id, user)
+    # A forced upload may have replaced a file whose blob is no longer referenced
+    background_tasks.add_task(blob_reaper.reap)
+    return file
+
+
+@router.delete(
+    "/{session_id}",
+    summary="Abort a resumable upload",
+    description="This endpoint ends an upload session and discards its received chunks.",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        204: {"description": "Upload session aborted successfully"},
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+        404: UPLOAD_SESSION_NOT_FOUND_RESPONSE,
+    },
+)
+def abort_upload_session(
+    session_id: str,
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    uploads: Annotated[UploadSessionFacade, Depends(get_upload_session_facade)],
+):
+    uploads.abort_upload_session(session_id, user)
@@ -0,0 +1,41 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from skylock.api import models
+from skylock.api.dependencies import get_current_user, get_skylock_facade
+from skylock.database import models as db_models
+from skylock.skylock_facade import SkylockFacade
+
+router = APIRouter(tags=["User"], prefix="/users")
+
+
+@router.get(
+    "/me/usage",
+    summary="Get storage usage",
+    description=(
+        """
+        This endpoint returns the total size and number of the current user's files,
+        along with their storage quota in bytes, which is null when unlimited.
+        """
+    ),
+    responses={
+        200: {
+            "description": "Storage usage returned successfully",
+            "content": {
+                "application/json": {
+                    "example": {"used_bytes": 1048576, "file_count": 12, "quota_bytes": 1073741824}
+                }
+            },
+        },
+        401: {
+            "description": "Unauthorized user",
+            "content": {"application/json": {"example": {"detail": "Not authenticated"}}},
+        },
+    },
+)
+def get_usage(
+    user: Annotated[db_models.UserEntity, Depends(get_current_user)],
+    skylock: Annotated[SkylockFacade, Depends(get_skylock_facade)],
+) -> models.Usage:
+    return skylock.get_usage(user)
@@ -1,9 +1,32 @@
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 
+from skylock.config import DB_ASYNC, THREADPOOL_SIZE
+
+from skylock.database.session import async_database_engine, database_engine
+from skylock.service.blob_reaper import BlobReaper
 from skylock.pages.page_router import html_hanlder
 from skylock.api.app import api
+from skylock.api.dependencies import get_storage_service
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Sync route handlers, dependencies and file reads share this pool of worker threads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    database_engine.start()
+    if DB_ASYNC:
+        async_database_engine.start()
+    # Finish removing blobs of deletions interrupted by a previous shutdown or crash
+    BlobReaper(database_engine.session_factory, get_storage_service()).reap()
+    yield
+    await async_database_engine.dispose()
+    database_engine.dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 app.mount("/api/v1", api)
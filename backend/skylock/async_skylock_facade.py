@@ -0,0 +1,65 @@
+from typing import Optional, Union
+
+from fastapi.concurrency import run_in_threadpool
+
+from skylock.api import models
+from skylock.database import models as db_models
+from skylock.service.async_resource_service import AsyncResourceService
+from skylock.service.response_builder import ResponseBuilder
+from skylock.skylock_facade import SkylockFacade
+from skylock.utils.compression import accepted_encodings
+from skylock.utils.path import UserPath
+
+
+class AsyncSkylockFacade:
+    """Downloads served on the asyncio database path, which DB_ASYNC enables at startup."""
+
+    def __init__(
+        self,
+        *,
+        resource_service: AsyncResourceService,
+        response_builder: ResponseBuilder,
+    ):
+        self._resource_service = resource_service
+        self._response_builder = response_builder
+
+    async def download_file(
+        self, user_path: UserPath, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        file = await self._resource_service.get_file(user_path)
+        return await self._get_file_data_response(file, accept_encoding)
+
+    async def download_public_file(
+        self, file_id: str, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        file = await self._resource_service.get_public_file(file_id)
+        return await self._get_file_data_response(file, accept_encoding)
+
+    async def _get_file_data_response(
+        self, file: db_models.FileEntity, accept_encoding: Optional[str]
+    ) -> models.FileData:
+        encodings = accepted_encodings(accept_encoding)
+        data = await self._resource_service.get_file_data(file, encodings)
+        return self._response_builder.get_file_data_response(
+            file=file, file_data=data, accepted_encodings=encodings
+        )
+
+
+class ThreadedDownloadFacade:
+    """Downloads served on the sync path, their database work runs in worker threads."""
+
+    def __init__(self, skylock: SkylockFacade):
+        self._skylock = skylock
+
+    async def download_file(
+        self, user_path: UserPath, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        return await run_in_threadpool(self._skylock.download_file, user_path, accept_encoding)
+
+    async def download_public_file(
+        self, file_id: str, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        return await run_in_threadpool(self._skylock.download_public_file, file_id, accept_encoding)
+
+
+DownloadFacade = Union[AsyncSkylockFacade, ThreadedDownloadFacade]
@@ -7,3 +7,38 @@ dotenv.load_dotenv()
 
 JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_bytes(30))
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/db.sqlite")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Serve file downloads through an asyncio driver of the database instead of worker threads
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Threads shared by all folder downloads to compress archives, 0 compresses in the request thread
+ARCHIVE_COMPRESSION_THREADS = int(
+    os.getenv("ARCHIVE_COMPRESSION_THREADS", str(os.cpu_count() or 1))
+)
+
+PUBLIC_FILE_MAX_AGE = int(os.getenv("PUBLIC_FILE_MAX_AGE", "300"))
+
+# Storage quota of users without one of their own, 0 means unlimited
+USER_QUOTA_MB = int(os.getenv("USER_QUOTA_MB", "0"))
+
+# Resumable uploads not completed within this time are discarded
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+STORAGE_CONTENT_ADDRESSED = os.getenv("STORAGE_CONTENT_ADDRESSED", "false").lower() == "true"
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "false").lower() == "true"
+STORAGE_DURABILITY = os.getenv("STORAGE_DURABILITY", "batched").lower()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+S3_BUCKET = os.getenv("S3_BUCKET", "skylock")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_PREFIX = os.getenv("S3_PREFIX", "")
+S3_PART_SIZE_MB = int(os.getenv("S3_PART_SIZE_MB", "8"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
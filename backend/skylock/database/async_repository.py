@@ -0,0 +1,55 @@
+from typing import Generic, Optional, Sequence, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ColumnElement
+
+from skylock.database import models
+from skylock.database.repository import Model, deepest_folder_query, file_by_path_query
+
+
+class AsyncDatabaseRepository(Generic[Model]):
+    """Read access to one model over an AsyncSession, for the asyncio database path."""
+
+    def __init__(self, model: Type[Model], session: AsyncSession) -> None:
+        self.model = model
+        self.session = session
+
+    async def get_by_id(self, entity_id: str) -> Optional[Model]:
+        return await self.session.get(self.model, entity_id)
+
+    async def filter_one_or_none(self, *expressions: ColumnElement) -> Optional[Model]:
+        query = select(self.model)
+        if expressions:
+            query = query.where(*expressions)
+        return (await self.session.execute(query)).scalar_one_or_none()
+
+
+class AsyncUserRepository(AsyncDatabaseRepository[models.UserEntity]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(models.UserEntity, session)
+
+
+class AsyncFolderRepository(AsyncDatabaseRepository[models.FolderEntity]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(models.FolderEntity, session)
+
+    async def get_deepest_by_path(
+        self, root_folder_name: str, parts: Sequence[str]
+    ) -> tuple[Optional[models.FolderEntity], int]:
+        """Returns the deepest existing folder along the path and the number of parts it matched."""
+        row = (await self.session.execute(deepest_folder_query(root_folder_name, parts))).first()
+        if row is None:
+            return None, 0
+        return row[0], row[1]
+
+
+class AsyncFileRepository(AsyncDatabaseRepository[models.FileEntity]):
+    def __init__(self, session: AsyncSession):
+        super().__init__(models.FileEntity, session)
+
+    async def get_by_path(
+        self, root_folder_name: str, folder_parts: Sequence[str], name: str
+    ) -> Optional[models.FileEntity]:
+        query = file_by_path_query(root_folder_name, folder_parts, name)
+        return (await self.session.execute(query)).scalar_one_or_none()
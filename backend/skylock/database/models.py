@@ -1,6 +1,36 @@
 import uuid
+from datetime import datetime, timezone
 from typing import Optional, List
-from sqlalchemy import orm, ForeignKey
+from sqlalchemy import BigInteger, DateTime, orm, ForeignKey, Index, TypeDecorator
+
+
+# The ancestors come from SQLAlchemy's type hierarchy
+class UtcDateTime(TypeDecorator):  # pylint: disable=too-many-ancestors
+    """Timestamp stored in UTC and always read back timezone-aware, also on SQLite."""
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    @property
+    def python_type(self) -> type:
+        return datetime
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_literal_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        return self.process_bind_param(value, dialect)
+
+    def process_result_value(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class Base(orm.DeclarativeBase):
@@ -19,20 +49,31 @@ class UserEntity(Base):
     username: orm.Mapped[str] = orm.mapped_column(unique=True, nullable=False)
     password: orm.Mapped[str] = orm.mapped_column(nullable=False)
 
+    # Logical size and number of the user's files, kept up to date with every change to them
+    used_bytes: orm.Mapped[int] = orm.mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    file_count: orm.Mapped[int] = orm.mapped_column(nullable=False, default=0, server_default="0")
+    # Overrides the default quota for this user
+    quota_bytes: orm.Mapped[Optional[int]] = orm.mapped_column(BigInteger, nullable=True)
+
     folders: orm.Mapped[List["FolderEntity"]] = orm.relationship(
-        "FolderEntity", back_populates="owner", lazy="selectin"
+        "FolderEntity", back_populates="owner", lazy="raise"
     )
     files: orm.Mapped[List["FileEntity"]] = orm.relationship(
-        "FileEntity", back_populates="owner", lazy="selectin"
+        "FileEntity", back_populates="owner", lazy="raise"
     )
 
 
 class FolderEntity(Base):
     __tablename__ = "folders"
+    __table_args__ = (
+        Index("ix_folders_parent_folder_id_name", "parent_folder_id", "name", unique=True),
+    )
 
     name: orm.Mapped[str] = orm.mapped_column(nullable=False)
     parent_folder_id: orm.Mapped[Optional[int]] = orm.mapped_column(ForeignKey("folders.id"))
-    owner_id: orm.Mapped[int] = orm.mapped_column(ForeignKey("users.id"))
+    owner_id: orm.Mapped[int] = orm.mapped_column(ForeignKey("users.id"), index=True)
     is_public: orm.Mapped[bool] = orm.mapped_column(nullable=False, default=False)
 
     parent_folder: orm.Mapped[Optional["FolderEntity"]] = orm.relationship(
@@ -40,11 +81,11 @@ class FolderEntity(Base):
     )
 
     files: orm.Mapped[List["FileEntity"]] = orm.relationship(
-        "FileEntity", back_populates="folder", lazy="selectin"
+        "FileEntity", back_populates="folder", passive_deletes=True
     )
 
     subfolders: orm.Mapped[List["FolderEntity"]] = orm.relationship(
-        "FolderEntity", back_populates="parent_folder", lazy="selectin"
+        "FolderEntity", back_populates="parent_folder", passive_deletes=True
     )
 
     owner: orm.Mapped[UserEntity] = orm.relationship("UserEntity", back_populates="folders")
@@ -55,12 +96,66 @@ class FolderEntity(Base):
 
 class FileEntity(Base):
     __tablename__ = "files"
+    __table_args__ = (Index("ix_files_folder_id_name", "folder_id", "name", unique=True),)
 
     name: orm.Mapped[str] = orm.mapped_column(nullable=False)
     folder_id: orm.Mapped[int] = orm.mapped_column(ForeignKey("folders.id"))
-    owner_id: orm.Mapped[int] = orm.mapped_column(ForeignKey("users.id"))
+    owner_id: orm.Mapped[int] = orm.mapped_column(ForeignKey("users.id"), index=True)
     is_public: orm.Mapped[bool] = orm.mapped_column(nullable=False, default=False)
+    blob_key: orm.Mapped[str] = orm.mapped_column(nullable=False, index=True)
+    blob_encoding: orm.Mapped[Optional[str]] = orm.mapped_column(nullable=True)
+    # Recorded while the file is uploaded, missing on files uploaded by older versions
+    # until they are backfilled
+    size: orm.Mapped[Optional[int]] = orm.mapped_column(BigInteger, nullable=True)
+    sha256: orm.Mapped[Optional[str]] = orm.mapped_column(nullable=True)
+    mime_type: orm.Mapped[Optional[str]] = orm.mapped_column(nullable=True)
+    created_at: orm.Mapped[Optional[datetime]] = orm.mapped_column(
+        UtcDateTime, nullable=True, default=utc_now
+    )
+    modified_at: orm.Mapped[Optional[datetime]] = orm.mapped_column(
+        UtcDateTime, nullable=True, default=utc_now
+    )
 
     folder: orm.Mapped[FolderEntity] = orm.relationship("FolderEntity", back_populates="files")
 
     owner: orm.Mapped[UserEntity] = orm.relationship("UserEntity", back_populates="files")
+
+
+class BlobEntity(Base):
+    """Stored blob with the number of files referencing it, reaped once nothing references it."""
+
+    __tablename__ = "blobs"
+
+    ref_count: orm.Mapped[int] = orm.mapped_column(nullable=False, default=0, index=True)
+
+
+class UploadSessionEntity(Base):
+    """Resumable upload of a file, its chunks are written into one staging file in any order."""
+
+    __tablename__ = "upload_sessions"
+
+    path: orm.Mapped[str] = orm.mapped_column(nullable=False)
+    size: orm.Mapped[int] = orm.mapped_column(BigInteger, nullable=False)
+    force: orm.Mapped[bool] = orm.mapped_column(nullable=False, default=False)
+    is_public: orm.Mapped[bool] = orm.mapped_column(nullable=False, default=False)
+    owner_id: orm.Mapped[str] = orm.mapped_column(ForeignKey("users.id"), index=True)
+    created_at: orm.Mapped[datetime] = orm.mapped_column(
+        UtcDateTime, nullable=False, default=utc_now
+    )
+
+    owner: orm.Mapped[UserEntity] = orm.relationship("UserEntity")
+
+
+class UploadChunkEntity(Base):
+    """Byte range of an upload session that was received completely."""
+
+    __tablename__ = "upload_chunks"
+    __table_args__ = (
+        Index("ix_upload_chunks_session_id_offset", "session_id", "offset", unique=True),
+    )
+
+    session_id: orm.Mapped[str] = orm.mapped_column(
+        ForeignKey("upload_sessions.id", ondelete="CASCADE")
+    )
+    offset: orm.Mapped[int] = orm.mapped_column(BigInteger, nullable=False)
+    size: orm.Mapped[int] = orm.mapped_column(BigInteger, nullable=False)
@@ -1,23 +1,122 @@
-from typing import Generic, Optional, Type, TypeVar
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Generic, Iterator, Optional, Sequence, Type, TypeVar
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    CTE,
+    Executable,
+    Select,
+    Update,
+    case,
+    delete,
+    exists,
+    func,
+    literal,
+    null,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.orm.interfaces import ColumnElement
 
 from skylock.database import models
 
 Model = TypeVar("Model", bound=models.Base)
 
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def folder_path_cte(root_folder_name: str, parts: Sequence[str]) -> CTE:
+    """Recursive CTE of (id, depth) rows for every existing folder along the given path.
+
+    Depth 0 is the root folder, depth N is the folder named by parts[N - 1].
+    """
+    root = select(models.FolderEntity.id, literal(0).label("depth")).where(
+        models.FolderEntity.parent_folder_id.is_(None),
+        models.FolderEntity.name == root_folder_name,
+    )
+    path = root.cte("folder_path", recursive=True)
+
+    child = aliased(models.FolderEntity)
+    if parts:
+        next_name = case(*[(path.c.depth == depth, name) for depth, name in enumerate(parts)])
+    else:
+        next_name = null()
+
+    return path.union_all(
+        select(child.id, path.c.depth + 1)
+        .join(path, child.parent_folder_id == path.c.id)
+        .where(child.name == next_name)
+    )
+
+
+def deepest_folder_query(root_folder_name: str, parts: Sequence[str]) -> Select:
+    """Query of the deepest existing folder along the path and the number of parts it matched."""
+    path = folder_path_cte(root_folder_name, parts)
+    return (
+        select(models.FolderEntity, path.c.depth)
+        .join(path, models.FolderEntity.id == path.c.id)
+        .order_by(path.c.depth.desc())
+        .limit(1)
+    )
+
+
+def file_by_path_query(root_folder_name: str, folder_parts: Sequence[str], name: str) -> Select:
+    path = folder_path_cte(root_folder_name, folder_parts)
+    return (
+        select(models.FileEntity)
+        .join(path, models.FileEntity.folder_id == path.c.id)
+        .where(path.c.depth == len(folder_parts), models.FileEntity.name == name)
+    )
+
+
+def folder_subtree_cte(folder_id: str) -> CTE:
+    """Recursive CTE of the ids of the given folder and all of its descendant folders.
+
+    The CTE is nested inside the subquery using it, so UPDATE and DELETE statements built on
+    top of it still start with their own keyword and sqlite3 reports their rowcount.
+    """
+    root = select(models.FolderEntity.id).where(models.FolderEntity.id == folder_id)
+    subtree = root.cte("folder_subtree", recursive=True, nesting=True)
+
+    child = aliased(models.FolderEntity)
+    return subtree.union_all(select(child.id).join(subtree, child.parent_folder_id == subtree.c.id))
+
 
 class DatabaseRepository(Generic[Model]):
     def __init__(self, model: Type[Model], session: Session) -> None:
         self.model = model
         self.session = session
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Groups all repository operations on the session into one commit made on exit.
+
+        Inside a transaction save and delete only flush. Nested transactions join the
+        outermost one, and any exception rolls the whole unit of work back.
+        """
+        if self.session.info.get(UNIT_OF_WORK_KEY):
+            yield
+            return
+
+        self.session.info[UNIT_OF_WORK_KEY] = True
+        try:
+            yield
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        finally:
+            del self.session.info[UNIT_OF_WORK_KEY]
+
     def save(self, entity: Model) -> Model:
         self.session.add(entity)
-        self.session.commit()
-        self.session.refresh(entity)
+        self._flush_or_commit()
         return entity
 
     def get_by_id(self, entity_id: str) -> Optional[Model]:
@@ -25,7 +124,7 @@ class DatabaseRepository(Generic[Model]):
 
     def delete(self, entity: Model) -> None:
         self.session.delete(entity)
-        self.session.commit()
+        self._flush_or_commit()
 
     def filter(self, *expressions: ColumnElement) -> list[Model]:
         query = select(self.model)
@@ -39,6 +138,40 @@ class DatabaseRepository(Generic[Model]):
             query = query.where(*expressions)
         return self.session.execute(query).scalar_one_or_none()
 
+    def _execute_bulk(self, statement: Executable, *expired_attributes: str) -> int:
+        """Executes a bulk UPDATE or DELETE and expires the affected attributes of loaded entities."""
+        self.session.flush()
+        result = self.session.execute(statement.execution_options(synchronize_session=False))
+        self._expire_loaded(*expired_attributes)
+        return result.rowcount
+
+    def _expire_loaded(self, *attributes: str) -> None:
+        for entity in list(self.session.identity_map.values()):
+            if isinstance(entity, self.model):
+                self.session.expire(entity, attributes)
+
+    def _dialect_insert(self):
+        """The INSERT construct of the database, which supports ON CONFLICT clauses."""
+        dialect = self.session.get_bind().dialect.name
+        try:
+            return _DIALECT_INSERTS[dialect]
+        except KeyError:
+            raise NotImplementedError(
+                f"Upserts require INSERT ... ON CONFLICT, which is only "
+                f"supported on {', '.join(_DIALECT_INSERTS)} databases, not on {dialect}"
+            ) from None
+
+    def _flush_or_commit(self) -> None:
+        if self.session.info.get(UNIT_OF_WORK_KEY):
+            self.session.flush()
+            return
+
+        try:
+            self.session.commit()
+        except SQLAlchemyError:
+            self.session.rollback()
+            raise
+
 
 class UserRepository(DatabaseRepository[models.UserEntity]):
     def __init__(self, session: Session):
@@ -47,6 +180,35 @@ class UserRepository(DatabaseRepository[models.UserEntity]):
     def get_by_username(self, username: str) -> Optional[models.UserEntity]:
         return self.filter_one_or_none(models.UserEntity.username == username)
 
+    def add_usage(self, user_id: str, size: int, files: int) -> None:
+        """Adds to the usage counters of the user, negative amounts release usage."""
+        self._execute_bulk(self._usage_update(user_id, size, files), "used_bytes", "file_count")
+
+    def charge_usage(
+        self, user_id: str, size: int, files: int, default_quota: Optional[int] = None
+    ) -> bool:
+        """Adds to the usage counters of the user, unless that takes them over their quota.
+
+        The quota is checked by the UPDATE itself, so concurrent uploads cannot overshoot it.
+        """
+        quota = models.UserEntity.quota_bytes
+        if default_quota is not None:
+            quota = func.coalesce(quota, default_quota)  # pylint: disable=assignment-from-no-return
+        within_quota = or_(quota.is_(None), models.UserEntity.used_bytes + size <= quota)
+        statement = self._usage_update(user_id, size, files, within_quota)
+        return self._execute_bulk(statement, "used_bytes", "file_count") == 1
+
+    @staticmethod
+    def _usage_update(user_id: str, size: int, files: int, *conditions: ColumnElement) -> Update:
+        return (
+            update(models.UserEntity)
+            .where(models.UserEntity.id == user_id, *conditions)
+            .values(
+                used_bytes=models.UserEntity.used_bytes + size,
+                file_count=models.UserEntity.file_count + files,
+            )
+        )
+
 
 class FolderRepository(DatabaseRepository[models.FolderEntity]):
     def __init__(self, session: Session):
@@ -60,6 +222,61 @@ class FolderRepository(DatabaseRepository[models.FolderEntity]):
             models.FolderEntity.name == name,
         )
 
+    def has_children(self, folder_id: str) -> bool:
+        return self._exists_child(folder_id)
+
+    def has_child_named(self, folder_id: str, name: str) -> bool:
+        """Checks for a file or a subfolder of the given name without loading the folder contents."""
+        return self._exists_child(folder_id, name)
+
+    def _exists_child(self, folder_id: str, name: Optional[str] = None) -> bool:
+        subfolders = select(models.FolderEntity.id).where(
+            models.FolderEntity.parent_folder_id == folder_id
+        )
+        files = select(models.FileEntity.id).where(models.FileEntity.folder_id == folder_id)
+        if name is not None:
+            subfolders = subfolders.where(models.FolderEntity.name == name)
+            files = files.where(models.FileEntity.name == name)
+        return bool(self.session.execute(select(or_(exists(subfolders), exists(files)))).scalar())
+
+    def get_subfolders_page(
+        self, folder_id: str, after_name: Optional[str] = None, limit: Optional[int] = None
+    ) -> list[models.FolderEntity]:
+        """Subfolders ordered by name, starting after after_name (keyset pagination)."""
+        query = select(models.FolderEntity).where(models.FolderEntity.parent_folder_id == folder_id)
+        if after_name is not None:
+            query = query.where(models.FolderEntity.name > after_name)
+        query = query.order_by(models.FolderEntity.name).limit(limit)
+        return list(self.session.execute(query).scalars())
+
+    def get_deepest_by_path(
+        self, root_folder_name: str, parts: Sequence[str]
+    ) -> tuple[Optional[models.FolderEntity], int]:
+        """Returns the deepest existing folder along the path and the number of parts it matched."""
+        row = self.session.execute(deepest_folder_query(root_folder_name, parts)).first()
+        if row is None:
+            return None, 0
+        return row[0], row[1]
+
+    def update_visibility(self, folder_id: str, is_public: bool, recursive: bool) -> int:
+        """Sets visibility of the folder, and of all its descendants if recursive, in one UPDATE."""
+        if recursive:
+            condition = models.FolderEntity.id.in_(select(folder_subtree_cte(folder_id).c.id))
+        else:
+            condition = models.FolderEntity.id == folder_id
+
+        return self._execute_bulk(
+            update(models.FolderEntity).where(condition).values(is_public=is_public), "is_public"
+        )
+
+    def delete_subtree(self, folder_id: str) -> int:
+        """Deletes the folder and all of its descendant folders in one DELETE."""
+        return self._execute_bulk(
+            delete(models.FolderEntity).where(
+                models.FolderEntity.id.in_(select(folder_subtree_cte(folder_id).c.id))
+            )
+        )
+
 
 class FileRepository(DatabaseRepository[models.FileEntity]):
     def __init__(self, session: Session):
@@ -71,3 +288,243 @@ class FileRepository(DatabaseRepository[models.FileEntity]):
         return self.filter_one_or_none(
             models.FileEntity.name == name, models.FileEntity.folder == parent
         )
+
+    def get_folder_page(
+        self, folder_id: str, after_name: Optional[str] = None, limit: Optional[int] = None
+    ) -> list[models.FileEntity]:
+        """Files of the folder ordered by name, starting after after_name (keyset pagination)."""
+        query = select(models.FileEntity).where(models.FileEntity.folder_id == folder_id)
+        if after_name is not None:
+            query = query.where(models.FileEntity.name > after_name)
+        query = query.order_by(models.FileEntity.name).limit(limit)
+        return list(self.session.execute(query).scalars())
+
+    def get_by_path(
+        self, root_folder_name: str, folder_parts: Sequence[str], name: str
+    ) -> Optional[models.FileEntity]:
+        query = file_by_path_query(root_folder_name, folder_parts, name)
+        return self.session.execute(query).scalar_one_or_none()
+
+    def update_visibility_in_folder(self, folder_id: str, is_public: bool, recursive: bool) -> int:
+        """Sets visibility of files in the folder, or in its whole subtree if recursive."""
+        if recursive:
+            condition = models.FileEntity.folder_id.in_(select(folder_subtree_cte(folder_id).c.id))
+        else:
+            condition = models.FileEntity.folder_id == folder_id
+
+        return self._execute_bulk(
+            update(models.FileEntity).where(condition).values(is_public=is_public), "is_public"
+        )
+
+    def delete_in_subtree(self, folder_id: str) -> int:
+        """Deletes all files of the folder and of its descendant folders in one DELETE."""
+        return self._execute_bulk(
+            delete(models.FileEntity).where(
+                models.FileEntity.folder_id.in_(select(folder_subtree_cte(folder_id).c.id))
+            )
+        )
+
+    def get_subtree_usage(self, folder_id: str) -> tuple[int, int]:
+        """Total size and number of the files in the folder and its descendant folders."""
+        query = select(
+            func.coalesce(func.sum(models.FileEntity.size), 0),
+            func.count(models.FileEntity.id),  # pylint: disable=not-callable
+        ).where(models.FileEntity.folder_id.in_(select(folder_subtree_cte(folder_id).c.id)))
+        size, files = self.session.execute(query).one()
+        return size, files
+
+    def get_missing_metadata(
+        self, after_id: Optional[str] = None, limit: Optional[int] = None
+    ) -> list[models.FileEntity]:
+        """Files uploaded before their metadata was recorded, ordered by id after after_id."""
+        query = select(models.FileEntity).where(models.FileEntity.sha256.is_(None))
+        if after_id is not None:
+            query = query.where(models.FileEntity.id > after_id)
+        query = query.order_by(models.FileEntity.id).limit(limit)
+        return list(self.session.execute(query).scalars())
+
+    def count_missing_metadata(self) -> int:
+        query = select(func.count(models.FileEntity.id))  # pylint: disable=not-callable
+        query = query.where(models.FileEntity.sha256.is_(None))
+        return self.session.execute(query).scalar_one()
+
+    def fill_metadata(
+        self, file_id: str, size: int, sha256: str, mime_type: str, timestamp: datetime
+    ) -> int:
+        """Records the metadata of a file, unless it was replaced by a new upload meanwhile."""
+        return self._execute_bulk(
+            update(models.FileEntity)
+            .where(models.FileEntity.id == file_id, models.FileEntity.sha256.is_(None))
+            .values(
+                size=size,
+                sha256=sha256,
+                mime_type=mime_type,
+                created_at=timestamp,
+                modified_at=timestamp,
+            )
+        )
+
+
+class BlobRepository(DatabaseRepository[models.BlobEntity]):
+    def __init__(self, session: Session):
+        super().__init__(models.BlobEntity, session)
+
+    def add_reference(self, key: str) -> None:
+        """Counts one more file referencing the blob, registering the blob if it is new.
+
+        The upsert locks the blob's row until the transaction ends, which keeps the reaper from
+        unlinking the blob while its data is being stored.
+        """
+        statement = (
+            self._dialect_insert()(models.BlobEntity)
+            .values(id=key, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[models.BlobEntity.id],
+                set_={"ref_count": models.BlobEntity.ref_count + 1},
+            )
+        )
+        self._execute_bulk(statement, "ref_count")
+
+    def release(self, key: str) -> None:
+        self._execute_bulk(
+            update(models.BlobEntity)
+            .where(models.BlobEntity.id == key)
+            .values(ref_count=models.BlobEntity.ref_count - 1),
+            "ref_count",
+        )
+
+    def release_files_in_subtree(self, folder_id: str) -> None:
+        """Drops references of all files in the folder subtree, before the files are deleted."""
+        in_subtree = models.FileEntity.folder_id.in_(select(folder_subtree_cte(folder_id).c.id))
+        references = (
+            select(func.count(models.FileEntity.id))  # pylint: disable=not-callable
+            .where(models.FileEntity.blob_key == models.BlobEntity.id, in_subtree)
+            .scalar_subquery()
+        )
+        self._execute_bulk(
+            update(models.BlobEntity)
+            .where(models.BlobEntity.id.in_(select(models.FileEntity.blob_key).where(in_subtree)))
+            .values(ref_count=models.BlobEntity.ref_count - references),
+            "ref_count",
+        )
+
+    def get_keys_page(self, after_key: Optional[str] = None, limit: int = 1000) -> list[str]:
+        """Blob keys in ascending order of their bytes, starting after after_key (keyset).
+
+        Byte order matches the order in which storage backends list their blobs, whatever the
+        collation of the database is.
+        """
+        key = self._binary_collated(models.BlobEntity.id)
+        query = select(models.BlobEntity.id)
+        if after_key is not None:
+            query = query.where(key > after_key)
+        query = query.order_by(key).limit(limit)
+        return list(self.session.execute(query).scalars())
+
+    def adopt(self, keys: Sequence[str]) -> None:
+        """Registers stored blobs nothing knew about as unreferenced, so that they get reaped.
+
+        Blobs registered meanwhile, e.g. by an upload of the same content, are left as they are.
+        """
+        if not keys:
+            return
+        statement = (
+            self._dialect_insert()(models.BlobEntity)
+            .values([{"id": key, "ref_count": 0} for key in keys])
+            .on_conflict_do_nothing(index_elements=[models.BlobEntity.id])
+        )
+        self._execute_bulk(statement, "ref_count")
+
+    def _binary_collated(self, column: ColumnElement) -> ColumnElement:
+        if self.session.get_bind().dialect.name == "postgresql":
+            return column.collate("C")
+        return column
+
+    def collect_unreferenced(self, limit: int) -> list[str]:
+        """Deletes up to limit blobs without references and returns their keys.
+
+        The check and the deletion are one DELETE ... RETURNING statement, so a blob that gets
+        referenced again concurrently is never returned.
+        """
+        unreferenced = (
+            select(models.BlobEntity.id)
+            .where(models.BlobEntity.ref_count <= 0)
+            .order_by(models.BlobEntity.id)
+            .limit(limit)
+        )
+        statement = (
+            delete(models.BlobEntity)
+            .where(models.BlobEntity.id.in_(unreferenced), models.BlobEntity.ref_count <= 0)
+            .returning(models.BlobEntity.id)
+        )
+        self.session.flush()
+        result = self.session.execute(statement.execution_options(synchronize_session=False))
+        return list(result.scalars())
+
+
+class UploadSessionRepository(DatabaseRepository[models.UploadSessionEntity]):
+    def __init__(self, session: Session):
+        super().__init__(models.UploadSessionEntity, session)
+
+    def get_owned(self, session_id: str, owner_id: str) -> Optional[models.UploadSessionEntity]:
+        return self.filter_one_or_none(
+            models.UploadSessionEntity.id == session_id,
+            models.UploadSessionEntity.owner_id == owner_id,
+        )
+
+    def add_chunk(self, session_id: str, offset: int, size: int) -> None:
+        """Records a received chunk, a retried one keeps the larger of the sizes received."""
+        chunk = self._dialect_insert()(models.UploadChunkEntity).values(
+            session_id=session_id, offset=offset, size=size
+        )
+        statement = chunk.on_conflict_do_update(
+            index_elements=[models.UploadChunkEntity.session_id, models.UploadChunkEntity.offset],
+            set_={
+                "size": case(
+                    (chunk.excluded.size > models.UploadChunkEntity.size, chunk.excluded.size),
+                    else_=models.UploadChunkEntity.size,
+                )
+            },
+        )
+        self._execute_bulk(statement)
+        self._flush_or_commit()
+
+    def get_chunk_ranges(self, session_id: str) -> list[tuple[int, int]]:
+        chunks = self.session.execute(
+            select(models.UploadChunkEntity.offset, models.UploadChunkEntity.size).where(
+                models.UploadChunkEntity.session_id == session_id
+            )
+        )
+        return [(offset, offset + size) for offset, size in chunks]
+
+    def collect_expired(self, created_before: datetime, limit: int) -> list[str]:
+        """Deletes up to limit sessions created before the given time with their chunks.
+
+        Returns the ids of the deleted sessions, whose staging files are then to be discarded.
+        """
+        expired = list(
+            self.session.execute(
+                select(models.UploadSessionEntity.id)
+                .where(models.UploadSessionEntity.created_at < created_before)
+                .order_by(models.UploadSessionEntity.created_at)
+                .limit(limit)
+            ).scalars()
+        )
+        if expired:
+            self._execute_bulk(
+                delete(models.UploadChunkEntity).where(
+                    models.UploadChunkEntity.session_id.in_(expired)
+                )
+            )
+            self._execute_bulk(
+                delete(models.UploadSessionEntity).where(models.UploadSessionEntity.id.in_(expired))
+            )
+        return expired
+
+    def delete_with_chunks(self, upload_session: models.UploadSessionEntity) -> None:
+        self._execute_bulk(
+            delete(models.UploadChunkEntity).where(
+                models.UploadChunkEntity.session_id == upload_session.id
+            )
+        )
+        self.delete(upload_session)
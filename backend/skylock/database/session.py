@@ -1,17 +1,196 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Optional
+
+from sqlalchemy import Engine, QueuePool, create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
-from skylock.config import DATABASE_URL
+from skylock.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+
+
+class DatabaseEngine:
+    """Owns the engine and its connection pool for the lifetime of a worker process."""
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW,
+        pool_timeout: int = DB_POOL_TIMEOUT,
+        pool_recycle: int = DB_POOL_RECYCLE,
+        pool_pre_ping: bool = DB_POOL_PRE_PING,
+    ):
+        self._url = url
+        self._engine_options = _engine_options(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+        )
+        self._engine: Optional[Engine] = None
+        self._session_factory: Optional[sessionmaker[Session]] = None
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            self.start()
+        assert self._engine is not None
+        return self._engine
+
+    @property
+    def session_factory(self) -> sessionmaker[Session]:
+        if self._session_factory is None:
+            self.start()
+        assert self._session_factory is not None
+        return self._session_factory
+
+    def start(self) -> None:
+        if self._engine is not None:
+            return
+        self._engine = create_engine(self._url, **self._engine_options)
+        self._session_factory = sessionmaker(bind=self._engine, expire_on_commit=False)
+
+    def dispose(self) -> None:
+        if self._engine is None:
+            return
+        self._engine.dispose()
+        self._engine = None
+        self._session_factory = None
+
+    def pool_statistics(self) -> dict[str, Any]:
+        pool = self.engine.pool
+        statistics: dict[str, Any] = {"pool": type(pool).__name__, "status": pool.status()}
+        if isinstance(pool, QueuePool):
+            statistics.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        return statistics
+
+
+class AsyncDatabaseEngine:
+    """Owns the asyncio engine and its connection pool for the lifetime of a worker process.
+
+    The URL names the sync driver like DATABASE_URL does. The asyncio driver of its dialect is
+    only looked up when the engine starts, so workers not using it need no such driver.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW,
+        pool_timeout: int = DB_POOL_TIMEOUT,
+        pool_recycle: int = DB_POOL_RECYCLE,
+        pool_pre_ping: bool = DB_POOL_PRE_PING,
+    ):
+        self._url = url
+        self._pool_options: dict[str, Any] = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pool_pre_ping": pool_pre_ping,
+        }
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self.start()
+        assert self._engine is not None
+        return self._engine
+
+    @property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        if self._session_factory is None:
+            self.start()
+        assert self._session_factory is not None
+        return self._session_factory
+
+    def start(self) -> None:
+        if self._engine is not None:
+            return
+        url = async_url(self._url)
+        self._engine = create_async_engine(url, **_engine_options(url, **self._pool_options))
+        self._session_factory = async_sessionmaker(bind=self._engine, expire_on_commit=False)
+
+    async def dispose(self) -> None:
+        if self._engine is None:
+            return
+        await self._engine.dispose()
+        self._engine = None
+        self._session_factory = None
+
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> str:
+    """The database URL with the driver replaced by the asyncio driver of its dialect."""
+    url_object = make_url(url)
+    backend = url_object.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver is supported for {backend} databases")
+    url_object = url_object.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url_object.render_as_string(hide_password=False)
+
+
+def _engine_options(
+    url: str,
+    *,
+    pool_size: int,
+    max_overflow: int,
+    pool_timeout: int,
+    pool_recycle: int,
+    pool_pre_ping: bool,
+) -> dict[str, Any]:
+    options: dict[str, Any] = {"pool_pre_ping": pool_pre_ping, "pool_recycle": pool_recycle}
+    # Only queue based pools take sizes, in memory SQLite for one keeps a connection per thread
+    url_object = make_url(url)
+    if issubclass(url_object.get_dialect().get_pool_class(url_object), QueuePool):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    return options
+
+
+database_engine = DatabaseEngine(DATABASE_URL)
+async_database_engine = AsyncDatabaseEngine(DATABASE_URL)
 
 
 def get_db_session():
-    engine = create_engine(DATABASE_URL)
-    factory = sessionmaker(bind=engine)
-    with factory() as session:
+    with database_engine.session_factory() as session:
         try:
             yield session
             session.commit()
         except SQLAlchemyError:
             session.rollback()
             raise
+
+
+async def get_async_db_session():
+    async with async_database_engine.session_factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
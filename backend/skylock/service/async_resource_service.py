@@ -0,0 +1,50 @@
+from functools import partial
+from typing import IO, Container
+
+import anyio
+
+from skylock.database import models as db_models
+from skylock.database.async_repository import AsyncFileRepository
+from skylock.service.path_resolver import AsyncPathResolver
+from skylock.utils.exceptions import ForbiddenActionException, ResourceNotFoundException
+from skylock.utils.path import UserPath
+from skylock.utils.storage import FileStorageService
+
+
+class AsyncResourceService:
+    """The file reads of ResourceService on the asyncio database path, used by downloads."""
+
+    def __init__(
+        self,
+        file_repository: AsyncFileRepository,
+        path_resolver: AsyncPathResolver,
+        file_storage_service: FileStorageService,
+    ):
+        self._file_repository = file_repository
+        self._path_resolver = path_resolver
+        self._file_storage_service = file_storage_service
+
+    async def get_file(self, user_path: UserPath) -> db_models.FileEntity:
+        return await self._path_resolver.file_from_path(user_path)
+
+    async def get_public_file(self, file_id: str) -> db_models.FileEntity:
+        file = await self._file_repository.get_by_id(file_id)
+
+        if file is None:
+            raise ResourceNotFoundException(missing_resource_name=file_id)
+        if not file.is_public:
+            raise ForbiddenActionException(f"File with id {file_id} is not public")
+
+        return file
+
+    async def get_file_data(
+        self, file: db_models.FileEntity, accepted_encodings: Container[str] = ()
+    ) -> IO[bytes]:
+        # Opening a blob may block, on S3 it is a request, so it runs in a worker thread
+        return await anyio.to_thread.run_sync(
+            partial(
+                self._file_storage_service.get_file,
+                file=file,
+                accepted_encodings=accepted_encodings,
+            )
+        )
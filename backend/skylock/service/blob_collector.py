@@ -0,0 +1,143 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, ContextManager, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from skylock.database.repository import BlobRepository, UploadSessionRepository
+from skylock.service.blob_reaper import BlobReaper
+from skylock.utils.rate_limit import RateLimiter
+from skylock.utils.storage import FileStorageService
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_GRACE_PERIOD = 60 * 60
+
+# How many dangling keys are kept in the report
+DANGLING_SAMPLE_SIZE = 100
+
+
+@dataclass
+class CollectionReport:
+    scanned: int = 0
+    orphaned: int = 0
+    orphaned_bytes: int = 0
+    dangling: int = 0
+    dangling_sample: list[str] = field(default_factory=list)
+    collected: int = 0
+    stale_incoming: int = 0
+
+
+class BlobCollector:
+    """Finds stored blobs unknown to the database and blobs the database lacks in storage.
+
+    Both sides are listed in key order, storage by its backend and the database with keyset
+    pagination, and merged like two sorted files, so memory stays bounded however many blobs
+    there are. Orphans are registered as unreferenced blobs and removed by the blob reaper,
+    whose row locks keep an upload of the same content from losing its blob. Blobs younger
+    than the grace period are left alone, as their upload may not have committed yet.
+
+    Files left in the staging folder by crashed uploads are removed too, once older than the
+    grace period, unless they hold the data of an upload session that is still open.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        file_storage_service: FileStorageService,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        grace_period: float = DEFAULT_GRACE_PERIOD,
+        rate_limiter: Optional[RateLimiter] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._session_factory = session_factory
+        self._file_storage_service = file_storage_service
+        self._batch_size = batch_size
+        self._grace_period = grace_period
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self._clock = clock
+
+    def collect(self, dry_run: bool = False) -> CollectionReport:
+        report = CollectionReport()
+        backend = self._file_storage_service.backend
+        cutoff = self._clock() - self._grace_period
+
+        with self._session_factory() as session:
+            blob_repository = BlobRepository(session)
+            known_keys = self._iter_known_keys(blob_repository)
+            known = next(known_keys, None)
+            orphans: list[str] = []
+
+            for key, blob_stat in backend.iter_blobs():
+                self._rate_limiter.acquire()
+                report.scanned += 1
+
+                while known is not None and known < key:
+                    self._report_dangling(report, known)
+                    known = next(known_keys, None)
+
+                if known == key:
+                    known = next(known_keys, None)
+                    continue
+
+                if blob_stat.modified > cutoff:
+                    continue
+                report.orphaned += 1
+                report.orphaned_bytes += blob_stat.size
+                orphans.append(key)
+                if len(orphans) >= self._batch_size:
+                    self._adopt(blob_repository, orphans, dry_run)
+
+            self._adopt(blob_repository, orphans, dry_run)
+            while known is not None:
+                self._report_dangling(report, known)
+                known = next(known_keys, None)
+
+            self._sweep_incoming(UploadSessionRepository(session), report, cutoff, dry_run)
+
+        if not dry_run:
+            report.collected = BlobReaper(
+                self._session_factory,
+                self._file_storage_service,
+                batch_size=self._batch_size,
+                rate_limiter=self._rate_limiter,
+            ).reap()
+        return report
+
+    def _iter_known_keys(self, blob_repository: BlobRepository) -> Iterator[str]:
+        after_key = None
+        while page := blob_repository.get_keys_page(after_key, self._batch_size):
+            yield from page
+            after_key = page[-1]
+
+    def _report_dangling(self, report: CollectionReport, key: str) -> None:
+        # Blobs of the legacy layout are not listed, but still found by key
+        if self._file_storage_service.backend.exists(key):
+            return
+        report.dangling += 1
+        if len(report.dangling_sample) < DANGLING_SAMPLE_SIZE:
+            report.dangling_sample.append(key)
+
+    def _sweep_incoming(
+        self,
+        upload_session_repository: UploadSessionRepository,
+        report: CollectionReport,
+        cutoff: float,
+        dry_run: bool,
+    ) -> None:
+        for name, stat in self._file_storage_service.iter_incoming():
+            self._rate_limiter.acquire()
+            if stat.modified > cutoff:
+                continue
+            # Open upload sessions keep their data under the session id
+            if upload_session_repository.get_by_id(name) is not None:
+                continue
+            report.stale_incoming += 1
+            if not dry_run:
+                self._file_storage_service.discard_incoming(name)
+
+    @staticmethod
+    def _adopt(blob_repository: BlobRepository, orphans: list[str], dry_run: bool) -> None:
+        if not dry_run:
+            with blob_repository.transaction():
+                blob_repository.adopt(orphans)
+        orphans.clear()
@@ -0,0 +1,45 @@
+from typing import Callable, ContextManager, Optional
+
+from sqlalchemy.orm import Session
+
+from skylock.database.repository import BlobRepository
+from skylock.utils.rate_limit import RateLimiter
+from skylock.utils.storage import FileStorageService
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class BlobReaper:
+    """Removes blobs no longer referenced by any file, one batch at a time.
+
+    Every batch is unlinked from storage before its rows are committed as deleted, so a crash
+    in between only leads to the batch being unlinked again on the next run. The rows stay
+    locked meanwhile, so an upload of the same content waits instead of reusing the blob.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        file_storage_service: FileStorageService,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self._session_factory = session_factory
+        self._file_storage_service = file_storage_service
+        self._batch_size = batch_size
+        self._rate_limiter = rate_limiter or RateLimiter()
+
+    def reap(self) -> int:
+        reaped = 0
+        with self._session_factory() as session:
+            blob_repository = BlobRepository(session)
+            while True:
+                with blob_repository.transaction():
+                    batch = blob_repository.collect_unreferenced(self._batch_size)
+                    self._file_storage_service.delete_blobs(batch)
+                if not batch:
+                    break
+                # Paced between batches, so that no rows stay locked while waiting
+                self._rate_limiter.acquire(len(batch))
+                reaped += len(batch)
+        return reaped
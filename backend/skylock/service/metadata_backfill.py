@@ -0,0 +1,87 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Callable, ContextManager
+
+from sqlalchemy.orm import Session
+
+from skylock.database import models as db_models
+from skylock.database.repository import FileRepository, UserRepository
+from skylock.utils.media_types import DEFAULT_MEDIA_TYPE, detect_media_type
+from skylock.utils.storage import FileStorageService, stat_blob
+from skylock.utils.streaming import STREAM_CHUNK_SIZE
+
+DEFAULT_BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+class FileMetadataBackfill:
+    """Records size, checksum, media type and timestamps of files uploaded by older versions.
+
+    Every file is read once from storage, outside of the transaction recording its batch.
+    Files are visited in id order, so the backfill can be interrupted and run again, and files
+    whose blob is missing, unreadable or corrupt are logged and skipped. Sizes recorded for the
+    first time are added to the usage of the file owners.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        file_storage_service: FileStorageService,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self._session_factory = session_factory
+        self._file_storage_service = file_storage_service
+        self._batch_size = batch_size
+
+    def pending(self) -> int:
+        with self._session_factory() as session:
+            return FileRepository(session).count_missing_metadata()
+
+    def run(self) -> int:
+        filled = 0
+        after_id = None
+        with self._session_factory() as session:
+            file_repository = FileRepository(session)
+            user_repository = UserRepository(session)
+            while batch := file_repository.get_missing_metadata(after_id, self._batch_size):
+                described = []
+                for file in batch:
+                    try:
+                        described.append((file, self._describe(file)))
+                    except (OSError, EOFError, ValueError) as error:
+                        logger.warning("Skipping file %s: %s", file.id, error)
+                        continue
+
+                with file_repository.transaction():
+                    for file, metadata in described:
+                        # Read before the update expires the loaded file
+                        owner_id, counted_size = file.owner_id, file.size
+                        if not file_repository.fill_metadata(file.id, **metadata):
+                            continue
+                        filled += 1
+                        if counted_size is None:
+                            user_repository.add_usage(owner_id, metadata["size"], 0)
+                after_id = batch[-1].id
+        return filled
+
+    def _describe(self, file: db_models.FileEntity) -> dict:
+        digest = hashlib.sha256()
+        size = 0
+        with self._file_storage_service.get_file(file) as data:
+            modified = stat_blob(data).modified
+            chunk = data.read(STREAM_CHUNK_SIZE)
+            media_type = detect_media_type(file.name, chunk)
+            while chunk:
+                digest.update(chunk)
+                size += len(chunk)
+                chunk = data.read(STREAM_CHUNK_SIZE)
+
+        return {
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "mime_type": media_type or DEFAULT_MEDIA_TYPE,
+            # The blob was last written when the file was uploaded
+            "timestamp": datetime.fromtimestamp(modified, timezone.utc),
+        }
@@ -1,3 +1,4 @@
+from skylock.database.async_repository import AsyncFileRepository, AsyncFolderRepository
 from skylock.database.repository import FileRepository, FolderRepository, UserRepository
 from skylock.database import models as db_models
 from skylock.utils.exceptions import ResourceNotFoundException
@@ -10,27 +11,39 @@ class PathResolver:
         file_repository: FileRepository,
         folder_repository: FolderRepository,
         user_repository: UserRepository,
+        single_query: bool = False,
     ):
         self._file_repository = file_repository
         self._folder_repository = folder_repository
         self._user_repository = user_repository
+        self._single_query = single_query
 
     def folder_from_path(self, user_path: UserPath) -> db_models.FolderEntity:
-        current_folder = self._get_root_folder(user_path.root_folder_name)
+        folder, depth = self.deepest_folder_from_path(user_path)
 
-        if current_folder is None:
-            raise LookupError(f"Root folder: {user_path.root_folder_name} does not exist")
+        if depth < len(user_path.parts):
+            raise ResourceNotFoundException(missing_resource_name=user_path.parts[depth])
 
-        for folder_name in user_path.parts:
-            current_folder = self._folder_repository.get_by_name_and_parent_id(
-                folder_name, current_folder.id
+        return folder
+
+    def deepest_folder_from_path(self, user_path: UserPath) -> tuple[db_models.FolderEntity, int]:
+        """Returns the deepest existing folder along the path and the number of parts it matched."""
+        if self._single_query:
+            folder, depth = self._folder_repository.get_deepest_by_path(
+                user_path.root_folder_name, user_path.parts
             )
-            if current_folder is None:
-                raise ResourceNotFoundException(missing_resource_name=folder_name)
+        else:
+            folder, depth = self._walk_path(user_path)
 
-        return current_folder
+        if folder is None:
+            raise LookupError(f"Root folder: {user_path.root_folder_name} does not exist")
+
+        return folder, depth
 
     def file_from_path(self, user_path: UserPath) -> db_models.FileEntity:
+        if self._single_query:
+            return self._resolve_file(user_path)
+
         parent_folder = self.folder_from_path(user_path.parent)
         file = self._file_repository.get_by_name_and_parent(
             name=user_path.name, parent=parent_folder
@@ -61,5 +74,67 @@ class PathResolver:
         parent_path = self.path_from_folder(parent_folder)
         return parent_path / file.name
 
+    def _resolve_file(self, user_path: UserPath) -> db_models.FileEntity:
+        parent_path = user_path.parent
+        file = self._file_repository.get_by_path(
+            user_path.root_folder_name, parent_path.parts, user_path.name
+        )
+
+        if file is None:
+            self.folder_from_path(parent_path)
+            raise ResourceNotFoundException(missing_resource_name=user_path.name)
+
+        return file
+
+    def _walk_path(self, user_path: UserPath) -> tuple[db_models.FolderEntity | None, int]:
+        current_folder = self._get_root_folder(user_path.root_folder_name)
+
+        if current_folder is None:
+            return None, 0
+
+        for depth, folder_name in enumerate(user_path.parts):
+            subfolder = self._folder_repository.get_by_name_and_parent_id(
+                folder_name, current_folder.id
+            )
+            if subfolder is None:
+                return current_folder, depth
+            current_folder = subfolder
+
+        return current_folder, len(user_path.parts)
+
     def _get_root_folder(self, name: str) -> db_models.FolderEntity | None:
         return self._folder_repository.get_by_name_and_parent_id(name=name, parent_id=None)
+
+
+class AsyncPathResolver:
+    """Resolves user paths over an AsyncSession, with the single query lookups of PathResolver."""
+
+    def __init__(
+        self, file_repository: AsyncFileRepository, folder_repository: AsyncFolderRepository
+    ):
+        self._file_repository = file_repository
+        self._folder_repository = folder_repository
+
+    async def folder_from_path(self, user_path: UserPath) -> db_models.FolderEntity:
+        folder, depth = await self._folder_repository.get_deepest_by_path(
+            user_path.root_folder_name, user_path.parts
+        )
+
+        if folder is None:
+            raise LookupError(f"Root folder: {user_path.root_folder_name} does not exist")
+        if depth < len(user_path.parts):
+            raise ResourceNotFoundException(missing_resource_name=user_path.parts[depth])
+
+        return folder
+
+    async def file_from_path(self, user_path: UserPath) -> db_models.FileEntity:
+        parent_path = user_path.parent
+        file = await self._file_repository.get_by_path(
+            user_path.root_folder_name, parent_path.parts, user_path.name
+        )
+
+        if file is None:
+            await self.folder_from_path(parent_path)
+            raise ResourceNotFoundException(missing_resource_name=user_path.name)
+
+        return file
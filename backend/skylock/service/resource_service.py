@@ -1,8 +1,16 @@
-from typing import IO, Optional
+from typing import IO, Container, ContextManager, Optional, TypeVar
+
+from sqlalchemy.exc import IntegrityError
 
 from skylock.database import models as db_models
-from skylock.database.repository import FileRepository, FolderRepository
+from skylock.database.repository import (
+    BlobRepository,
+    DatabaseRepository,
+    FileRepository,
+    FolderRepository,
+)
 from skylock.service.path_resolver import PathResolver
+from skylock.service.usage_service import UsageService
 from skylock.utils.exceptions import (
     FolderNotEmptyException,
     ForbiddenActionException,
@@ -10,8 +18,12 @@ from skylock.utils.exceptions import (
     ResourceNotFoundException,
     RootFolderAlreadyExistsException,
 )
+from skylock.utils.media_types import DEFAULT_MEDIA_TYPE
+from skylock.utils.pagination import Cursor, FolderContentsPage, ResourceType
 from skylock.utils.path import UserPath
-from skylock.utils.storage import FileStorageService
+from skylock.utils.storage import FileStorageService, StagedBlob
+
+Resource = TypeVar("Resource", db_models.FolderEntity, db_models.FileEntity)
 
 
 class ResourceService:
@@ -21,11 +33,15 @@ class ResourceService:
         folder_repository: FolderRepository,
         path_resolver: PathResolver,
         file_storage_service: FileStorageService,
+        blob_repository: BlobRepository,
+        usage_service: UsageService,
     ):
         self._file_repository = file_repository
         self._folder_repository = folder_repository
         self._path_resolver = path_resolver
         self._file_storage_service = file_storage_service
+        self._blob_repository = blob_repository
+        self._usage_service = usage_service
 
     def get_folder(self, user_path: UserPath) -> db_models.FolderEntity:
         return self._path_resolver.folder_from_path(user_path)
@@ -46,46 +62,82 @@ class ResourceService:
 
         return folder
 
+    def get_folder_contents(
+        self,
+        folder: db_models.FolderEntity,
+        limit: Optional[int] = None,
+        cursor: Optional[Cursor] = None,
+        resource_type: Optional[ResourceType] = None,
+    ) -> FolderContentsPage:
+        page = FolderContentsPage()
+        remaining = limit + 1 if limit is not None else None
+
+        if resource_type in (None, ResourceType.FOLDER) and (
+            cursor is None or cursor.resource_type == ResourceType.FOLDER
+        ):
+            page.folders = self._folder_repository.get_subfolders_page(
+                folder.id, after_name=cursor.name if cursor else None, limit=remaining
+            )
+            if remaining is not None:
+                remaining -= len(page.folders)
+
+        if resource_type in (None, ResourceType.FILE) and (remaining is None or remaining > 0):
+            after_name = (
+                cursor.name if cursor and cursor.resource_type == ResourceType.FILE else None
+            )
+            page.files = self._file_repository.get_folder_page(
+                folder.id, after_name=after_name, limit=remaining
+            )
+
+        if limit is not None and len(page.folders) + len(page.files) > limit:
+            self._trim_page(page, limit)
+        return page
+
+    def _trim_page(self, page: FolderContentsPage, limit: int):
+        page.folders = page.folders[:limit]
+        page.files = page.files[: limit - len(page.folders)]
+        if page.files:
+            page.next_cursor = Cursor(ResourceType.FILE, page.files[-1].name)
+        else:
+            page.next_cursor = Cursor(ResourceType.FOLDER, page.folders[-1].name)
+
     def create_folder(self, user_path: UserPath, public: bool = False) -> db_models.FolderEntity:
         if user_path.is_root_folder():
             raise ForbiddenActionException("Creation of root folder is forbidden")
 
         folder_name = user_path.name
         parent_path = user_path.parent
-        parent = self._path_resolver.folder_from_path(parent_path)
 
-        self._assert_no_children_matching_name(parent, folder_name)
+        with self._transaction():
+            parent = self._path_resolver.folder_from_path(parent_path)
 
-        new_folder = db_models.FolderEntity(
-            name=folder_name, parent_folder=parent, owner=user_path.owner, is_public=public
-        )
-        return self._folder_repository.save(new_folder)
+            self._assert_no_children_matching_name(parent, folder_name)
+
+            new_folder = db_models.FolderEntity(
+                name=folder_name, parent_folder=parent, owner=user_path.owner, is_public=public
+            )
+            return self._save_new_resource(self._folder_repository, new_folder)
 
     def update_folder(
         self, user_path: UserPath, is_public: bool, recursive: bool
-    ) -> db_models.FolderEntity:
-        folder = self._path_resolver.folder_from_path(user_path)
-        self._update_folder(folder, is_public, recursive)
-        return folder
+    ) -> tuple[db_models.FolderEntity, int]:
+        """Changes the visibility of the folder, returning it with the number of rows updated."""
+        with self._transaction():
+            folder = self._path_resolver.folder_from_path(user_path)
+            updated = self._update_folder(folder, is_public, recursive)
+            return folder, updated
 
     def _update_folder(
         self, folder: db_models.FolderEntity, is_public: bool, recursive: bool
-    ) -> None:
-
-        folder.is_public = is_public
-
-        for file in folder.files:
-            self._update_file(file, is_public)
-
-        if recursive:
-            for subfolder in folder.subfolders:
-                self._update_folder(subfolder, is_public, recursive)
-
-        self._folder_repository.save(folder)
-
-    def _update_file(self, file: db_models.FileEntity, is_public: bool) -> None:
-        file.is_public = is_public
-        self._file_repository.save(file)
+    ) -> int:
+        updated_folders = self._folder_repository.update_visibility(folder.id, is_public, recursive)
+        # The folder itself always matches, unless it was deleted since it was resolved
+        if not updated_folders:
+            raise ResourceNotFoundException(missing_resource_name=folder.name)
+        updated_files = self._file_repository.update_visibility_in_folder(
+            folder.id, is_public, recursive
+        )
+        return updated_folders + updated_files
 
     def create_folder_with_parents(
         self, user_path: UserPath, public: bool = False
@@ -93,38 +145,48 @@ class ResourceService:
         if user_path.is_root_folder():
             raise ForbiddenActionException("Creation of root folder is forbidden")
 
-        for parent in reversed(user_path.parents):
-            if not parent.is_root_folder() and not self._folder_exists(parent):
-                self.create_folder(parent, public=public)
+        with self._transaction():
+            folder, depth = self._path_resolver.deepest_folder_from_path(user_path)
+            missing_parts = user_path.parts[depth:]
 
-        return self.create_folder(user_path, public)
+            if not missing_parts:
+                raise ResourceAlreadyExistsException
 
-    def _folder_exists(self, user_path: UserPath) -> bool:
-        try:
-            self._path_resolver.folder_from_path(user_path)
-            return True
-        except ResourceNotFoundException:
-            return False
+            self._assert_no_children_matching_name(folder, missing_parts[0])
+
+            for folder_name in missing_parts:
+                folder = self._save_new_resource(
+                    self._folder_repository,
+                    db_models.FolderEntity(
+                        name=folder_name,
+                        parent_folder=folder,
+                        owner=user_path.owner,
+                        is_public=public,
+                    ),
+                )
+
+            return folder
 
     def delete_folder(self, user_path: UserPath, is_recursively: bool = False):
-        folder = self._path_resolver.folder_from_path(user_path)
-        self._delete_folder(folder, is_recursively=is_recursively)
+        with self._transaction():
+            folder = self._path_resolver.folder_from_path(user_path)
+            self._delete_folder(folder, is_recursively=is_recursively)
 
     def _delete_folder(self, folder: db_models.FolderEntity, is_recursively: bool = False):
         if folder.is_root():
             raise ForbiddenActionException("Deletion of root folder is forbidden")
 
-        has_folder_children = bool(folder.subfolders or folder.files)
-        if not is_recursively and has_folder_children:
-            raise FolderNotEmptyException
+        if not is_recursively:
+            if self._folder_repository.has_children(folder.id):
+                raise FolderNotEmptyException
+            self._folder_repository.delete(folder)
+            return
 
-        for file in folder.files:
-            self._delete_file(file)
-
-        for subfolder in folder.subfolders:
-            self._delete_folder(subfolder, is_recursively=True)
-
-        self._folder_repository.delete(folder)
+        size, files = self._file_repository.get_subtree_usage(folder.id)
+        self._usage_service.release(folder.owner_id, size, files)
+        self._blob_repository.release_files_in_subtree(folder.id)
+        self._file_repository.delete_in_subtree(folder.id)
+        self._folder_repository.delete_subtree(folder.id)
 
     def get_file(self, user_path: UserPath) -> db_models.FileEntity:
         return self._path_resolver.file_from_path(user_path)
@@ -146,81 +208,139 @@ class ResourceService:
         return file
 
     def create_file(
-        self, user_path: UserPath, data: bytes, force: bool = False, public: bool = False
+        self, user_path: UserPath, data: IO[bytes], force: bool = False, public: bool = False
     ) -> db_models.FileEntity:
+        # Fail fast on a missing parent or a taken name before any data is received
+        self.assert_file_creatable(user_path, force)
+        # Data is rejected as soon as it crosses the quota, not only once fully received
+        max_size = self._usage_service.get_upload_allowance(user_path, force)
+        blob = self._file_storage_service.stage_blob(data, user_path.name, max_size=max_size)
+        return self.create_file_from_blob(user_path, blob, force, public)
+
+    def assert_file_creatable(self, user_path: UserPath, force: bool = False):
         if not user_path.name:
             raise ForbiddenActionException("Creation of file with no name is forbidden")
 
-        file_name = user_path.name
-        parent_path = user_path.parent
-        parent = self._path_resolver.folder_from_path(parent_path)
+        with self._transaction():
+            parent = self._path_resolver.folder_from_path(user_path.parent)
+            if not force:
+                self._assert_no_children_matching_name(parent, user_path.name)
 
-        if force:
-            try:
-                self.delete_file(user_path)
-            except ResourceNotFoundException:
-                pass
-
-        self._assert_no_children_matching_name(parent, file_name)
+    def create_file_from_blob(
+        self, user_path: UserPath, blob: StagedBlob, force: bool = False, public: bool = False
+    ) -> db_models.FileEntity:
+        """Saves the file and moves its staged blob into storage, discarding the blob on failure."""
+        try:
+            with self._transaction():
+                parent = self._path_resolver.folder_from_path(user_path.parent)
+
+                replaced_file = self._delete_file_entity(user_path) if force else None
+
+                self._assert_no_children_matching_name(parent, user_path.name)
+
+                # Checked once the usage of a replaced file is released, in the same transaction
+                self._usage_service.charge(user_path.owner, blob.size)
+
+                now = db_models.utc_now()
+                new_file = self._save_new_resource(
+                    self._file_repository,
+                    db_models.FileEntity(
+                        name=user_path.name,
+                        folder=parent,
+                        owner=user_path.owner,
+                        is_public=public,
+                        blob_key=blob.key,
+                        blob_encoding=blob.encoding,
+                        size=blob.size,
+                        sha256=blob.sha256,
+                        mime_type=blob.media_type or DEFAULT_MEDIA_TYPE,
+                        # Replacing the content of a file keeps its creation time
+                        created_at=replaced_file.created_at if replaced_file else now,
+                        modified_at=now,
+                    ),
+                )
+
+                # The reference is counted before the blob is stored, so it cannot be reaped,
+                # and the file is only committed once the blob is stored durably
+                self._blob_repository.add_reference(blob.key)
+                self._file_storage_service.store_blob(blob)
+        except BaseException:
+            self._file_storage_service.discard_blob(blob)
+            raise
 
-        new_file = self._file_repository.save(
-            db_models.FileEntity(
-                name=file_name, folder=parent, owner=user_path.owner, is_public=public
-            )
-        )
+        return new_file
 
-        self._save_file_data(file=new_file, data=data)
+    def _delete_file_entity(self, user_path: UserPath) -> Optional[db_models.FileEntity]:
+        try:
+            file = self.get_file(user_path)
+        except ResourceNotFoundException:
+            return None
 
-        return new_file
+        self._delete_file(file)
+        return file
 
     def update_file(self, user_path: UserPath, is_public: bool) -> db_models.FileEntity:
-        file = self._path_resolver.file_from_path(user_path)
-        file.is_public = is_public
-        return self._file_repository.save(file)
+        with self._transaction():
+            file = self._path_resolver.file_from_path(user_path)
+            file.is_public = is_public
+            return self._file_repository.save(file)
 
     def delete_file(self, user_path: UserPath):
-        file = self.get_file(user_path)
-        self._delete_file(file)
+        with self._transaction():
+            file = self.get_file(user_path)
+            self._delete_file(file)
 
     def _delete_file(self, file: db_models.FileEntity):
+        # Usage is always updated before blob references, keeping the order rows are locked in
         self._file_repository.delete(file)
-        self._delete_file_data(file)
+        self._usage_service.release(file.owner_id, file.size or 0)
+        self._blob_repository.release(file.blob_key)
 
-    def get_file_data(self, user_path: UserPath) -> IO[bytes]:
+    def get_file_data(
+        self, user_path: UserPath, accepted_encodings: Container[str] = ()
+    ) -> IO[bytes]:
         file = self.get_file(user_path)
-        return self._get_file_data(file)
+        return self._get_file_data(file, accepted_encodings)
 
-    def get_public_file_data(self, file_id: str) -> IO[bytes]:
+    def get_public_file_data(
+        self, file_id: str, accepted_encodings: Container[str] = ()
+    ) -> IO[bytes]:
         file = self.get_file_by_id(file_id)
 
         if not file.is_public:
             raise ForbiddenActionException(f"File with id {file_id} is not public")
 
-        return self._get_file_data(file)
-
-    def _save_file_data(self, file: db_models.FileEntity, data: bytes):
-        self._file_storage_service.save_file(data=data, file=file)
+        return self._get_file_data(file, accepted_encodings)
 
-    def _get_file_data(self, file: db_models.FileEntity) -> IO[bytes]:
-        return self._file_storage_service.get_file(file=file)
-
-    def _delete_file_data(self, file: db_models.FileEntity):
-        return self._file_storage_service.delete_file(file)
+    def _get_file_data(
+        self, file: db_models.FileEntity, accepted_encodings: Container[str] = ()
+    ) -> IO[bytes]:
+        return self._file_storage_service.get_file(file=file, accepted_encodings=accepted_encodings)
 
     def create_root_folder(self, user_path: UserPath):
         if not user_path.is_root_folder():
             raise ValueError("Given path is not a proper root folder path")
-        if self._get_root_folder_by_name(user_path.root_folder_name):
-            raise RootFolderAlreadyExistsException("This root folder already exists")
-        self._folder_repository.save(
-            db_models.FolderEntity(name=user_path.root_folder_name, owner=user_path.owner)
-        )
+        with self._transaction():
+            if self._get_root_folder_by_name(user_path.root_folder_name):
+                raise RootFolderAlreadyExistsException("This root folder already exists")
+            self._folder_repository.save(
+                db_models.FolderEntity(name=user_path.root_folder_name, owner=user_path.owner)
+            )
 
     def _get_root_folder_by_name(self, name: str) -> Optional[db_models.FolderEntity]:
         return self._folder_repository.get_by_name_and_parent_id(name, None)
 
     def _assert_no_children_matching_name(self, folder: db_models.FolderEntity, name: str):
-        exists_file_of_name = name in [file.name for file in folder.files]
-        exists_folder_of_name = name in [folder.name for folder in folder.subfolders]
-        if exists_file_of_name or exists_folder_of_name:
+        if self._folder_repository.has_child_named(folder.id, name):
             raise ResourceAlreadyExistsException
+
+    def _transaction(self) -> ContextManager[None]:
+        return self._folder_repository.transaction()
+
+    def _save_new_resource(
+        self, repository: DatabaseRepository[Resource], resource: Resource
+    ) -> Resource:
+        try:
+            return repository.save(resource)
+        except IntegrityError as e:
+            raise ResourceAlreadyExistsException from e
@@ -1,22 +1,19 @@
-from typing import IO
+from email.utils import formatdate
+from typing import IO, Container, Iterator, Optional
 from skylock.api import models
 from skylock.database import models as db_models
+from skylock.utils.pagination import FolderContentsPage
 from skylock.utils.path import UserPath
+from skylock.utils.ranges import ByteRange
 
 
 class ResponseBuilder:
     def get_folder_contents_response(
-        self, folder: db_models.FolderEntity, user_path: UserPath
+        self, folder: db_models.FolderEntity, user_path: UserPath, page: FolderContentsPage
     ) -> models.FolderContents:
         parent_path = f"/{user_path.path}" if user_path.path else ""
         children_files = [
-            models.File(
-                id=file.id,
-                name=file.name,
-                is_public=file.is_public,
-                path=f"{parent_path}/{file.name}",
-            )
-            for file in folder.files
+            self._file_model(file, path=f"{parent_path}/{file.name}") for file in page.files
         ]
         children_folders = [
             models.Folder(
@@ -25,13 +22,14 @@ class ResponseBuilder:
                 is_public=folder.is_public,
                 path=f"{parent_path}/{folder.name}",
             )
-            for folder in folder.subfolders
+            for folder in page.folders
         ]
         return models.FolderContents(
             folder_name=folder.name,
             folder_path=f"/{user_path.path}",
             files=children_files,
             folders=children_folders,
+            next_cursor=page.next_cursor.encode() if page.next_cursor else None,
         )
 
     def get_folder_response(
@@ -42,16 +40,59 @@ class ResponseBuilder:
         )
 
     def get_file_response(self, file: db_models.FileEntity, user_path: UserPath) -> models.File:
+        return self._file_model(file, path=f"/{user_path.path}")
+
+    @staticmethod
+    def _file_model(file: db_models.FileEntity, path: str) -> models.File:
         return models.File(
-            id=file.id, name=file.name, path=f"/{user_path.path}", is_public=file.is_public
+            id=file.id,
+            name=file.name,
+            path=path,
+            is_public=file.is_public,
+            size=file.size,
+            sha256=file.sha256,
+            mime_type=file.mime_type,
+            created_at=file.created_at,
+            modified_at=file.modified_at,
+        )
+
+    def get_upload_session_response(
+        self, upload_session: db_models.UploadSessionEntity, received: list[ByteRange]
+    ) -> models.UploadSession:
+        return models.UploadSession(
+            id=upload_session.id,
+            path=f"/{upload_session.path}",
+            size=upload_session.size,
+            received=[models.ByteRange(start=start, end=end) for start, end in received],
+        )
+
+    def get_usage_response(
+        self, user: db_models.UserEntity, quota_bytes: Optional[int]
+    ) -> models.Usage:
+        return models.Usage(
+            used_bytes=user.used_bytes, file_count=user.file_count, quota_bytes=quota_bytes
         )
 
     def get_file_data_response(
-        self, file: db_models.FileEntity, file_data: IO[bytes]
+        self,
+        file: db_models.FileEntity,
+        file_data: IO[bytes],
+        accepted_encodings: Container[str] = (),
     ) -> models.FileData:
-        return models.FileData(name=file.name, data=file_data)
+        headers = {}
+        encoding = None
+        if file.blob_encoding is not None:
+            headers["vary"] = "Accept-Encoding"
+            if file.blob_encoding in accepted_encodings:
+                encoding = headers["content-encoding"] = file.blob_encoding
+        if file.sha256 is not None:
+            # Every encoding of the content is a different representation with its own ETag
+            headers["etag"] = f'"{file.sha256}-{encoding}"' if encoding else f'"{file.sha256}"'
+        if file.modified_at is not None:
+            headers["last-modified"] = formatdate(file.modified_at.timestamp(), usegmt=True)
+        return models.FileData(name=file.name, data=file_data, headers=headers)
 
     def get_folder_data_response(
-        self, folder: db_models.FolderEntity, folder_data: IO[bytes]
+        self, folder: db_models.FolderEntity, folder_data: Iterator[bytes]
     ) -> models.FolderData:
         return models.FolderData(name=f"{folder.name}.zip", data=folder_data)
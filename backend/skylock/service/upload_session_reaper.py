@@ -0,0 +1,48 @@
+from datetime import timedelta
+from typing import Callable, ContextManager
+
+from sqlalchemy.orm import Session
+
+from skylock.database.models import utc_now
+from skylock.database.repository import UploadSessionRepository
+from skylock.utils.storage import FileStorageService
+
+DEFAULT_TTL = timedelta(hours=24)
+DEFAULT_BATCH_SIZE = 100
+
+
+class UploadSessionReaper:
+    """Ends upload sessions left uncompleted for longer than their time to live.
+
+    The staging files of a batch are discarded once its sessions are committed as deleted, so
+    a crash in between can only leave files behind, never sessions without their data.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        file_storage_service: FileStorageService,
+        ttl: timedelta = DEFAULT_TTL,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self._session_factory = session_factory
+        self._file_storage_service = file_storage_service
+        self._ttl = ttl
+        self._batch_size = batch_size
+
+    def reap(self) -> int:
+        expired = 0
+        created_before = utc_now() - self._ttl
+        with self._session_factory() as session:
+            upload_session_repository = UploadSessionRepository(session)
+            while True:
+                with upload_session_repository.transaction():
+                    batch = upload_session_repository.collect_expired(
+                        created_before, self._batch_size
+                    )
+                for upload_id in batch:
+                    self._file_storage_service.discard_upload(upload_id)
+                if not batch:
+                    break
+                expired += len(batch)
+        return expired
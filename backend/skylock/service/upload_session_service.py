@@ -0,0 +1,139 @@
+from typing import IO, ContextManager, Optional
+
+from skylock.database import models as db_models
+from skylock.database.repository import UploadSessionRepository
+from skylock.service.resource_service import ResourceService
+from skylock.service.usage_service import UsageService
+from skylock.utils.exceptions import (
+    ForbiddenActionException,
+    InvalidChunkException,
+    QuotaExceededException,
+    ResourceAlreadyExistsException,
+    ResourceNotFoundException,
+    UploadIncompleteException,
+)
+from skylock.utils.path import UserPath
+from skylock.utils.ranges import ByteRange, merge_ranges
+from skylock.utils.storage import FileStorageService
+
+
+class UploadSessionService:
+    """Receives a file in chunks sent in any order, possibly in parallel and over many requests.
+
+    Chunks are copied into a staging file of the session's size once they are fully received
+    and verified, and only then recorded as received, so a chunk that was interrupted or
+    rejected is simply sent again. Sessions not completed within their time to live expire.
+    """
+
+    def __init__(
+        self,
+        upload_session_repository: UploadSessionRepository,
+        resource_service: ResourceService,
+        usage_service: UsageService,
+        file_storage_service: FileStorageService,
+    ):
+        self._upload_session_repository = upload_session_repository
+        self._resource_service = resource_service
+        self._usage_service = usage_service
+        self._file_storage_service = file_storage_service
+
+    def create_session(
+        self, user_path: UserPath, size: int, force: bool = False, public: bool = False
+    ) -> db_models.UploadSessionEntity:
+        self._resource_service.assert_file_creatable(user_path, force)
+
+        max_size = self._usage_service.get_upload_allowance(user_path, force)
+        if max_size is not None and size > max_size:
+            raise QuotaExceededException
+
+        with self._transaction():
+            upload_session = self._upload_session_repository.save(
+                db_models.UploadSessionEntity(
+                    path=user_path.path,
+                    size=size,
+                    force=force,
+                    is_public=public,
+                    owner=user_path.owner,
+                )
+            )
+            self._file_storage_service.create_upload(upload_session.id, size)
+
+        return upload_session
+
+    def get_session(
+        self, session_id: str, owner: db_models.UserEntity
+    ) -> db_models.UploadSessionEntity:
+        upload_session = self._upload_session_repository.get_owned(session_id, owner.id)
+
+        if upload_session is None:
+            raise ResourceNotFoundException(missing_resource_name=session_id)
+
+        return upload_session
+
+    def get_received_ranges(self, upload_session: db_models.UploadSessionEntity) -> list[ByteRange]:
+        return merge_ranges(self._upload_session_repository.get_chunk_ranges(upload_session.id))
+
+    def write_chunk(
+        self,
+        session_id: str,
+        owner: db_models.UserEntity,
+        offset: int,
+        data: IO[bytes],
+        checksum: Optional[str] = None,
+    ) -> db_models.UploadSessionEntity:
+        upload_session = self.get_session(session_id, owner)
+
+        if offset > upload_session.size:
+            raise InvalidChunkException("Chunk starts past the end of the upload")
+
+        size = self._file_storage_service.write_upload_chunk(
+            upload_session.id,
+            offset,
+            data,
+            max_size=upload_session.size - offset,
+            checksum=checksum,
+        )
+
+        if size:
+            self._upload_session_repository.add_chunk(upload_session.id, offset, size)
+        return upload_session
+
+    def complete_session(
+        self, session_id: str, owner: db_models.UserEntity
+    ) -> tuple[db_models.FileEntity, UserPath]:
+        """Creates the file from a fully received upload and ends the session.
+
+        The session also ends when the file conflicts with another one or is forbidden, any other
+        failure leaves it open so that completing it can be retried.
+        """
+        upload_session = self.get_session(session_id, owner)
+
+        received = self.get_received_ranges(upload_session)
+        if upload_session.size and received != [(0, upload_session.size)]:
+            raise UploadIncompleteException
+
+        user_path = UserPath(path=upload_session.path, owner=owner)
+        blob = self._file_storage_service.stage_upload(upload_session.id, user_path.name)
+        try:
+            with self._transaction():
+                self._upload_session_repository.delete_with_chunks(upload_session)
+                file = self._resource_service.create_file_from_blob(
+                    user_path, blob, force=upload_session.force, public=upload_session.is_public
+                )
+        except (ResourceAlreadyExistsException, ForbiddenActionException):
+            self._end_session(upload_session)
+            raise
+
+        self._file_storage_service.discard_upload(upload_session.id)
+        return file, user_path
+
+    def abort_session(self, session_id: str, owner: db_models.UserEntity):
+        self._end_session(self.get_session(session_id, owner))
+
+    def _end_session(self, upload_session: db_models.UploadSessionEntity):
+        with self._transaction():
+            self._upload_session_repository.delete_with_chunks(upload_session)
+        self._file_storage_service.discard_upload(upload_session.id)
+
+    def _transaction(self) -> ContextManager[None]:
+        return self._upload_session_repository.transaction()
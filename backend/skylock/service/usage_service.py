@@ -0,0 +1,49 @@
+from typing import Optional
+
+from skylock.database import models as db_models
+from skylock.database.repository import UserRepository
+from skylock.service.path_resolver import PathResolver
+from skylock.utils.exceptions import QuotaExceededException, ResourceNotFoundException
+from skylock.utils.path import UserPath
+
+
+class UsageService:
+    """Keeps the storage usage counters of users and holds them to their quotas."""
+
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        path_resolver: PathResolver,
+        default_quota: Optional[int] = None,
+    ):
+        self._user_repository = user_repository
+        self._path_resolver = path_resolver
+        self._default_quota = default_quota
+
+    def get_quota(self, user: db_models.UserEntity) -> Optional[int]:
+        """The storage quota of the user in bytes, None when unlimited."""
+        return user.quota_bytes if user.quota_bytes is not None else self._default_quota
+
+    def get_upload_allowance(self, user_path: UserPath, force: bool = False) -> Optional[int]:
+        """How large a file uploaded to the path may be under its owner's quota, None if unlimited.
+
+        A forced upload may also use the space of the file it replaces.
+        """
+        quota = self.get_quota(user_path.owner)
+        if quota is None:
+            return None
+
+        allowance = quota - user_path.owner.used_bytes
+        if force:
+            try:
+                allowance += self._path_resolver.file_from_path(user_path).size or 0
+            except ResourceNotFoundException:
+                pass
+        return max(allowance, 0)
+
+    def charge(self, owner: db_models.UserEntity, size: int, files: int = 1):
+        if not self._user_repository.charge_usage(owner.id, size, files, self._default_quota):
+            raise QuotaExceededException
+
+    def release(self, owner_id: str, size: int, files: int = 1):
+        self._user_repository.add_usage(owner_id, -size, -files)
@@ -1,33 +1,50 @@
-import zipfile
-import io
-from typing import IO
+from concurrent.futures import Executor
+from functools import partial
+from typing import Iterator, Optional
+
 from skylock.database import models as db_models
+from skylock.utils.compression import is_compressible_media_type
 from skylock.utils.storage import FileStorageService
+from skylock.utils.zip_stream import DEFAULT_MAX_PENDING_BLOCKS, ZipEntry, iter_zip
 
 
 class ZipService:
-    def __init__(self, file_storage_service: FileStorageService):
-        self._file_storage_service = file_storage_service
-
-    def create_zip_from_folder(self, folder: db_models.FolderEntity) -> IO[bytes]:
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            self._add_folder_to_zip(zip_file, folder, "")
-
-        zip_buffer.seek(0)
-        return zip_buffer
-
-    def _add_folder_to_zip(
-        self, zip_file: zipfile.ZipFile, folder: db_models.FolderEntity, current_path: str
+    def __init__(
+        self,
+        file_storage_service: FileStorageService,
+        executor: Optional[Executor] = None,
+        max_pending_blocks: int = DEFAULT_MAX_PENDING_BLOCKS,
     ):
+        self._file_storage_service = file_storage_service
+        self._executor = executor
+        self._max_pending_blocks = max_pending_blocks
+
+    def create_zip_from_folder(self, folder: db_models.FolderEntity) -> Iterator[bytes]:
+        """Streams the folder as a ZIP archive, reading each file only when the archive gets to it.
+
+        The folder tree is walked before the archive is returned, so streaming it needs no
+        database access. Files are compressed on the executor when one is given.
+        """
+        entries = list(self._folder_entries(folder, ""))
+        return iter_zip(
+            entries, executor=self._executor, max_pending_blocks=self._max_pending_blocks
+        )
+
+    def _folder_entries(
+        self, folder: db_models.FolderEntity, current_path: str
+    ) -> Iterator[ZipEntry]:
         folder_path = f"{current_path}{folder.name}/"
 
         if not folder.files and not folder.subfolders:
-            zip_file.writestr(folder_path, "")
+            yield ZipEntry(name=folder_path)
 
         for file in folder.files:
-            file_path = f"{folder_path}{file.name}"
-            zip_file.writestr(file_path, self._file_storage_service.get_file(file).read())
+            yield ZipEntry(
+                name=f"{folder_path}{file.name}",
+                open=partial(self._file_storage_service.get_file, file),
+                size=file.size,
+                modified=file.modified_at,
+                compressible=is_compressible_media_type(file.mime_type) is not False,
+            )
         for subfolder in folder.subfolders:
-            self._add_folder_to_zip(zip_file, subfolder, folder_path)
+            yield from self._folder_entries(subfolder, folder_path)
@@ -1,10 +1,16 @@
+from typing import IO, Optional
+
 from skylock.service.path_resolver import PathResolver
 from skylock.service.resource_service import ResourceService
 from skylock.service.response_builder import ResponseBuilder
+from skylock.service.usage_service import UsageService
 from skylock.service.user_service import UserService
 from skylock.service.zip_service import ZipService
 from skylock.api import models
+from skylock.database import models as db_models
+from skylock.utils.compression import accepted_encodings
 from skylock.utils.exceptions import ForbiddenActionException
+from skylock.utils.pagination import Cursor, ResourceType
 from skylock.utils.path import UserPath
 from skylock.utils.url_generator import UrlGenerator
 
@@ -19,6 +25,7 @@ class SkylockFacade:
         url_generator: UrlGenerator,
         response_builder: ResponseBuilder,
         zip_service: ZipService,
+        usage_service: UsageService,
     ):
         self._user_service = user_service
         self._resource_service = resource_service
@@ -26,6 +33,7 @@ class SkylockFacade:
         self._url_generator = url_generator
         self._response_builder = response_builder
         self._zip_service = zip_service
+        self._usage_service = usage_service
 
     # User Management Methods
     def register_user(self, username: str, password: str):
@@ -35,6 +43,10 @@ class SkylockFacade:
     def login_user(self, username: str, password: str) -> models.Token:
         return self._user_service.login_user(username, password)
 
+    def get_usage(self, user: db_models.UserEntity) -> models.Usage:
+        quota = self._usage_service.get_quota(user)
+        return self._response_builder.get_usage_response(user, quota)
+
     # Folder Operations
     def create_folder(
         self, user_path: UserPath, with_parents: bool = False, public: bool = False
@@ -53,19 +65,34 @@ class SkylockFacade:
         data = self._zip_service.create_zip_from_folder(folder)
         return self._response_builder.get_folder_data_response(folder=folder, folder_data=data)
 
-    def get_folder_contents(self, user_path: UserPath) -> models.FolderContents:
+    def get_folder_contents(
+        self,
+        user_path: UserPath,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        resource_type: Optional[ResourceType] = None,
+    ) -> models.FolderContents:
         folder = self._resource_service.get_folder(user_path)
+        page = self._resource_service.get_folder_contents(
+            folder,
+            limit=limit,
+            cursor=Cursor.decode(cursor) if cursor else None,
+            resource_type=resource_type,
+        )
         return self._response_builder.get_folder_contents_response(
-            folder=folder, user_path=user_path
+            folder=folder, user_path=user_path, page=page
         )
 
     def get_public_folder_contents(self, folder_id: str) -> models.FolderContents:
         folder = self._resource_service.get_public_folder(folder_id)
         path = self._path_resolver.path_from_folder(folder)
-        return self._response_builder.get_folder_contents_response(folder=folder, user_path=path)
+        page = self._resource_service.get_folder_contents(folder)
+        return self._response_builder.get_folder_contents_response(
+            folder=folder, user_path=path, page=page
+        )
 
     def update_folder(self, user_path: UserPath, is_public: bool, recursive: bool) -> models.Folder:
-        folder = self._resource_service.update_folder(user_path, is_public, recursive)
+        folder, _ = self._resource_service.update_folder(user_path, is_public, recursive)
         return self._response_builder.get_folder_response(folder=folder, user_path=user_path)
 
     def delete_folder(self, user_path: UserPath, is_recursively: bool = False):
@@ -81,20 +108,30 @@ class SkylockFacade:
 
     # File Operations
     def upload_file(
-        self, user_path: UserPath, file_data: bytes, force: bool = False, public: bool = False
+        self, user_path: UserPath, file_data: IO[bytes], force: bool = False, public: bool = False
     ) -> models.File:
         file = self._resource_service.create_file(user_path, file_data, force, public)
         return self._response_builder.get_file_response(file=file, user_path=user_path)
 
-    def download_file(self, user_path: UserPath) -> models.FileData:
+    def download_file(
+        self, user_path: UserPath, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        encodings = accepted_encodings(accept_encoding)
         file = self._resource_service.get_file(user_path=user_path)
-        data = self._resource_service.get_file_data(user_path)
-        return self._response_builder.get_file_data_response(file=file, file_data=data)
+        data = self._resource_service.get_file_data(user_path, encodings)
+        return self._response_builder.get_file_data_response(
+            file=file, file_data=data, accepted_encodings=encodings
+        )
 
-    def download_public_file(self, file_id: str) -> models.FileData:
+    def download_public_file(
+        self, file_id: str, accept_encoding: Optional[str] = None
+    ) -> models.FileData:
+        encodings = accepted_encodings(accept_encoding)
         file = self._resource_service.get_public_file(file_id)
-        data = self._resource_service.get_public_file_data(file_id)
-        return self._response_builder.get_file_data_response(file=file, file_data=data)
+        data = self._resource_service.get_public_file_data(file_id, encodings)
+        return self._response_builder.get_file_data_response(
+            file=file, file_data=data, accepted_encodings=encodings
+        )
 
     def update_file(self, user_path: UserPath, is_public: bool) -> models.File:
         file = self._resource_service.update_file(user_path, is_public)
@@ -0,0 +1,56 @@
+from typing import IO, Optional
+
+from skylock.api import models
+from skylock.database import models as db_models
+from skylock.service.response_builder import ResponseBuilder
+from skylock.service.upload_session_service import UploadSessionService
+from skylock.utils.path import UserPath
+
+
+class UploadSessionFacade:
+    def __init__(
+        self,
+        *,
+        upload_session_service: UploadSessionService,
+        response_builder: ResponseBuilder,
+    ):
+        self._upload_session_service = upload_session_service
+        self._response_builder = response_builder
+
+    def create_upload_session(
+        self, user_path: UserPath, size: int, force: bool = False, public: bool = False
+    ) -> models.UploadSession:
+        upload_session = self._upload_session_service.create_session(user_path, size, force, public)
+        return self._response_builder.get_upload_session_response(upload_session, received=[])
+
+    def get_upload_session(
+        self, session_id: str, owner: db_models.UserEntity
+    ) -> models.UploadSession:
+        upload_session = self._upload_session_service.get_session(session_id, owner)
+        return self._get_upload_session_response(upload_session)
+
+    def upload_chunk(
+        self,
+        session_id: str,
+        owner: db_models.UserEntity,
+        offset: int,
+        data: IO[bytes],
+        checksum: Optional[str] = None,
+    ) -> models.UploadSession:
+        upload_session = self._upload_session_service.write_chunk(
+            session_id, owner, offset, data, checksum
+        )
+        return self._get_upload_session_response(upload_session)
+
+    def complete_upload_session(self, session_id: str, owner: db_models.UserEntity) -> models.File:
+        file, user_path = self._upload_session_service.complete_session(session_id, owner)
+        return self._response_builder.get_file_response(file=file, user_path=user_path)
+
+    def abort_upload_session(self, session_id: str, owner: db_models.UserEntity):
+        self._upload_session_service.abort_session(session_id, owner)
+
+    def _get_upload_session_response(
+        self, upload_session: db_models.UploadSessionEntity
+    ) -> models.UploadSession:
+        received = self._upload_session_service.get_received_ranges(upload_session)
+        return self._response_builder.get_upload_session_response(upload_session, received)
@@ -0,0 +1,32 @@
+"""Records size, checksum, media type and timestamps of files uploaded by older versions.
+
+Usage:
+    python -m skylock.utils.backfill_metadata
+    python -m skylock.utils.backfill_metadata --dry-run
+
+Files are read from the configured storage and updated in batches, so the backfill can run
+next to a live deployment and be re-run safely.
+"""
+
+import argparse
+
+from skylock.api.dependencies import get_storage_service
+from skylock.database.session import database_engine
+from skylock.service.metadata_backfill import FileMetadataBackfill
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    backfill = FileMetadataBackfill(database_engine.session_factory, get_storage_service())
+    if args.dry_run:
+        print(f"{backfill.pending()} files without metadata")
+        return
+
+    print(f"Recorded metadata of {backfill.run()} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Removes stored blobs the database does not know about and reports blobs missing in storage.
+
+Usage:
+    python -m skylock.utils.collect_blobs --dry-run
+    python -m skylock.utils.collect_blobs --grace-period-minutes 60 --max-ops-per-second 500
+
+Storage and database are listed in key order and merged, so the collection runs in bounded
+memory, can run next to a live deployment and be re-run safely. Blobs of the legacy flat
+layout are not collected, run skylock.utils.migrate_storage first. Expired upload sessions are
+ended first, so that their staged data is swept along with what crashed uploads left behind.
+"""
+
+import argparse
+
+from skylock.api.dependencies import get_storage_service, get_upload_session_reaper
+from skylock.database.session import database_engine
+from skylock.service.blob_collector import DEFAULT_GRACE_PERIOD, BlobCollector
+from skylock.utils.rate_limit import RateLimiter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--grace-period-minutes",
+        type=float,
+        default=DEFAULT_GRACE_PERIOD / 60,
+        help="leave blobs written more recently alone, their upload may still be committing",
+    )
+    parser.add_argument(
+        "--max-ops-per-second",
+        type=float,
+        default=None,
+        help="limit of blobs listed or deleted per second, unlimited by default",
+    )
+    args = parser.parse_args()
+    storage_service = get_storage_service()
+
+    if not args.dry_run:
+        expired = get_upload_session_reaper(storage_service).reap()
+        print(f"Ended {expired} expired upload sessions")
+
+    collector = BlobCollector(
+        database_engine.session_factory,
+        storage_service,
+        grace_period=args.grace_period_minutes * 60,
+        rate_limiter=RateLimiter(args.max_ops_per_second),
+    )
+    report = collector.collect(dry_run=args.dry_run)
+
+    print(f"Scanned {report.scanned} blobs")
+    action = "to collect" if args.dry_run else "collected"
+    print(f"{report.orphaned} orphaned blobs ({report.orphaned_bytes} bytes) {action}")
+    if not args.dry_run:
+        print(f"Removed {report.collected} unreferenced blobs")
+    removal = "to remove" if args.dry_run else "removed"
+    print(f"{report.stale_incoming} stale staging files {removal}")
+    print(f"{report.dangling} blobs missing in storage")
+    for key in report.dangling_sample:
+        print(f"  {key}")
+
+
+if __name__ == "__main__":
+    main()
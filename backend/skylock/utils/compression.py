@@ -0,0 +1,98 @@
+import math
+from collections import Counter
+from typing import Optional
+
+GZIP = "gzip"
+GZIP_LEVEL = 6
+
+SUPPORTED_ENCODINGS = frozenset({GZIP})
+
+# Samples above this many bits of entropy per byte are already compressed or random
+MAX_COMPRESSIBLE_ENTROPY = 7.0
+
+_COMPRESSIBLE_MEDIA_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/x-sh",
+    "application/sql",
+    "application/yaml",
+    "image/svg+xml",
+    "image/bmp",
+}
+
+_INCOMPRESSIBLE_MEDIA_TYPES = {
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.rar",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-rar-compressed",
+    "application/x-tar",
+    "application/x-xz",
+    "application/zip",
+    "application/zstd",
+}
+
+_ENCODING_ALIASES = {"x-gzip": GZIP}
+
+
+def sample_entropy(sample: bytes) -> float:
+    """Shannon entropy of the sample in bits per byte, from 0 (constant) to 8 (random)."""
+    total = len(sample)
+    return -sum(count / total * math.log2(count / total) for count in Counter(sample).values())
+
+
+def is_compressible_media_type(media_type: Optional[str]) -> Optional[bool]:
+    """Tells whether data of the media type compresses, None when the type does not tell."""
+    if media_type is None:
+        return None
+    if media_type in _COMPRESSIBLE_MEDIA_TYPES or media_type.startswith("text/"):
+        return True
+    if media_type.endswith(("+json", "+xml")):
+        return True
+    if media_type in _INCOMPRESSIBLE_MEDIA_TYPES or media_type.startswith(
+        ("image/", "audio/", "video/", "font/")
+    ):
+        return False
+    return None
+
+
+def is_compressible(sample: bytes, media_type: Optional[str] = None) -> bool:
+    """Decides from the media type when it is telling, otherwise from the sample's entropy."""
+    if not sample:
+        return False
+
+    compressible = is_compressible_media_type(media_type)
+    if compressible is not None:
+        return compressible
+
+    return sample_entropy(sample) <= MAX_COMPRESSIBLE_ENTROPY
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> frozenset[str]:
+    """Returns the supported content codings an Accept-Encoding header allows."""
+    if not accept_encoding:
+        return frozenset()
+
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.lower()
+        qualities[_ENCODING_ALIASES.get(coding, coding)] = quality
+
+    wildcard = qualities.get("*", 0.0) > 0
+    return frozenset(
+        encoding
+        for encoding in SUPPORTED_ENCODINGS
+        if qualities.get(encoding, 1.0 if wildcard else 0.0) > 0
+    )
@@ -0,0 +1,92 @@
+import os
+import pathlib
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class DurabilityMode(str, Enum):
+    """When written blobs are flushed to disk before they are reported as stored."""
+
+    ALWAYS = "always"
+    BATCHED = "batched"
+    NONE = "none"
+
+
+@dataclass
+class _SyncRequest:
+    path: pathlib.Path
+    done: bool = False
+    error: Optional[OSError] = None
+
+
+def fsync_path(path: pathlib.Path) -> None:
+    """Flushes a file, or the entries of a directory, to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileSyncer:
+    """Flushes files and directories to disk according to the durability mode.
+
+    In batched mode concurrent callers are group-committed: one of them flushes every path
+    requested so far while the others wait, and requests arriving meanwhile form the next
+    group. Each caller still returns only once its own path is on disk, but the journal commit
+    and device cache flush behind every fsync are shared by the whole group.
+    """
+
+    def __init__(self, mode: DurabilityMode = DurabilityMode.BATCHED):
+        self.mode = DurabilityMode(mode)
+        self._condition = threading.Condition()
+        self._pending: list[_SyncRequest] = []
+        self._flushing = False
+
+    def sync(self, path: pathlib.Path) -> None:
+        if self.mode == DurabilityMode.NONE:
+            return
+        if self.mode == DurabilityMode.ALWAYS:
+            fsync_path(path)
+            return
+
+        request = _SyncRequest(path)
+        with self._condition:
+            self._pending.append(request)
+            while not request.done:
+                if self._flushing:
+                    self._condition.wait()
+                    continue
+
+                group, self._pending = self._pending, []
+                self._flushing = True
+                self._condition.release()
+                try:
+                    self._flush(group)
+                finally:
+                    self._condition.acquire()
+                    self._flushing = False
+                    self._condition.notify_all()
+
+        if request.error is not None:
+            raise request.error
+
+    @staticmethod
+    def _flush(group: list[_SyncRequest]) -> None:
+        errors: dict[pathlib.Path, Optional[OSError]] = {}
+        try:
+            for request in group:
+                if request.path not in errors:
+                    try:
+                        fsync_path(request.path)
+                        errors[request.path] = None
+                    except OSError as e:
+                        errors[request.path] = e
+                request.error = errors[request.path]
+        finally:
+            for request in group:
+                if request.path not in errors:
+                    request.error = OSError(f"Flushing {request.path} was interrupted")
+                request.done = True
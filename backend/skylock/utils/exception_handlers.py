@@ -9,6 +9,10 @@ from skylock.utils.exceptions import (
     InvalidPathException,
     ResourceNotFoundException,
     ForbiddenActionException,
+    InvalidCursorException,
+    InvalidChunkException,
+    UploadIncompleteException,
+    QuotaExceededException,
 )
 
 
@@ -59,3 +63,31 @@ def forbidden_action_handler(_request: Request, exc: ForbiddenActionException):
         status_code=403,
         content={"detail": str(exc)},
     )
+
+
+def invalid_cursor_handler(_request: Request, exc: InvalidCursorException):
+    return JSONResponse(
+        status_code=400,
+        content={"detail": str(exc)},
+    )
+
+
+def invalid_chunk_handler(_request: Request, exc: InvalidChunkException):
+    return JSONResponse(
+        status_code=400,
+        content={"detail": str(exc)},
+    )
+
+
+def upload_incomplete_handler(_request: Request, exc: UploadIncompleteException):
+    return JSONResponse(
+        status_code=409,
+        content={"detail": str(exc)},
+    )
+
+
+def quota_exceeded_handler(_request: Request, exc: QuotaExceededException):
+    return JSONResponse(
+        status_code=413,
+        content={"detail": str(exc)},
+    )
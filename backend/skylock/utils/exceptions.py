@@ -61,3 +61,35 @@ class RootFolderAlreadyExistsException(Exception):
     def __init__(self, message="Root folder already exists"):
         self.message = message
         super().__init__(self.message)
+
+
+class InvalidCursorException(Exception):
+    """Exception raised when trying to use a malformed pagination cursor"""
+
+    def __init__(self, message="Invalid pagination cursor"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidChunkException(Exception):
+    """Exception raised when an upload chunk does not fit the upload or fails its checksum"""
+
+    def __init__(self, message="Invalid upload chunk"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class UploadIncompleteException(Exception):
+    """Exception raised when trying to complete an upload with missing chunks"""
+
+    def __init__(self, message="Upload is missing chunks"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class QuotaExceededException(Exception):
+    """Exception raised when an upload would take a user over their storage quota"""
+
+    def __init__(self, message="Storage quota exceeded"):
+        self.message = message
+        super().__init__(self.message)
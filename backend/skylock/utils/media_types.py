@@ -0,0 +1,33 @@
+import mimetypes
+from typing import Optional
+
+DEFAULT_MEDIA_TYPE = "application/octet-stream"
+
+# Leading bytes of common formats, for files whose name does not tell their type
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (b"\x28\xb5\x2f\xfd", "application/zstd"),
+]
+
+
+def guess_media_type(filename: str) -> Optional[str]:
+    return mimetypes.guess_type(filename, strict=False)[0]
+
+
+def sniff_media_type(sample: bytes) -> Optional[str]:
+    for signature, media_type in _SIGNATURES:
+        if sample.startswith(signature):
+            return media_type
+    return None
+
+
+def detect_media_type(filename: Optional[str], sample: bytes) -> Optional[str]:
+    """Guesses the media type from the file name first, then from the first bytes of data."""
+    return (guess_media_type(filename) if filename else None) or sniff_media_type(sample)
@@ -0,0 +1,33 @@
+"""Moves blobs of the flat storage layout into sharded prefix directories.
+
+Usage:
+    python -m skylock.utils.migrate_storage
+    python -m skylock.utils.migrate_storage --storage-path ./data/files --dry-run
+
+Each blob is moved with a single rename while the application keeps reading blobs from
+either location, so the migration can run next to a live deployment and be re-run safely.
+"""
+
+import argparse
+
+from skylock.utils.storage import FILES_FOLDER_DISK_PATH, LocalStorageBackend
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage-path", default=FILES_FOLDER_DISK_PATH)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    storage_backend = LocalStorageBackend(storage_path=args.storage_path)
+    if args.dry_run:
+        pending = sum(1 for _ in storage_backend.legacy_blob_keys())
+        print(f"{pending} blobs to migrate in {args.storage_path}")
+        return
+
+    moved = storage_backend.migrate_legacy_blobs()
+    print(f"Migrated {moved} blobs in {args.storage_path}")
+
+
+if __name__ == "__main__":
+    main()
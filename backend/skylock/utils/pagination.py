@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+from skylock.database import models as db_models
+from skylock.utils.exceptions import InvalidCursorException
+
+
+class ResourceType(str, Enum):
+    FOLDER = "folder"
+    FILE = "file"
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position in a folder listing, ordered by resource type (folders first) and then by name."""
+
+    resource_type: ResourceType
+    name: str
+
+    def encode(self) -> str:
+        payload = json.dumps([self.resource_type.value, self.name]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            resource_type, name = json.loads(base64.urlsafe_b64decode(value.encode()))
+            if not isinstance(name, str):
+                raise TypeError("Cursor name must be a string")
+            return cls(resource_type=ResourceType(resource_type), name=name)
+        except (ValueError, TypeError, binascii.Error) as e:
+            raise InvalidCursorException from e
+
+
+@dataclass
+class FolderContentsPage:
+    folders: list[db_models.FolderEntity] = field(default_factory=list)
+    files: list[db_models.FileEntity] = field(default_factory=list)
+    next_cursor: Optional[Cursor] = None
@@ -0,0 +1,12 @@
+ByteRange = tuple[int, int]
+
+
+def merge_ranges(ranges: list[ByteRange]) -> list[ByteRange]:
+    """Sorts (start, end) ranges with exclusive ends, joining the overlapping and adjacent ones."""
+    merged: list[ByteRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
@@ -0,0 +1,30 @@
+import time
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """Paces operations to at most `rate` per second, sleeping whenever the caller gets ahead.
+
+    Without a rate operations are not limited.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._available_at = 0.0
+
+    def acquire(self, count: int = 1) -> None:
+        if not self.rate or count <= 0:
+            return
+
+        now = self._clock()
+        if self._available_at > now:
+            self._sleep(self._available_at - now)
+            now = self._available_at
+        self._available_at = now + count / self.rate
@@ -0,0 +1,220 @@
+import io
+import pathlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Iterable, Iterator, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from skylock.utils.storage import BlobReader, BlobStat, StorageBackend
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 8
+
+# DeleteObjects accepts at most this many keys per request
+MAX_DELETE_BATCH = 1000
+
+_MISSING_OBJECT_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+# A reader keeps the object it reads, its read-ahead settings and its position and buffers
+class S3BlobReader(BlobReader):  # pylint: disable=too-many-instance-attributes
+    """Reads an object with ranged GETs of one part each, fetching the next parts in parallel.
+
+    Seeking drops the parts fetched ahead, so ranges are read without downloading the rest.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        blob_stat: BlobStat,
+        executor: ThreadPoolExecutor,
+        part_size: int,
+        read_ahead: int,
+    ):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._stat = blob_stat
+        self._executor = executor
+        self._part_size = part_size
+        self._read_ahead = read_ahead
+        self._position = 0
+        self._next_fetch = 0
+        self._parts: deque[Future[bytes]] = deque()
+        self._buffer = memoryview(b"")
+
+    def stat(self) -> BlobStat:
+        return self._stat
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._stat.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+
+        if offset != self._position:
+            self._drop_parts()
+            self._position = self._next_fetch = offset
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        if not self._buffer:
+            if self._position >= self._stat.size:
+                return 0
+            self._buffer = memoryview(self._next_part())
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._position += size
+        return size
+
+    def readall(self) -> bytes:
+        chunks = [bytes(self._buffer)]
+        self._position += len(self._buffer)
+        self._buffer = memoryview(b"")
+        while self._position < self._stat.size:
+            part = self._next_part()
+            chunks.append(part)
+            self._position += len(part)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        self._drop_parts()
+        super().close()
+
+    def _next_part(self) -> bytes:
+        while len(self._parts) < self._read_ahead and self._next_fetch < self._stat.size:
+            start = self._next_fetch
+            end = min(start + self._part_size, self._stat.size)
+            self._parts.append(self._executor.submit(self._get_range, start, end))
+            self._next_fetch = end
+        return self._parts.popleft().result()
+
+    def _get_range(self, start: int, end: int) -> bytes:
+        response = self._client.get_object(
+            Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end - 1}"
+        )
+        return response["Body"].read()
+
+    def _drop_parts(self) -> None:
+        for part in self._parts:
+            part.cancel()
+        self._parts.clear()
+        self._buffer = memoryview(b"")
+
+
+class S3StorageBackend(StorageBackend):
+    """Keeps blobs as objects of an S3-compatible bucket.
+
+    Large blobs are uploaded in parts sent in parallel and read back with parallel ranged GETs,
+    both split into parts of the same size.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        client: Optional[Any] = None,
+        endpoint_url: Optional[str] = None,
+        prefix: str = "",
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self._bucket = bucket
+        self._client = client or boto3.client("s3", endpoint_url=endpoint_url)
+        self._prefix = prefix
+        self._part_size = part_size
+        self._max_concurrency = max_concurrency
+        self._transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="s3-range-get"
+        )
+
+    def put(self, key: str, data: IO[bytes]) -> None:
+        self._client.upload_fileobj(
+            data, self._bucket, self._object_key(key), Config=self._transfer_config
+        )
+
+    def put_file(self, key: str, path: pathlib.Path) -> None:
+        self._client.upload_file(
+            str(path), self._bucket, self._object_key(key), Config=self._transfer_config
+        )
+        path.unlink()
+
+    def open(self, key: str) -> IO[bytes]:
+        return S3BlobReader(
+            client=self._client,
+            bucket=self._bucket,
+            key=self._object_key(key),
+            blob_stat=self.stat(key),
+            executor=self._executor,
+            part_size=self._part_size,
+            read_ahead=self._max_concurrency,
+        )
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self._bucket, Key=self._object_key(key))
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for start in range(0, len(keys), MAX_DELETE_BATCH):
+            batch = keys[start : start + MAX_DELETE_BATCH]
+            response = self._client.delete_objects(
+                Bucket=self._bucket,
+                Delete={
+                    "Objects": [{"Key": self._object_key(key)} for key in batch],
+                    "Quiet": True,
+                },
+            )
+            if errors := response.get("Errors"):
+                raise OSError(f"Could not delete {len(errors)} objects, first: {errors[0]}")
+
+    def iter_blobs(self) -> Iterator[tuple[str, BlobStat]]:
+        # S3 lists keys in ascending order of their UTF-8 bytes, one page at a time
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self._bucket, Prefix=self._prefix):
+            for item in page.get("Contents", []):
+                yield item["Key"][len(self._prefix) :], BlobStat(
+                    size=item["Size"], modified=item["LastModified"].timestamp()
+                )
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def stat(self, key: str) -> BlobStat:
+        head = self._head(key)
+        if head is None:
+            raise ValueError(f"Object {self._object_key(key)} does not exist")
+        return BlobStat(size=head["ContentLength"], modified=head["LastModified"].timestamp())
+
+    def _head(self, key: str) -> Optional[dict]:
+        try:
+            return self._client.head_object(Bucket=self._bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in _MISSING_OBJECT_CODES:
+                return None
+            raise
+
+    def _object_key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
@@ -6,6 +6,7 @@ from jose import JWTError, jwt
 
 from skylock.config import JWT_SECRET
 from skylock.database import models as db_models
+from skylock.database.async_repository import AsyncUserRepository
 from skylock.database.repository import UserRepository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -15,6 +16,26 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 
 def get_user_from_jwt(token: str, user_repository: UserRepository) -> db_models.UserEntity:
+    user = user_repository.get_by_id(_get_user_id_from_jwt(token))
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    return user
+
+
+async def get_user_from_jwt_async(
+    token: str, user_repository: AsyncUserRepository
+) -> db_models.UserEntity:
+    user = await user_repository.get_by_id(_get_user_id_from_jwt(token))
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    return user
+
+
+def _get_user_id_from_jwt(token: str) -> str:
     try:
         user_data = decode_jwt(token)
     except JWTError as e:
@@ -25,12 +46,7 @@ def get_user_from_jwt(token: str, user_repository: UserRepository) -> db_models.
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = user_repository.get_by_id(user_id)
-
-    if user is None:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    return user
+    return user_id
 
 
 def create_jwt_for_user(user: db_models.UserEntity) -> str:
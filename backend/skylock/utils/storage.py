@@ -1,54 +1,500 @@
+import gzip
+import hashlib
+import io
+import os
 import pathlib
 import shutil
-from io import BytesIO
-from typing import IO
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import IO, Container, Iterable, Iterator, Optional
 
 from skylock.database import models as db_models
+from skylock.utils.compression import GZIP, GZIP_LEVEL, is_compressible
+from skylock.utils.durability import DurabilityMode, FileSyncer
+from skylock.utils.exceptions import InvalidChunkException, QuotaExceededException
+from skylock.utils.media_types import detect_media_type
+from skylock.utils.streaming import STREAM_CHUNK_SIZE
 
 FILES_FOLDER_DISK_PATH = "./data/files"
 
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
 
-class FileStorageService:
-    def __init__(self, storage_path: str = FILES_FOLDER_DISK_PATH):
+INCOMING_FOLDER = ".incoming"
+
+
+@dataclass(frozen=True)
+class BlobStat:
+    size: int
+    modified: float
+
+
+@dataclass
+class StagedBlob:
+    """Uploaded data written next to the blob store, waiting to be moved under its key."""
+
+    key: str
+    path: pathlib.Path
+    sha256: str
+    size: int
+    encoding: Optional[str] = None
+    media_type: Optional[str] = None
+
+
+class BlobReader(io.RawIOBase, ABC):
+    """Seekable stream of a blob that is not backed by a local file descriptor."""
+
+    @abstractmethod
+    def stat(self) -> BlobStat:
+        pass
+
+
+class GzipBlobReader(BlobReader):
+    """Decompresses a gzip-encoded blob on the fly, seeking by decompressing up to the offset."""
+
+    def __init__(self, data: IO[bytes], size: int):
+        super().__init__()
+        self._data = data
+        self._stat = BlobStat(size=size, modified=stat_blob(data).modified)
+        self._decoder = gzip.GzipFile(fileobj=data, mode="rb")
+
+    def stat(self) -> BlobStat:
+        return self._stat
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._decoder.tell()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_END:
+            offset, whence = self._stat.size + offset, io.SEEK_SET
+        return self._decoder.seek(offset, whence)
+
+    def readinto(self, buffer) -> int:
+        return self._decoder.readinto(buffer)
+
+    def close(self) -> None:
+        try:
+            self._decoder.close()
+            self._data.close()
+        finally:
+            super().close()
+
+
+def stat_blob(data: IO[bytes]) -> BlobStat:
+    if isinstance(data, BlobReader):
+        return data.stat()
+    stat_result = os.fstat(data.fileno())
+    return BlobStat(size=stat_result.st_size, modified=stat_result.st_mtime)
+
+
+class StorageBackend(ABC):
+    """Keeps blobs under string keys; implemented for local disk and S3-compatible stores."""
+
+    @abstractmethod
+    def put(self, key: str, data: IO[bytes]) -> None:
+        pass
+
+    @abstractmethod
+    def put_file(self, key: str, path: pathlib.Path) -> None:
+        """Moves a local file into the store, the file is gone once this returns."""
+
+    @abstractmethod
+    def open(self, key: str) -> IO[bytes]:
+        """Opens the blob for reading, seek to read a range of it.
+
+        Raises ValueError when there is no blob under the key.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the blob, doing nothing when it is already gone."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def stat(self, key: str) -> BlobStat:
+        pass
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    @abstractmethod
+    def iter_blobs(self) -> Iterator[tuple[str, BlobStat]]:
+        """Lists all stored blobs in ascending key order, comparing keys code point by code point.
+
+        Only a bounded part of the listing is held in memory at a time.
+        """
+
+
+class LocalStorageBackend(StorageBackend):
+    """Stores blobs under two levels of prefix directories, e.g. ``ab/cd/abcd1234-...``.
+
+    Blobs written by older versions directly into the storage folder are still read and
+    deleted until `migrate_legacy_blobs` has moved them into the sharded layout.
+
+    A blob is written under a temporary name and renamed into place, flushing its data before
+    the rename and its directory entry after it as the durability mode requires, so a blob
+    reported as stored is never found truncated after a crash.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = FILES_FOLDER_DISK_PATH,
+        durability: DurabilityMode = DurabilityMode.BATCHED,
+    ):
         self.storage_path = pathlib.Path(storage_path)
+        self._syncer = FileSyncer(durability)
 
     def _ensure_files_folder(self) -> pathlib.Path:
         self.storage_path.mkdir(parents=True, exist_ok=True)
         return self.storage_path
 
-    def save_file(self, data: bytes, file: db_models.FileEntity) -> None:
-        filename = self._get_filename(file)
+    def put(self, key: str, data: IO[bytes]) -> None:
+        """Copies the stream next to the blob in fixed-size chunks and renames it into place."""
+        path = self._blob_path(key)
+        self._make_blob_folder(path)
+        partial_path = path.with_name(f"{path.name}.{uuid.uuid4()}.partial")
+        try:
+            with partial_path.open("wb") as buffer:
+                while chunk := data.read(STREAM_CHUNK_SIZE):
+                    buffer.write(chunk)
+            self._move_into_place(partial_path, path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+
+    def put_file(self, key: str, path: pathlib.Path) -> None:
+        blob_path = self._blob_path(key)
+        self._make_blob_folder(blob_path)
+        self._move_into_place(path, blob_path)
+
+    def open(self, key: str) -> IO[bytes]:
+        path = self._blob_path(key)
+
+        # The sharded path is tried again last, in case the blob was migrated in between
+        for candidate in (path, self._legacy_blob_path(key), path):
+            try:
+                return candidate.open("rb")
+            except FileNotFoundError:
+                continue
+
+        raise ValueError(f"File of given path: {path} does not exist")
+
+    def delete(self, key: str) -> None:
+        # The legacy blob goes first, so a concurrent migration cannot move it past this check
+        for path in (self._legacy_blob_path(key), self._blob_path(key)):
+            path.unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self._blob_path(key).exists() or self._legacy_blob_path(key).exists()
+
+    def stat(self, key: str) -> BlobStat:
+        with self.open(key) as data:
+            return stat_blob(data)
+
+    def migrate_legacy_blobs(self) -> int:
+        """Moves blobs of the flat layout into the sharded one and returns how many were moved.
+
+        Every blob is moved with a single rename, so it is safe to run while the service is
+        serving requests.
+        """
+        moved = 0
+        for key in self.legacy_blob_keys():
+            path = self._blob_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(self._legacy_blob_path(key), path)
+            except FileNotFoundError:
+                continue
+            moved += 1
+        return moved
+
+    def iter_blobs(self) -> Iterator[tuple[str, BlobStat]]:
+        """Lists blobs of the sharded layout, one leaf folder at a time.
+
+        Shard folders are named after key prefixes, so walking them in order lists the keys in
+        order. Blobs of the legacy layout are not listed.
+        """
+        yield from self._iter_shard(self.storage_path, SHARD_LEVELS)
+
+    def _iter_shard(self, folder: pathlib.Path, levels: int) -> Iterator[tuple[str, BlobStat]]:
+        try:
+            with os.scandir(folder) as scanned:
+                entries = sorted(scanned, key=lambda entry: entry.name)
+        except FileNotFoundError:
+            return
+
+        for entry in entries:
+            if levels:
+                if len(entry.name) == SHARD_WIDTH and entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_shard(pathlib.Path(entry.path), levels - 1)
+                continue
+
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat_result = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            yield entry.name, BlobStat(size=stat_result.st_size, modified=stat_result.st_mtime)
+
+    def legacy_blob_keys(self) -> Iterator[str]:
+        with os.scandir(self._ensure_files_folder()) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.name
+
+    def _make_blob_folder(self, blob_path: pathlib.Path) -> None:
+        folder = blob_path.parent
+        missing = [shard for shard in (folder.parent, folder) if not shard.is_dir()]
+        folder.mkdir(parents=True, exist_ok=True)
+        for shard in missing:
+            self._syncer.sync(shard.parent)
+
+    def _move_into_place(self, source: pathlib.Path, blob_path: pathlib.Path) -> None:
+        self._syncer.sync(source)
+        os.replace(source, blob_path)
+        self._syncer.sync(blob_path.parent)
+
+    def _blob_path(self, key: str) -> pathlib.Path:
+        shards = [
+            key[level * SHARD_WIDTH : (level + 1) * SHARD_WIDTH] for level in range(SHARD_LEVELS)
+        ]
+        return self.storage_path.joinpath(*shards, key)
+
+    def _legacy_blob_path(self, key: str) -> pathlib.Path:
+        return self.storage_path / key
+
+
+class FileStorageService:
+    """Stages uploads on local disk and keeps the blobs of files in a storage backend.
+
+    In content-addressed mode blobs are keyed by the SHA-256 of their data, so identical
+    uploads share one blob; otherwise every upload gets a blob under a new random key.
+    Without an explicit backend blobs are kept on local disk under the storage path.
+
+    With compression enabled, blobs that look compressible from their media type or from the
+    entropy of their first chunk are stored gzipped and decompressed again when read.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = FILES_FOLDER_DISK_PATH,
+        content_addressed: bool = False,
+        backend: Optional[StorageBackend] = None,
+        compression: bool = False,
+    ):
+        self.storage_path = pathlib.Path(storage_path)
+        self.content_addressed = content_addressed
+        self.backend = backend or LocalStorageBackend(storage_path)
+        self.compression = compression
+
+    def stage_blob(
+        self, data: IO[bytes], filename: Optional[str] = None, max_size: Optional[int] = None
+    ) -> StagedBlob:
+        """Copies the stream to a staging file in fixed-size chunks, hashing it on the way.
+
+        Streams longer than max_size are rejected as soon as they cross it.
+        """
+        path = self._incoming_path(str(uuid.uuid4()))
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with path.open("wb") as buffer:
+                chunk = data.read(STREAM_CHUNK_SIZE)
+                media_type = detect_media_type(filename, chunk)
+                encoding = self._choose_encoding(chunk, media_type)
+                output = self._encoder(buffer, encoding)
+                while chunk:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise QuotaExceededException
+                    digest.update(chunk)
+                    output.write(chunk)
+                    chunk = data.read(STREAM_CHUNK_SIZE)
+                if output is not buffer:
+                    output.close()
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        return self._staged_blob(path, digest.hexdigest(), size, encoding, media_type)
+
+    def create_upload(self, upload_id: str, size: int) -> None:
+        """Allocates the staging file of a resumable upload, its chunks are written in place."""
+        with self._incoming_path(upload_id).open("xb") as buffer:
+            buffer.truncate(size)
+
+    def write_upload_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        data: IO[bytes],
+        max_size: int,
+        checksum: Optional[str] = None,
+    ) -> int:
+        """Writes a chunk of an upload at its offset and returns the chunk size.
+
+        The chunk is received into a temporary file and only copied into the upload once it is
+        known to fit and to match its SHA-256 checksum, if given, so a rejected chunk leaves the
+        data received before intact. Chunks of one upload may be written concurrently.
+        """
+        path = self._incoming_path(upload_id)
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.TemporaryFile(dir=path.parent) as chunk_buffer:
+            while chunk := data.read(STREAM_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise InvalidChunkException("Chunk extends past the end of the upload")
+                digest.update(chunk)
+                chunk_buffer.write(chunk)
+
+            if checksum is not None and checksum.lower() != digest.hexdigest():
+                raise InvalidChunkException("Chunk checksum does not match its data")
+
+            chunk_buffer.seek(0)
+            with path.open("r+b") as buffer:
+                buffer.seek(offset)
+                shutil.copyfileobj(chunk_buffer, buffer, STREAM_CHUNK_SIZE)
+        return size
+
+    def stage_upload(self, upload_id: str, filename: Optional[str] = None) -> StagedBlob:
+        """Stages the data of an upload as a blob, compressed when compressible.
+
+        The upload itself is left in place, so it can be staged again if storing the blob fails,
+        and is removed with discard_upload once it is no longer needed.
+        """
+        path = self._incoming_path(upload_id)
+        with path.open("rb") as buffer:
+            sample = buffer.read(STREAM_CHUNK_SIZE)
+            media_type = detect_media_type(filename, sample)
+            if self._choose_encoding(sample, media_type) is not None:
+                buffer.seek(0)
+                return self.stage_blob(buffer, filename)
+
+            buffer.seek(0)
+            digest = hashlib.sha256()
+            size = 0
+            while chunk := buffer.read(STREAM_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+
+        staged_path = self._incoming_path(str(uuid.uuid4()))
+        try:
+            # A second link shares the data without copying it
+            os.link(path, staged_path)
+        except OSError:
+            shutil.copyfile(path, staged_path)
+        # A link keeps the modification time of the upload, which the staging sweep judges by
+        os.utime(staged_path)
+        return self._staged_blob(staged_path, digest.hexdigest(), size, media_type=media_type)
+
+    def discard_upload(self, upload_id: str) -> None:
+        self.discard_incoming(upload_id)
+
+    def iter_incoming(self) -> Iterator[tuple[str, BlobStat]]:
+        """Lists the files in the staging folder, staged blobs and uploads alike, by name."""
+        try:
+            with os.scandir(self.storage_path / INCOMING_FOLDER) as scanned:
+                for entry in scanned:
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    yield entry.name, BlobStat(
+                        size=stat_result.st_size, modified=stat_result.st_mtime
+                    )
+        except FileNotFoundError:
+            pass
+
+    def discard_incoming(self, name: str) -> None:
+        self._incoming_path(name).unlink(missing_ok=True)
 
-        folder = self._ensure_files_folder()
-        path = folder / filename
+    def store_blob(self, blob: StagedBlob) -> None:
+        """Moves the staged data under its key, or drops it when the blob is already stored.
 
-        if path.exists():
-            raise ValueError(f"File of given path: {path} already exists")
+        The check and the move are not atomic. Callers hold the lock on the blob's row taken by
+        BlobRepository.add_reference until they commit, and the reaper unlinks blobs under the
+        same lock, so a blob found stored here stays stored.
+        """
+        if self.backend.exists(blob.key):
+            self.discard_blob(blob)
+            return
 
-        with path.open("wb") as buffer:
-            shutil.copyfileobj(BytesIO(data), buffer)
+        self.backend.put_file(blob.key, blob.path)
 
-    def get_file(self, file: db_models.FileEntity) -> IO[bytes]:
-        filename = self._get_filename(file)
+    def discard_blob(self, blob: StagedBlob) -> None:
+        blob.path.unlink(missing_ok=True)
 
-        folder = self._ensure_files_folder()
-        path = folder / filename
+    def get_file(
+        self, file: db_models.FileEntity, accepted_encodings: Container[str] = ()
+    ) -> IO[bytes]:
+        """Opens the file content, still encoded when its blob encoding is an accepted one."""
+        data = self.backend.open(self._get_filename(file))
+        if file.blob_encoding is None or file.blob_encoding in accepted_encodings:
+            return data
 
-        if not path.exists():
-            raise ValueError(f"File of given path: {path} does not exist")
+        try:
+            return GzipBlobReader(data, file.size)
+        except BaseException:
+            data.close()
+            raise
 
-        return BytesIO(path.read_bytes())
+    def delete_blobs(self, keys: Iterable[str]) -> None:
+        """Removes stored blobs by key, skipping the ones that are already gone."""
+        self.backend.delete_many(keys)
 
-    def delete_file(self, file: db_models.FileEntity) -> None:
-        filename = self._get_filename(file)
+    def _incoming_path(self, name: str) -> pathlib.Path:
+        incoming_folder = self.storage_path / INCOMING_FOLDER
+        incoming_folder.mkdir(parents=True, exist_ok=True)
+        return incoming_folder / name
 
-        folder = self._ensure_files_folder()
-        path = folder / filename
+    def _choose_encoding(self, sample: bytes, media_type: Optional[str]) -> Optional[str]:
+        if not self.compression:
+            return None
+        return GZIP if is_compressible(sample, media_type) else None
 
-        if not path.exists():
-            raise ValueError(f"File of given path: {path} does not exist")
+    @staticmethod
+    def _encoder(buffer: IO[bytes], encoding: Optional[str]) -> IO[bytes]:
+        if encoding is None:
+            return buffer
+        return gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
 
-        path.unlink()
+    def _staged_blob(
+        self,
+        path: pathlib.Path,
+        sha256: str,
+        size: int,
+        encoding: Optional[str] = None,
+        media_type: Optional[str] = None,
+    ) -> StagedBlob:
+        key = path.name
+        if self.content_addressed:
+            # The same content stored with different encodings is kept as separate blobs
+            key = f"{sha256}.{encoding}" if encoding else sha256
+        return StagedBlob(
+            key=key,
+            path=path,
+            sha256=sha256,
+            size=size,
+            encoding=encoding,
+            media_type=media_type,
+        )
 
     def _get_filename(self, file: db_models.FileEntity) -> str:
-        return file.id
+        return file.blob_key
@@ -0,0 +1,45 @@
+import io
+from typing import IO, AsyncIterator
+
+import anyio
+import anyio.from_thread
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_chunks(data: IO[bytes], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Reads the stream in fixed-size chunks off the event loop and closes it when exhausted."""
+    async with anyio.wrap_file(data) as stream:
+        while chunk := await stream.read(chunk_size):
+            yield chunk
+
+
+class AsyncStreamReader(io.RawIOBase):
+    """Blocking file-like view of an async byte stream, for sync code run in a worker thread.
+
+    Chunks are pulled from the event loop on demand, so at most one chunk is held in memory.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._buffer = memoryview(b"")
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._exhausted:
+            self._buffer = memoryview(anyio.from_thread.run(self._next_chunk))
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    async def _next_chunk(self) -> bytes:
+        try:
+            return await anext(self._chunks)
+        except StopAsyncIteration:
+            self._exhausted = True
+            return b""
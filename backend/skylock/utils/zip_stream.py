@@ -0,0 +1,356 @@
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import IO, Callable, Iterable, Iterator, Optional
+
+from skylock.utils.streaming import STREAM_CHUNK_SIZE
+
+DEFLATE_LEVEL = 6
+DEFLATE_BLOCK_SIZE = 128 * 1024
+DEFAULT_MAX_PENDING_BLOCKS = 4
+
+# Sizes and offsets from this value on are only recorded in ZIP64 fields
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_ENTRY_LIMIT = 0xFFFF
+# Deflate may grow incompressible data a little, entries this large get ZIP64 sizes up front
+ZIP64_SIZE_THRESHOLD = 0xF0000000
+
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_ZIP64_DATA_DESCRIPTOR = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_END_LOCATOR = struct.Struct("<IIQI")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+
+_LOCAL_HEADER_SIGNATURE = 0x04034B50
+_DATA_DESCRIPTOR_SIGNATURE = 0x08074B50
+_CENTRAL_HEADER_SIGNATURE = 0x02014B50
+_ZIP64_END_RECORD_SIGNATURE = 0x06064B50
+_ZIP64_END_LOCATOR_SIGNATURE = 0x07064B50
+_END_RECORD_SIGNATURE = 0x06054B50
+_ZIP64_EXTRA_ID = 0x0001
+
+_VERSION = 20
+_ZIP64_VERSION = 45
+_MADE_BY_UNIX = 3 << 8
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_STORED = 0
+_DEFLATED = 8
+
+_DEFLATE_WINDOW_SIZE = 32 * 1024
+# An empty fixed Huffman block marked as the last one, ending a member's deflate stream
+_FINAL_DEFLATE_BLOCK = b"\x03\x00"
+
+_FILE_ATTRIBUTES = 0o100644 << 16
+_DIRECTORY_ATTRIBUTES = (0o40755 << 16) | 0x10
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    """A member of a streamed archive, a directory when its name ends with a slash."""
+
+    name: str
+    open: Optional[Callable[[], IO[bytes]]] = None
+    size: Optional[int] = None
+    modified: Optional[datetime] = None
+    # Data known not to compress, e.g. images or archives, is only framed, not deflated
+    compressible: bool = True
+
+    @property
+    def is_directory(self) -> bool:
+        return self.name.endswith("/")
+
+
+@dataclass(frozen=True)
+class _MemberHeader:
+    """Fields of a member known before its data is read."""
+
+    name: bytes
+    method: int
+    flags: int
+    dos_time: int
+    dos_date: int
+    zip64: bool
+    external_attributes: int
+
+
+@dataclass
+class _Record:
+    """A member's header with the offset, checksum and sizes found while writing it."""
+
+    header: _MemberHeader
+    offset: int = 0
+    crc: int = 0
+    compressed_size: int = 0
+    size: int = 0
+
+
+# Parts of the archive in output order, producing their bytes given the offset they start at
+_Piece = Callable[[int], bytes]
+
+
+def iter_zip(
+    entries: Iterable[ZipEntry],
+    compresslevel: int = DEFLATE_LEVEL,
+    executor: Optional[Executor] = None,
+    max_pending_blocks: int = DEFAULT_MAX_PENDING_BLOCKS,
+) -> Iterator[bytes]:
+    """Generates a ZIP archive of the entries while reading their data in blocks.
+
+    Sizes and checksums follow each member's data in a data descriptor, so nothing is buffered
+    beyond the pending blocks and the central directory. Members whose size is unknown or too
+    large for 32 bits, and archives whose offsets or member count are, use ZIP64 fields.
+
+    Every block is deflated on its own, primed with the data before it and ended on a byte
+    boundary like pigz does, so blocks are compressed concurrently on the executor, up to
+    max_pending_blocks ahead of the output. The output is the same with or without one.
+    """
+    records: list[_Record] = []
+    pending: deque[tuple[_Piece, bool]] = deque()
+    pending_blocks = 0
+    offset = 0
+
+    for piece, is_block in _iter_pieces(entries, records, compresslevel, executor):
+        pending.append((piece, is_block))
+        pending_blocks += is_block
+        while pending_blocks > max_pending_blocks or (pending and not pending[0][1]):
+            piece, is_block = pending.popleft()
+            pending_blocks -= is_block
+            chunk = piece(offset)
+            offset += len(chunk)
+            yield chunk
+
+    while pending:
+        piece, _ = pending.popleft()
+        chunk = piece(offset)
+        offset += len(chunk)
+        yield chunk
+
+    yield from _iter_central_directory(records, offset)
+
+
+def _iter_pieces(
+    entries: Iterable[ZipEntry],
+    records: list[_Record],
+    compresslevel: int,
+    executor: Optional[Executor],
+) -> Iterator[tuple[_Piece, bool]]:
+    for entry in entries:
+        record = _start_record(entry)
+        records.append(record)
+        yield partial(_local_header, record), False
+
+        if entry.is_directory:
+            continue
+
+        level = compresslevel if entry.compressible else 0
+        window = b""
+        with entry.open() as data:
+            while block := data.read(DEFLATE_BLOCK_SIZE):
+                record.crc = zlib.crc32(block, record.crc)
+                record.size += len(block)
+                future = _submit(executor, _deflate_block, block, window, level)
+                yield partial(_compressed_block, record, future), True
+                window = (window + block)[-_DEFLATE_WINDOW_SIZE:]
+
+        yield partial(_final_block, record), False
+        yield partial(_data_descriptor, record, entry.name), False
+
+
+def _start_record(entry: ZipEntry) -> _Record:
+    dos_time, dos_date = _dos_timestamp(entry.modified)
+    if entry.is_directory:
+        header = _MemberHeader(
+            name=entry.name.encode(),
+            method=_STORED,
+            flags=_FLAG_UTF8,
+            dos_time=dos_time,
+            dos_date=dos_date,
+            zip64=False,
+            external_attributes=_DIRECTORY_ATTRIBUTES,
+        )
+    else:
+        header = _MemberHeader(
+            name=entry.name.encode(),
+            method=_DEFLATED,
+            flags=_FLAG_UTF8 | _FLAG_DATA_DESCRIPTOR,
+            dos_time=dos_time,
+            dos_date=dos_date,
+            zip64=entry.size is None or entry.size >= ZIP64_SIZE_THRESHOLD,
+            external_attributes=_FILE_ATTRIBUTES,
+        )
+    return _Record(header)
+
+
+def _local_header(record: _Record, offset: int) -> bytes:
+    record.offset = offset
+    header = record.header
+    # With a data descriptor the local header leaves sizes and checksum empty
+    extra = _zip64_extra(0, 0) if header.zip64 else b""
+    size_field = _ZIP64_MARKER if header.zip64 else 0
+    return (
+        _LOCAL_HEADER.pack(
+            _LOCAL_HEADER_SIGNATURE,
+            _ZIP64_VERSION if header.zip64 else _VERSION,
+            header.flags,
+            header.method,
+            header.dos_time,
+            header.dos_date,
+            0,
+            size_field,
+            size_field,
+            len(header.name),
+            len(extra),
+        )
+        + header.name
+        + extra
+    )
+
+
+def _submit(executor: Optional[Executor], function: Callable, *args) -> Future:
+    if executor is not None:
+        return executor.submit(function, *args)
+
+    future: Future = Future()
+    future.set_result(function(*args))
+    return future
+
+
+def _deflate_block(block: bytes, window: bytes, level: int) -> bytes:
+    """Deflates a block so that it continues the stream of the data before it.
+
+    The preceding 32 KiB are the dictionary back references may point into, and the sync
+    flush ends the block on a byte boundary, so compressed blocks are simply concatenated.
+    """
+    if window:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=window)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _compressed_block(record: _Record, future: Future, _offset: int) -> bytes:
+    compressed = future.result()
+    record.compressed_size += len(compressed)
+    return compressed
+
+
+def _final_block(record: _Record, _offset: int) -> bytes:
+    record.compressed_size += len(_FINAL_DEFLATE_BLOCK)
+    return _FINAL_DEFLATE_BLOCK
+
+
+def _data_descriptor(record: _Record, name: str, _offset: int) -> bytes:
+    if record.header.zip64:
+        return _ZIP64_DATA_DESCRIPTOR.pack(
+            _DATA_DESCRIPTOR_SIGNATURE, record.crc, record.compressed_size, record.size
+        )
+
+    if max(record.size, record.compressed_size) >= ZIP64_LIMIT:
+        raise ValueError(f"{name} is larger than its recorded size")
+    return _DATA_DESCRIPTOR.pack(
+        _DATA_DESCRIPTOR_SIGNATURE, record.crc, record.compressed_size, record.size
+    )
+
+
+def _iter_central_directory(records: list[_Record], offset: int) -> Iterator[bytes]:
+    directory_offset = offset
+    buffer = bytearray()
+    for record in records:
+        buffer += _central_header(record)
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            offset += len(buffer)
+            yield bytes(buffer)
+            buffer.clear()
+    offset += len(buffer)
+    directory_size = offset - directory_offset
+
+    count = len(records)
+    if count >= ZIP64_ENTRY_LIMIT or max(directory_offset, directory_size) >= ZIP64_LIMIT:
+        buffer += _ZIP64_END_RECORD.pack(
+            _ZIP64_END_RECORD_SIGNATURE,
+            _ZIP64_END_RECORD.size - 12,
+            _MADE_BY_UNIX | _ZIP64_VERSION,
+            _ZIP64_VERSION,
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            directory_offset,
+        )
+        buffer += _ZIP64_END_LOCATOR.pack(_ZIP64_END_LOCATOR_SIGNATURE, 0, offset, 1)
+        count = min(count, _ZIP64_COUNT_MARKER)
+        directory_size = min(directory_size, _ZIP64_MARKER)
+        directory_offset = min(directory_offset, _ZIP64_MARKER)
+
+    buffer += _END_RECORD.pack(
+        _END_RECORD_SIGNATURE, 0, 0, count, count, directory_size, directory_offset, 0
+    )
+    yield bytes(buffer)
+
+
+def _central_header(record: _Record) -> bytes:
+    # ZIP64 values are listed in this order, each only when its 32-bit field holds the marker
+    header = record.header
+    zip64_values = []
+    size = record.size
+    compressed_size = record.compressed_size
+    if header.zip64 or max(size, compressed_size) >= ZIP64_LIMIT:
+        zip64_values += [size, compressed_size]
+        size = compressed_size = _ZIP64_MARKER
+    offset = record.offset
+    if offset >= ZIP64_LIMIT:
+        zip64_values.append(offset)
+        offset = _ZIP64_MARKER
+
+    extra = _zip64_extra(*zip64_values) if zip64_values else b""
+    version = _ZIP64_VERSION if zip64_values else _VERSION
+    return (
+        _CENTRAL_HEADER.pack(
+            _CENTRAL_HEADER_SIGNATURE,
+            _MADE_BY_UNIX | version,
+            version,
+            header.flags,
+            header.method,
+            header.dos_time,
+            header.dos_date,
+            record.crc,
+            compressed_size,
+            size,
+            len(header.name),
+            len(extra),
+            0,
+            0,
+            0,
+            header.external_attributes,
+            offset,
+        )
+        + header.name
+        + extra
+    )
+
+
+def _zip64_extra(*values: int) -> bytes:
+    return struct.pack(f"<HH{len(values)}Q", _ZIP64_EXTRA_ID, 8 * len(values), *values)
+
+
+def _dos_timestamp(moment: Optional[datetime]) -> tuple[int, int]:
+    """Packs a time into the DOS time and date fields, in local time like zipfile does."""
+    moment = (moment or datetime.now(timezone.utc)).astimezone()
+    if moment.year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2)
+    dos_date = ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day
+    return dos_time, dos_date
@@ -0,0 +1,96 @@
+from io import BytesIO
+
+import anyio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from skylock.api.dependencies import (
+    get_async_skylock_facade,
+    get_download_facade,
+    get_storage_service,
+)
+from skylock.database.models import Base
+from skylock.database.session import AsyncDatabaseEngine, get_async_db_session
+from skylock.utils.path import UserPath
+
+
+@pytest.fixture
+def database_url(tmp_path_factory):
+    return f"sqlite:///{tmp_path_factory.mktemp('database') / 'db.sqlite'}"
+
+
+# The sync session of the other fixtures and the asyncio engine share a database file
+@pytest.fixture
+def db_session(database_url):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_test_app(test_app, database_url, storage_service):
+    engine = AsyncDatabaseEngine(database_url)
+
+    async def get_test_async_db_session():
+        async with engine.session_factory() as session:
+            yield session
+
+    test_app.dependency_overrides[get_download_facade] = get_async_skylock_facade
+    test_app.dependency_overrides[get_async_db_session] = get_test_async_db_session
+    test_app.dependency_overrides[get_storage_service] = lambda: storage_service
+    yield test_app
+    del test_app.dependency_overrides[get_download_facade]
+    del test_app.dependency_overrides[get_async_db_session]
+    del test_app.dependency_overrides[get_storage_service]
+    anyio.run(engine.dispose)
+
+
+@pytest.fixture
+def async_client(async_test_app, client, skylock, mock_user):
+    skylock.create_folder(UserPath(path="folder", owner=mock_user))
+    skylock.upload_file(UserPath(path="folder/file.txt", owner=mock_user), BytesIO(b"File content"))
+    return client
+
+
+def test_download_file(async_client):
+    response = async_client.get("/download/files/folder/file.txt")
+
+    assert response.status_code == 200
+    assert response.content == b"File content"
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_download_file_range(async_client):
+    response = async_client.get("/download/files/folder/file.txt", headers={"Range": "bytes=5-"})
+
+    assert response.status_code == 206
+    assert response.content == b"content"
+
+
+def test_download_missing_file(async_client):
+    response = async_client.get("/download/files/folder/missing.txt")
+
+    assert response.status_code == 404
+
+
+def test_download_public_file(async_client):
+    file_id = async_client.post(
+        "/files/upload/shared.txt?public=true", files={"file": ("shared.txt", b"Shared")}
+    ).json()["id"]
+    private_id = async_client.post(
+        "/files/upload/private.txt", files={"file": ("private.txt", b"Private")}
+    ).json()["id"]
+
+    response = async_client.get(f"/public/files/download/{file_id}")
+
+    assert response.status_code == 200
+    assert response.content == b"Shared"
+    assert response.headers["cache-control"] == "public, max-age=300"
+    assert async_client.get(f"/public/files/download/{private_id}").status_code == 403
@@ -1,4 +1,5 @@
 from io import BytesIO
+import hashlib
 import pytest
 from skylock.utils.path import UserPath
 
@@ -9,8 +10,8 @@ def preconfigured_files(skylock, mock_user):
     user_path_file1 = UserPath(path="file1.txt", owner=mock_user)
     user_path_file2 = UserPath(path="folder1/file2.txt", owner=mock_user)
     skylock.create_folder(user_path_folder)
-    skylock.upload_file(user_path=user_path_file1, file_data=b"File 1 content")
-    skylock.upload_file(user_path=user_path_file2, file_data=b"File 2 content")
+    skylock.upload_file(user_path=user_path_file1, file_data=BytesIO(b"File 1 content"))
+    skylock.upload_file(user_path=user_path_file2, file_data=BytesIO(b"File 2 content"))
 
 
 # GET methods
@@ -20,6 +21,76 @@ def test_download_file_success(client):
     assert response.content == b"File 1 content"
 
 
+def test_download_file_content_length(client):
+    response = client.get("/download/files/folder1/file2.txt")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(b"File 2 content"))
+
+
+def test_download_file_non_ascii_name(client):
+    client.post("/files/upload/zażółć.txt", files={"file": ("zażółć.txt", b"content")})
+    response = client.get("/download/files/zażółć.txt")
+    assert response.status_code == 200
+    assert response.content == b"content"
+    assert "filename*=utf-8''" in response.headers["content-disposition"]
+
+
+def test_download_file_range(client):
+    response = client.get("/download/files/file1.txt", headers={"Range": "bytes=5-"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 5-13/14"
+    assert response.content == b"1 content"
+
+
+def test_download_file_range_not_satisfiable(client):
+    response = client.get("/download/files/file1.txt", headers={"Range": "bytes=100-"})
+    assert response.status_code == 416
+
+
+def test_download_file_conditional(client):
+    response = client.get("/download/files/file1.txt")
+    etag = response.headers["etag"]
+
+    assert etag == f'"{hashlib.sha256(b"File 1 content").hexdigest()}"'
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    not_modified = client.get("/download/files/file1.txt", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    last_modified = response.headers["last-modified"]
+    not_modified = client.get(
+        "/download/files/file1.txt", headers={"If-Modified-Since": last_modified}
+    )
+    assert not_modified.status_code == 304
+
+
+def test_download_file_conditional_after_replace(client):
+    etag = client.get("/download/files/file1.txt").headers["etag"]
+    client.post("/files/upload/file1.txt?force=true", files={"file": ("file1.txt", b"New")})
+
+    response = client.get("/download/files/file1.txt", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.content == b"New"
+
+
+def test_download_public_file_cache_control(client):
+    file_id = client.post(
+        "/files/upload/shared.txt?public=true", files={"file": ("shared.txt", b"Shared")}
+    ).json()["id"]
+
+    response = client.get(f"/public/files/download/{file_id}")
+    not_modified = client.get(
+        f"/public/files/download/{file_id}", headers={"If-None-Match": response.headers["etag"]}
+    )
+
+    assert response.headers["cache-control"] == "public, max-age=300"
+    assert not_modified.status_code == 304
+    assert not_modified.headers["cache-control"] == "public, max-age=300"
+
+
 def test_download_file_not_found(client):
     response = client.get("/download/files/missing_file.txt")
     assert response.status_code == 404
@@ -53,10 +124,130 @@ def test_upload_file_empty_path(client):
     assert response.status_code == 400
 
 
+def test_upload_file_large_body(client):
+    content = bytes(range(256)) * 4096 + b"\n" * 1000
+    response = client.post("/files/upload/large.bin", files={"file": ("large.bin", content)})
+    assert response.status_code == 201
+    assert client.get("/download/files/large.bin").content == content
+
+
+def test_upload_file_skips_other_fields(client):
+    response = client.post(
+        "/files/upload/file3.txt",
+        data={"description": "not a file"},
+        files={"file": ("file3.txt", b"File 3 content")},
+    )
+    assert response.status_code == 201
+    assert client.get("/download/files/file3.txt").content == b"File 3 content"
+
+
+def test_upload_file_missing_file_field(client, storage_service):
+    response = client.post("/files/upload/file3.txt", files={"other": ("file3.txt", b"data")})
+    assert response.status_code == 422
+    assert client.get("/download/files/file3.txt").status_code == 404
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 2
+
+
+def test_upload_file_not_multipart(client):
+    response = client.post("/files/upload/file3.txt", content=b"raw data")
+    assert response.status_code == 422
+
+
+def test_upload_file_malformed_body(client):
+    response = client.post(
+        "/files/upload/file3.txt",
+        content=b"garbage",
+        headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+    assert response.status_code == 400
+
+
+def test_upload_file_force_replaces_data(client):
+    response = client.post(
+        "/files/upload/file1.txt?force=true", files={"file": ("file1.txt", b"New content")}
+    )
+    assert response.status_code == 201
+    assert client.get("/download/files/file1.txt").content == b"New content"
+
+
+def test_upload_file_returns_metadata(client):
+    response = client.post("/files/upload/data.json", files={"file": ("data.json", b"{}")})
+
+    assert response.json()["size"] == 2
+    assert response.json()["mime_type"] == "application/json"
+
+
+def test_upload_file_force_keeps_creation_time(client):
+    created = client.post("/files/upload/f.txt", files={"file": ("f.txt", b"old")}).json()
+    replaced = client.post("/files/upload/f.txt?force=true", files={"file": ("f.txt", b"new")})
+
+    assert replaced.json()["created_at"] == created["created_at"]
+    assert replaced.json()["modified_at"] > created["modified_at"]
+    assert replaced.json()["sha256"] == hashlib.sha256(b"new").hexdigest()
+
+
+def test_upload_file_force_removes_replaced_data(client, storage_service):
+    client.post("/files/upload/file1.txt?force=true", files={"file": ("file1.txt", b"New")})
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 2
+
+
+def test_upload_identical_files_share_blob(client, storage_service):
+    storage_service.content_addressed = True
+    for name in ["copy1.txt", "copy2.txt"]:
+        response = client.post(f"/files/upload/{name}", files={"file": (name, b"Same content")})
+        assert response.status_code == 201
+
+    client.delete("/files/copy1.txt")
+
+    assert client.get("/download/files/copy2.txt").content == b"Same content"
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 3
+    client.delete("/files/copy2.txt")
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 2
+
+
+def test_download_compressed_file(client, storage_service):
+    storage_service.compression = True
+    content = b"timestamp,level,message\n" * 1000
+    client.post("/files/upload/log.csv", files={"file": ("log.csv", content)})
+
+    passthrough = client.get("/download/files/log.csv", headers={"Accept-Encoding": "gzip"})
+    decoded = client.get("/download/files/log.csv", headers={"Accept-Encoding": "identity"})
+
+    assert passthrough.headers["content-encoding"] == "gzip"
+    assert passthrough.headers["etag"] != decoded.headers["etag"]
+    assert int(passthrough.headers["content-length"]) < len(content)
+    assert passthrough.content == content
+    assert "content-encoding" not in decoded.headers
+    assert decoded.headers["content-length"] == str(len(content))
+    assert decoded.headers["vary"] == "Accept-Encoding"
+    assert decoded.content == content
+
+
+def test_download_compressed_file_range(client, storage_service):
+    storage_service.compression = True
+    content = b"0123456789" * 1000
+    client.post("/files/upload/digits.txt", files={"file": ("digits.txt", content)})
+
+    response = client.get(
+        "/download/files/digits.txt",
+        headers={"Accept-Encoding": "identity", "Range": "bytes=9995-"},
+    )
+
+    assert response.status_code == 206
+    assert response.content == content[9995:]
+
+
+def test_upload_file_force_failure_keeps_existing_file(client):
+    response = client.post("/files/upload/file1.txt?force=true", content=b"raw data")
+    assert response.status_code == 422
+    assert client.get("/download/files/file1.txt").content == b"File 1 content"
+
+
 # DELETE methods
-def test_delete_file_success(client):
+def test_delete_file_success(client, storage_service):
     response = client.delete("/files/file1.txt")
     assert response.status_code == 204
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 1
 
 
 def test_delete_file_not_found(client):
@@ -1,3 +1,7 @@
+from datetime import datetime
+from io import BytesIO
+import hashlib
+import zipfile
 import pytest
 from skylock.api.routes import folder_routes
 from skylock.utils.path import UserPath
@@ -37,6 +41,75 @@ def test_get_nested_folder(client):
     assert response.json()["folders"][1]["path"] == "/folder1/subfolder2"
 
 
+def test_get_folder_lists_file_metadata(client):
+    client.post("/files/upload/folder1/notes.md", files={"file": ("notes.md", b"# Notes")})
+
+    file = client.get("/folders/folder1").json()["files"][0]
+
+    assert file["size"] == 7
+    assert file["sha256"] == hashlib.sha256(b"# Notes").hexdigest()
+    assert file["mime_type"] == "text/markdown"
+    assert file["created_at"] == file["modified_at"]
+    assert datetime.fromisoformat(file["modified_at"]).tzinfo is not None
+
+
+def test_get_folder_paginated(client, skylock, mock_user):
+    skylock.upload_file(UserPath(path="folder1/a.txt", owner=mock_user), BytesIO(b"data"))
+    skylock.upload_file(UserPath(path="folder1/b.txt", owner=mock_user), BytesIO(b"data"))
+
+    names = []
+    cursor = None
+    while True:
+        params = {"limit": 3} if cursor is None else {"limit": 3, "cursor": cursor}
+        response = client.get("/folders/folder1", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        names += [resource["name"] for resource in body["folders"] + body["files"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert names == ["subfolder1", "subfolder2", "a.txt", "b.txt"]
+
+
+def test_get_folder_filtered_by_type(client, skylock, mock_user):
+    skylock.upload_file(UserPath(path="folder1/a.txt", owner=mock_user), BytesIO(b"data"))
+
+    response = client.get("/folders/folder1", params={"type": "file"})
+    assert response.status_code == 200
+    assert not response.json()["folders"]
+    assert [file["name"] for file in response.json()["files"]] == ["a.txt"]
+
+
+def test_download_folder_as_zip(client, skylock, mock_user):
+    skylock.upload_file(UserPath("folder1/a.txt", mock_user), BytesIO(b"a" * 100_000))
+    skylock.upload_file(UserPath("folder1/subfolder1/b.txt", mock_user), BytesIO(b"b"))
+
+    response = client.get("/download/folders/folder1")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert "content-length" not in response.headers
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    assert archive.testzip() is None
+    assert archive.namelist() == [
+        "folder1/a.txt",
+        "folder1/subfolder1/b.txt",
+        "folder1/subfolder2/",
+    ]
+    assert archive.read("folder1/a.txt") == b"a" * 100_000
+
+
+def test_get_folder_invalid_cursor(client):
+    response = client.get("/folders/folder1", params={"limit": 1, "cursor": "invalid"})
+    assert response.status_code == 400
+
+
+def test_get_folder_invalid_limit(client):
+    response = client.get("/folders/folder1", params={"limit": 0})
+    assert response.status_code == 422
+
+
 # POST METHODS
 def test_create_folder_at_root_success(client):
     response = client.post("/folders/new_folder/")
@@ -84,6 +157,18 @@ def test_create_folder_with_parents_public(client):
     assert folder2["folders"][0]["is_public"] == True
 
 
+def test_create_folder_with_parents_partially_existing(client):
+    response = client.post("/folders/folder1/subfolder1/a/b?parent=true")
+    assert response.status_code == 201
+    assert response.json()["path"] == "/folder1/subfolder1/a/b"
+    assert client.get("/folders/folder1/subfolder1/a/b").status_code == 200
+
+
+def test_create_folder_with_parents_existing(client):
+    response = client.post("/folders/folder1/subfolder1?parent=true")
+    assert response.status_code == 409
+
+
 # DELETE METHODS
 def test_delete_folder(client):
     response = client.delete("/folders/folder2")
@@ -140,3 +225,41 @@ def test_update_folder_visibility_recursive(client):
 
     assert response.status_code == 200
     assert folder_contents["folders"][0]["is_public"] == True
+
+
+def test_update_folder_visibility_recursive_deep_tree(client, skylock, mock_user):
+    skylock.create_folder(UserPath(path="folder1/subfolder1/deep", owner=mock_user))
+    skylock.upload_file(
+        UserPath(path="folder1/subfolder1/deep/file.txt", owner=mock_user), BytesIO(b"data")
+    )
+
+    response = client.patch("/folders/folder1", json={"is_public": True, "recursive": True})
+    deep_contents = client.get("/folders/folder1/subfolder1").json()
+    file_contents = client.get("/folders/folder1/subfolder1/deep").json()
+    other_folder = client.get("/folders").json()["folders"]
+
+    assert response.status_code == 200
+    assert response.json()["is_public"] == True
+    assert deep_contents["folders"][0]["is_public"] == True
+    assert file_contents["files"][0]["is_public"] == True
+    assert [folder["is_public"] for folder in other_folder if folder["name"] == "folder2"] == [
+        False
+    ]
+
+
+def test_delete_folder_recursive_removes_stored_files(
+    client, skylock, mock_user, storage_service, blob_repository
+):
+    skylock.upload_file(UserPath(path="folder1/file.txt", owner=mock_user), BytesIO(b"data"))
+    skylock.upload_file(
+        UserPath(path="folder1/subfolder1/file.txt", owner=mock_user), BytesIO(b"data")
+    )
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 2
+
+    response = client.delete("/folders/folder1?recursive=true")
+
+    assert response.status_code == 204
+    assert client.get("/folders/folder1").status_code == 404
+    assert [folder["name"] for folder in client.get("/folders").json()["folders"]] == ["folder2"]
+    assert not [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
+    assert blob_repository.filter() == []
@@ -0,0 +1,16 @@
+from skylock.api.dependencies import get_current_user
+
+
+def test_database_pool_statistics(client):
+    response = client.get("/health/database")
+
+    assert response.status_code == 200
+    assert response.json()["pool"]
+
+
+def test_database_pool_statistics_require_authentication(client, test_app):
+    del test_app.dependency_overrides[get_current_user]
+
+    response = client.get("/health/database")
+
+    assert response.status_code == 401
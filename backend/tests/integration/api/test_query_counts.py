@@ -0,0 +1,78 @@
+from io import BytesIO
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from skylock.utils.path import UserPath
+
+
+@pytest.fixture(autouse=True)
+def preconfigured_resources(skylock, mock_user):
+    skylock.create_folder(UserPath(path="folder1/subfolder1", owner=mock_user), with_parents=True)
+    skylock.create_folder(UserPath(path="folder2", owner=mock_user))
+    for index in range(20):
+        skylock.upload_file(
+            UserPath(path=f"folder1/file{index}.txt", owner=mock_user), BytesIO(b"data")
+        )
+        skylock.create_folder(UserPath(path=f"folder1/subfolder1/nested{index}", owner=mock_user))
+    public_file = skylock.upload_file(
+        UserPath(path="folder1/public.txt", owner=mock_user), BytesIO(b"data"), public=True
+    )
+    return {"public_file_id": public_file.id}
+
+
+@pytest.fixture
+def count_queries(db_session):
+    @contextmanager
+    def count():
+        statements = []
+
+        def on_execute(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        # Expiring the shared session makes the authenticated user reload count as a query,
+        # like it would for a fresh request session.
+        db_session.expire_all()
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+
+    return count
+
+
+def query_count(count_queries, request):
+    with count_queries() as statements:
+        response = request()
+    assert response.status_code < 400, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "method, url, kwargs, expected",
+    [
+        ("get", "/folders/folder1", {}, 4),
+        ("get", "/folders/folder1/subfolder1", {}, 4),
+        ("post", "/folders/folder1/subfolder1/new", {}, 5),
+        ("post", "/folders/folder3/a/b/c?parent=true", {}, 8),
+        ("patch", "/folders/folder1", {"json": {"is_public": True, "recursive": True}}, 5),
+        ("delete", "/folders/folder2", {}, 4),
+        ("delete", "/folders/folder1?recursive=true", {}, 9),
+        ("post", "/upload/files/folder1/new.txt", {"files": {"file": ("new.txt", b"x")}}, 10),
+        ("get", "/download/files/folder1/file1.txt", {}, 3),
+        ("patch", "/files/folder1/file1.txt", {"json": {"is_public": True}}, 4),
+        ("delete", "/files/folder1/file1.txt", {}, 7),
+        ("get", "/share/files/folder1/public.txt", {}, 2),
+    ],
+)
+def test_endpoint_query_count(client, count_queries, method, url, kwargs, expected):
+    request = getattr(client, method)
+    assert query_count(count_queries, lambda: request(url, **kwargs)) == expected
+
+
+def test_public_file_download_query_count(client, count_queries, preconfigured_resources):
+    url = f"/public/files/download/{preconfigured_resources['public_file_id']}"
+    assert query_count(count_queries, lambda: client.get(url)) == 1
@@ -0,0 +1,181 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+
+from skylock.database.models import UploadSessionEntity
+from skylock.utils.path import UserPath
+
+CONTENT = b"0123456789" * 10
+
+
+@pytest.fixture(autouse=True)
+def preconfigured_folder(skylock, mock_user):
+    skylock.create_folder(UserPath(path="folder1", owner=mock_user))
+
+
+def create_session(client, path="folder1/file.txt", size=len(CONTENT), **options):
+    response = client.post("/upload/sessions", json={"path": path, "size": size, **options})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def put_chunk(client, session_id, offset, data, **params):
+    return client.put(
+        f"/upload/sessions/{session_id}/chunks",
+        params={"offset": offset, **params},
+        content=data,
+    )
+
+
+def staged_files(storage_service):
+    return [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
+
+
+def test_upload_in_chunks_out_of_order(client, storage_service):
+    session = create_session(client)
+    assert session["received"] == []
+
+    assert put_chunk(client, session["id"], 60, CONTENT[60:]).status_code == 200
+    response = put_chunk(client, session["id"], 0, CONTENT[:30])
+    assert response.json()["received"] == [{"start": 0, "end": 30}, {"start": 60, "end": 100}]
+    put_chunk(client, session["id"], 30, CONTENT[30:60])
+
+    response = client.post(f"/upload/sessions/{session['id']}/complete")
+
+    assert response.status_code == 201
+    assert response.json()["path"] == "/folder1/file.txt"
+    assert client.get("/download/files/folder1/file.txt").content == CONTENT
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+    assert len(staged_files(storage_service)) == 1
+
+
+def test_get_upload_session_merges_resent_chunks(client):
+    session = create_session(client)
+    put_chunk(client, session["id"], 0, CONTENT[:50])
+    put_chunk(client, session["id"], 20, CONTENT[20:40])
+
+    response = client.get(f"/upload/sessions/{session['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["received"] == [{"start": 0, "end": 50}]
+
+
+def test_upload_chunk_with_checksum(client):
+    session = create_session(client)
+    checksum = hashlib.sha256(CONTENT[:10]).hexdigest()
+
+    assert put_chunk(client, session["id"], 0, CONTENT[:10], checksum=checksum).status_code == 200
+    response = put_chunk(client, session["id"], 10, b"corrupted!", checksum=checksum)
+
+    assert response.status_code == 400
+    assert client.get(f"/upload/sessions/{session['id']}").json()["received"] == [
+        {"start": 0, "end": 10}
+    ]
+
+
+def test_upload_chunk_past_end(client):
+    session = create_session(client)
+
+    assert put_chunk(client, session["id"], 90, CONTENT[:20]).status_code == 400
+    assert put_chunk(client, session["id"], 101, b"x").status_code == 400
+
+
+def test_complete_incomplete_upload(client):
+    session = create_session(client)
+    put_chunk(client, session["id"], 0, CONTENT[:99])
+
+    response = client.post(f"/upload/sessions/{session['id']}/complete")
+
+    assert response.status_code == 409
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 200
+
+
+def test_complete_empty_upload(client):
+    session = create_session(client, size=0)
+
+    assert client.post(f"/upload/sessions/{session['id']}/complete").status_code == 201
+    assert client.get("/download/files/folder1/file.txt").content == b""
+
+
+def test_create_session_existing_file(client):
+    create_session(client)
+    client.post("/files/upload/folder1/taken.txt", files={"file": ("taken.txt", b"data")})
+
+    response = client.post("/upload/sessions", json={"path": "folder1/taken.txt", "size": 1})
+
+    assert response.status_code == 409
+
+
+def test_create_session_missing_parent(client):
+    response = client.post("/upload/sessions", json={"path": "missing/file.txt", "size": 1})
+    assert response.status_code == 404
+
+
+def test_create_session_negative_size(client):
+    response = client.post("/upload/sessions", json={"path": "folder1/file.txt", "size": -1})
+    assert response.status_code == 422
+
+
+def test_complete_forced_upload_replaces_file(client):
+    client.post("/files/upload/folder1/file.txt", files={"file": ("file.txt", b"old")})
+    session = create_session(client, size=3, force=True)
+    put_chunk(client, session["id"], 0, b"new")
+
+    assert client.post(f"/upload/sessions/{session['id']}/complete").status_code == 201
+    assert client.get("/download/files/folder1/file.txt").content == b"new"
+
+
+def test_complete_ends_session_when_file_was_created_meanwhile(client, storage_service):
+    session = create_session(client, size=3)
+    put_chunk(client, session["id"], 0, b"new")
+    client.post("/files/upload/folder1/file.txt", files={"file": ("file.txt", b"old")})
+
+    assert client.post(f"/upload/sessions/{session['id']}/complete").status_code == 409
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+    assert len(staged_files(storage_service)) == 1
+
+
+def test_complete_can_be_retried_after_storage_failure(client, storage_service, monkeypatch):
+    session = create_session(client)
+    put_chunk(client, session["id"], 0, CONTENT)
+
+    def fail_to_store(_blob):
+        raise OSError("Storage unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(storage_service, "store_blob", fail_to_store)
+        with pytest.raises(OSError):
+            client.post(f"/upload/sessions/{session['id']}/complete")
+
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 200
+    assert client.post(f"/upload/sessions/{session['id']}/complete").status_code == 201
+    assert client.get("/download/files/folder1/file.txt").content == CONTENT
+    assert len(staged_files(storage_service)) == 1
+
+
+def test_abort_upload_session(client, storage_service):
+    session = create_session(client)
+    put_chunk(client, session["id"], 0, CONTENT[:10])
+
+    assert client.delete(f"/upload/sessions/{session['id']}").status_code == 204
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+    assert not staged_files(storage_service)
+
+
+def test_upload_session_not_found(client):
+    assert client.get("/upload/sessions/missing").status_code == 404
+    assert put_chunk(client, "missing", 0, b"data").status_code == 404
+
+
+def test_new_session_discards_expired_sessions(client, db_session, storage_service):
+    session = create_session(client)
+    put_chunk(client, session["id"], 0, CONTENT[:10])
+    upload_session = db_session.get(UploadSessionEntity, session["id"])
+    upload_session.created_at -= timedelta(days=2)
+    db_session.commit()
+
+    new_session = create_session(client, path="folder1/other.txt")
+
+    assert client.get(f"/upload/sessions/{session['id']}").status_code == 404
+    assert [path.name for path in staged_files(storage_service)] == [new_session["id"]]
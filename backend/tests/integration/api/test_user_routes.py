@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.fixture
+def quota(mock_user, db_session):
+    mock_user.quota_bytes = 100
+    db_session.commit()
+    return mock_user.quota_bytes
+
+
+def usage(client):
+    response = client.get("/users/me/usage")
+    assert response.status_code == 200
+    return response.json()
+
+
+def upload(client, path, content, **params):
+    name = path.rsplit("/", 1)[-1]
+    return client.post(f"/upload/files/{path}", params=params, files={"file": (name, content)})
+
+
+def test_usage_of_new_user(client):
+    assert usage(client) == {"used_bytes": 0, "file_count": 0, "quota_bytes": None}
+
+
+def test_usage_follows_uploads_and_deletes(client):
+    upload(client, "a.txt", b"x" * 10)
+    client.post("/folders/folder")
+    upload(client, "folder/b.txt", b"x" * 20)
+    upload(client, "folder/c.txt", b"x" * 30)
+    assert usage(client) == {"used_bytes": 60, "file_count": 3, "quota_bytes": None}
+
+    upload(client, "a.txt", b"x" * 5, force=True)
+    assert usage(client)["used_bytes"] == 55
+
+    client.delete("/files/a.txt")
+    assert usage(client)["used_bytes"] == 50
+
+    client.delete("/folders/folder", params={"recursive": True})
+    assert usage(client) == {"used_bytes": 0, "file_count": 0, "quota_bytes": None}
+
+
+def test_upload_over_quota(client, quota):
+    assert upload(client, "a.txt", b"x" * 60).status_code == 201
+
+    response = upload(client, "b.txt", b"x" * 60)
+
+    assert response.status_code == 413
+    assert client.get("/download/files/b.txt").status_code == 404
+    assert usage(client) == {"used_bytes": 60, "file_count": 1, "quota_bytes": 100}
+
+
+def test_forced_upload_may_reuse_space_of_replaced_file(client, quota):
+    upload(client, "a.txt", b"x" * 60)
+
+    assert upload(client, "a.txt", b"y" * 90, force=True).status_code == 201
+    assert usage(client)["used_bytes"] == 90
+
+
+def test_upload_session_over_quota(client, quota):
+    response = client.post("/upload/sessions", json={"path": "a.txt", "size": 101})
+    assert response.status_code == 413
+
+
+def test_complete_upload_session_over_quota(client, quota, storage_service):
+    session = client.post("/upload/sessions", json={"path": "a.txt", "size": 60}).json()
+    client.put(f"/upload/sessions/{session['id']}/chunks", params={"offset": 0}, content=b"x" * 60)
+    upload(client, "b.txt", b"x" * 60)
+
+    response = client.post(f"/upload/sessions/{session['id']}/complete")
+
+    assert response.status_code == 413
+    assert usage(client)["used_bytes"] == 60
+    # The session stays open, so the upload can still be completed once space is freed
+    client.delete("/files/b.txt")
+    assert client.post(f"/upload/sessions/{session['id']}/complete").status_code == 201
+    assert usage(client)["used_bytes"] == 60
+    assert len([path for path in storage_service.storage_path.rglob("*") if path.is_file()]) == 1
@@ -3,18 +3,37 @@ from fastapi.testclient import TestClient
 from sqlalchemy import StaticPool, create_engine
 from sqlalchemy.orm import sessionmaker
 
-from skylock.api.dependencies import get_current_user, get_skylock_facade
+from contextlib import nullcontext
+
+from skylock.api.dependencies import (
+    get_blob_reaper,
+    get_current_user,
+    get_skylock_facade,
+    get_upload_session_facade,
+    get_upload_session_reaper,
+)
 from skylock.app import app
 from skylock.api.app import api
 from skylock.database.models import Base, UserEntity
-from skylock.database.repository import FileRepository, FolderRepository, UserRepository
+from skylock.database.repository import (
+    BlobRepository,
+    FileRepository,
+    FolderRepository,
+    UploadSessionRepository,
+    UserRepository,
+)
 from skylock.database.session import get_db_session
+from skylock.service.blob_reaper import BlobReaper
 from skylock.service.path_resolver import PathResolver
 from skylock.service.resource_service import ResourceService
 from skylock.service.response_builder import ResponseBuilder
+from skylock.service.upload_session_reaper import UploadSessionReaper
+from skylock.service.upload_session_service import UploadSessionService
+from skylock.service.usage_service import UsageService
 from skylock.service.user_service import UserService
 from skylock.service.zip_service import ZipService
 from skylock.skylock_facade import SkylockFacade
+from skylock.upload_session_facade import UploadSessionFacade
 from skylock.utils.path import UserPath
 from skylock.utils.storage import FileStorageService
 from skylock.utils.url_generator import UrlGenerator
@@ -65,12 +84,18 @@ def file_repository(db_session):
     return FileRepository(db_session)
 
 
+@pytest.fixture
+def blob_repository(db_session):
+    return BlobRepository(db_session)
+
+
 @pytest.fixture
 def path_resolver(file_repository, folder_repository, user_repository):
     return PathResolver(
         file_repository=file_repository,
         folder_repository=folder_repository,
         user_repository=user_repository,
+        single_query=True,
     )
 
 
@@ -80,12 +105,46 @@ def storage_service(tmp_path):
 
 
 @pytest.fixture
-def resource_service(file_repository, folder_repository, path_resolver, storage_service):
+def usage_service(user_repository, path_resolver):
+    return UsageService(user_repository=user_repository, path_resolver=path_resolver)
+
+
+@pytest.fixture
+def resource_service(
+    file_repository,
+    folder_repository,
+    path_resolver,
+    storage_service,
+    blob_repository,
+    usage_service,
+):
     return ResourceService(
         file_repository=file_repository,
         folder_repository=folder_repository,
         path_resolver=path_resolver,
         file_storage_service=storage_service,
+        blob_repository=blob_repository,
+        usage_service=usage_service,
+    )
+
+
+@pytest.fixture
+def blob_reaper(db_session, storage_service):
+    return BlobReaper(lambda: nullcontext(db_session), storage_service)
+
+
+@pytest.fixture
+def upload_session_reaper(db_session, storage_service):
+    return UploadSessionReaper(lambda: nullcontext(db_session), storage_service)
+
+
+@pytest.fixture
+def upload_session_service(db_session, resource_service, usage_service, storage_service):
+    return UploadSessionService(
+        upload_session_repository=UploadSessionRepository(db_session),
+        resource_service=resource_service,
+        usage_service=usage_service,
+        file_storage_service=storage_service,
     )
 
 
@@ -95,7 +154,7 @@ def zip_service(storage_service):
 
 
 @pytest.fixture
-def skylock(user_service, resource_service, path_resolver, zip_service):
+def skylock(user_service, resource_service, path_resolver, zip_service, usage_service):
     return SkylockFacade(
         user_service=user_service,
         resource_service=resource_service,
@@ -103,6 +162,15 @@ def skylock(user_service, resource_service, path_resolver, zip_service):
         path_resolver=path_resolver,
         response_builder=ResponseBuilder(),
         zip_service=zip_service,
+        usage_service=usage_service,
+    )
+
+
+@pytest.fixture
+def upload_session_facade(upload_session_service):
+    return UploadSessionFacade(
+        upload_session_service=upload_session_service,
+        response_builder=ResponseBuilder(),
     )
 
 
@@ -120,8 +188,13 @@ def mock_user(db_session, resource_service):
 
 
 @pytest.fixture
-def test_app(skylock, db_session, mock_user):
+def test_app(
+    skylock, upload_session_facade, db_session, mock_user, blob_reaper, upload_session_reaper
+):
     api.dependency_overrides[get_skylock_facade] = lambda: skylock
+    api.dependency_overrides[get_upload_session_facade] = lambda: upload_session_facade
+    api.dependency_overrides[get_blob_reaper] = lambda: blob_reaper
+    api.dependency_overrides[get_upload_session_reaper] = lambda: upload_session_reaper
     api.dependency_overrides[get_db_session] = lambda: db_session
     api.dependency_overrides[get_current_user] = lambda: mock_user
     return api
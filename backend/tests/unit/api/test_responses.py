@@ -0,0 +1,221 @@
+import anyio
+import pytest
+
+from skylock.api.responses import (
+    ZERO_COPY_SEND_EXTENSION,
+    BlobResponse,
+    content_disposition,
+    parse_range_header,
+)
+
+
+@pytest.fixture
+def blob(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(b"0123456789" * 10)
+    return path
+
+
+def call(response, method="GET", extensions=None, headers=None):
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "extensions": extensions or {},
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    anyio.run(response, scope, receive, send)
+    return messages
+
+
+def test_blob_response_sets_content_length(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    assert response.headers["content-length"] == "100"
+    assert response.headers["content-disposition"] == 'attachment; filename="file.txt"'
+    response.file.close()
+
+
+def test_blob_response_streams_chunks(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+    response.chunk_size = 30
+
+    messages = call(response)
+
+    assert messages[0]["status"] == 200
+    assert b"".join(message.get("body", b"") for message in messages[1:]) == blob.read_bytes()
+    assert all(len(message["body"]) <= 30 for message in messages[1:])
+    assert messages[-1]["more_body"] is False
+    assert response.file.closed
+
+
+def test_blob_response_uses_zero_copy_send(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, extensions={ZERO_COPY_SEND_EXTENSION: {}})
+
+    assert messages[1]["type"] == ZERO_COPY_SEND_EXTENSION
+    assert messages[1]["file"] is response.file
+    assert response.file.closed
+
+
+def test_blob_response_head_sends_no_body(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, method="HEAD")
+
+    assert messages[1] == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+def test_content_disposition_quotes_non_ascii_names():
+    assert (
+        content_disposition("zażółć.txt")
+        == "attachment; filename*=utf-8''za%C5%BC%C3%B3%C5%82%C4%87.txt"
+    )
+
+
+def body_of(messages):
+    return b"".join(message.get("body", b"") for message in messages[1:])
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", [(0, 10)]),
+        ("bytes=90-", [(90, 100)]),
+        ("bytes=-5", [(95, 100)]),
+        ("bytes=-500", [(0, 100)]),
+        ("bytes=95-200", [(95, 100)]),
+        ("bytes=20-29, 0-9", [(0, 10), (20, 30)]),
+        ("bytes=0-9,5-14,15-19", [(0, 20)]),
+        ("bytes=100-", []),
+        ("bytes=-0", []),
+        ("bytes=5-1", None),
+        ("bytes=abc", None),
+        ("bytes=-", None),
+        ("items=0-9", None),
+        ("bytes=" + ",".join(f"{index}-{index}" for index in range(0, 200, 2)), None),
+    ],
+)
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 100) == expected
+
+
+def test_blob_response_single_range(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, headers={"range": "bytes=10-19"})
+
+    headers = dict(messages[0]["headers"])
+    assert messages[0]["status"] == 206
+    assert headers[b"content-range"] == b"bytes 10-19/100"
+    assert headers[b"content-length"] == b"10"
+    assert body_of(messages) == blob.read_bytes()[10:20]
+
+
+def test_blob_response_single_range_zero_copy(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(
+        response, extensions={ZERO_COPY_SEND_EXTENSION: {}}, headers={"range": "bytes=-10"}
+    )
+
+    assert messages[1]["offset"] == 90
+    assert messages[1]["count"] == 10
+
+
+def test_blob_response_multiple_ranges(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, headers={"range": "bytes=0-4,50-54"})
+
+    headers = dict(messages[0]["headers"])
+    body = body_of(messages)
+    boundary = headers[b"content-type"].split(b"boundary=")[1]
+    assert messages[0]["status"] == 206
+    assert int(headers[b"content-length"]) == len(body)
+    assert body.count(b"--" + boundary) == 3
+    assert b"Content-Range: bytes 0-4/100\r\n\r\n01234\r\n" in body
+    assert b"Content-Range: bytes 50-54/100\r\n\r\n01234\r\n" in body
+    assert body.endswith(b"--" + boundary + b"--\r\n")
+
+
+def test_blob_response_range_not_satisfiable(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, headers={"range": "bytes=200-"})
+
+    assert messages[0]["status"] == 416
+    assert dict(messages[0]["headers"])[b"content-range"] == b"bytes */100"
+    assert response.file.closed
+
+
+def test_blob_response_if_range_matches(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+    last_modified = response.headers["last-modified"]
+
+    messages = call(response, headers={"range": "bytes=0-9", "if-range": last_modified})
+
+    assert messages[0]["status"] == 206
+
+
+def test_blob_response_if_range_stale(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(
+        response,
+        headers={"range": "bytes=0-9", "if-range": "Thu, 01 Jan 1970 00:00:00 GMT"},
+    )
+
+    assert messages[0]["status"] == 200
+    assert body_of(messages) == blob.read_bytes()
+
+
+def test_blob_response_if_none_match(blob):
+    headers = {"etag": '"abc"', "cache-control": "private, no-cache"}
+    response = BlobResponse(blob.open("rb"), filename="file.txt", headers=headers)
+
+    messages = call(response, headers={"if-none-match": 'W/"other", W/"abc"'})
+
+    assert messages[0]["status"] == 304
+    assert dict(messages[0]["headers"]) == {
+        b"etag": b'"abc"',
+        b"cache-control": b"private, no-cache",
+        b"last-modified": response.headers["last-modified"].encode(),
+    }
+    assert body_of(messages) == b""
+    assert response.file.closed
+
+
+def test_blob_response_if_none_match_changed(blob):
+    response = BlobResponse(blob.open("rb"), filename="file.txt", headers={"etag": '"abc"'})
+
+    messages = call(
+        response,
+        headers={"if-none-match": '"old"', "if-modified-since": response.headers["last-modified"]},
+    )
+
+    assert messages[0]["status"] == 200
+
+
+@pytest.mark.parametrize(
+    "if_modified_since, expected_status",
+    [
+        ("Fri, 01 Jan 2100 00:00:00 GMT", 304),
+        ("Thu, 01 Jan 1970 00:00:00 GMT", 200),
+        ("not a date", 200),
+    ],
+)
+def test_blob_response_if_modified_since(blob, if_modified_since, expected_status):
+    response = BlobResponse(blob.open("rb"), filename="file.txt")
+
+    messages = call(response, headers={"if-modified-since": if_modified_since})
+
+    assert messages[0]["status"] == expected_status
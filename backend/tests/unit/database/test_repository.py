@@ -0,0 +1,328 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from skylock.database.models import (
+    BlobEntity,
+    FileEntity,
+    FolderEntity,
+    UploadChunkEntity,
+    UploadSessionEntity,
+    UserEntity,
+)
+from skylock.database.repository import (
+    BlobRepository,
+    FileRepository,
+    FolderRepository,
+    UploadSessionRepository,
+    UserRepository,
+)
+
+
+@pytest.fixture
+def commits(db_session):
+    commits = []
+    event.listen(db_session, "after_commit", lambda _session: commits.append(True))
+    return commits
+
+
+@pytest.fixture
+def user_repository(db_session):
+    return UserRepository(db_session)
+
+
+@pytest.fixture
+def folder_repository(db_session):
+    return FolderRepository(db_session)
+
+
+@pytest.fixture
+def file_repository(db_session):
+    return FileRepository(db_session)
+
+
+@pytest.fixture
+def blob_repository(db_session):
+    return BlobRepository(db_session)
+
+
+@pytest.fixture
+def upload_session_repository(db_session):
+    return UploadSessionRepository(db_session)
+
+
+def test_save_outside_transaction_commits(user_repository, commits):
+    user_repository.save(UserEntity(username="testuser", password="password"))
+
+    assert len(commits) == 1
+
+
+def test_transaction_commits_once(user_repository, folder_repository, commits):
+    with folder_repository.transaction():
+        user = user_repository.save(UserEntity(username="testuser", password="password"))
+        root = folder_repository.save(FolderEntity(name=user.id, owner=user))
+        for index in range(10):
+            folder_repository.save(
+                FolderEntity(name=f"folder{index}", parent_folder=root, owner=user)
+            )
+        assert not commits
+
+    assert len(commits) == 1
+    assert len(folder_repository.filter()) == 11
+
+
+def test_save_inside_transaction_assigns_id(user_repository):
+    with user_repository.transaction():
+        user = user_repository.save(UserEntity(username="testuser", password="password"))
+        assert user.id is not None
+
+
+def test_nested_transactions_join_outermost(user_repository, folder_repository, commits):
+    with folder_repository.transaction():
+        with user_repository.transaction():
+            user_repository.save(UserEntity(username="testuser", password="password"))
+        assert not commits
+
+    assert len(commits) == 1
+
+
+def test_transaction_rolls_back_on_exception(user_repository, commits):
+    with pytest.raises(RuntimeError):
+        with user_repository.transaction():
+            user_repository.save(UserEntity(username="testuser", password="password"))
+            raise RuntimeError
+
+    assert not commits
+    assert user_repository.get_by_username("testuser") is None
+
+
+def test_delete_inside_transaction_is_visible_before_commit(user_repository, commits):
+    user = user_repository.save(UserEntity(username="testuser", password="password"))
+
+    with user_repository.transaction():
+        user_repository.delete(user)
+        assert user_repository.get_by_username("testuser") is None
+
+    assert len(commits) == 2
+
+
+@pytest.fixture
+def folder_tree(user_repository, folder_repository, db_session):
+    """root/
+    |- parent/ (file_a)
+        |- child/ (file_b)
+            |- grandchild/ (file_c)
+    |- sibling/ (file_d)
+
+    file_a, file_b and file_d share one blob.
+    """
+    user = user_repository.save(UserEntity(username="testuser", password="password"))
+    root = folder_repository.save(FolderEntity(name=user.id, owner=user))
+    parent = folder_repository.save(FolderEntity(name="parent", parent_folder=root, owner=user))
+    child = folder_repository.save(FolderEntity(name="child", parent_folder=parent, owner=user))
+    grandchild = folder_repository.save(
+        FolderEntity(name="grandchild", parent_folder=child, owner=user)
+    )
+    sibling = folder_repository.save(FolderEntity(name="sibling", parent_folder=root, owner=user))
+    for name, folder, blob_key in [
+        ("file_a", parent, "shared"),
+        ("file_b", child, "shared"),
+        ("file_c", grandchild, "blob_c"),
+        ("file_d", sibling, "shared"),
+    ]:
+        db_session.add(FileEntity(name=name, folder=folder, owner=user, blob_key=blob_key))
+    db_session.add_all([BlobEntity(id="shared", ref_count=3), BlobEntity(id="blob_c", ref_count=1)])
+    db_session.commit()
+    return {"root": root, "parent": parent, "child": child, "sibling": sibling}
+
+
+def test_update_visibility_recursive(folder_repository, file_repository, folder_tree):
+    parent = folder_tree["parent"]
+
+    updated_folders = folder_repository.update_visibility(parent.id, True, recursive=True)
+    updated_files = file_repository.update_visibility_in_folder(parent.id, True, recursive=True)
+
+    assert updated_folders == 3
+    assert updated_files == 3
+    assert parent.is_public
+    assert folder_tree["child"].is_public
+    assert not folder_tree["sibling"].is_public
+    assert {file.name for file in file_repository.filter(FileEntity.is_public)} == {
+        "file_a",
+        "file_b",
+        "file_c",
+    }
+
+
+def test_update_visibility_not_recursive(folder_repository, file_repository, folder_tree):
+    parent = folder_tree["parent"]
+
+    updated_folders = folder_repository.update_visibility(parent.id, True, recursive=False)
+    updated_files = file_repository.update_visibility_in_folder(parent.id, True, recursive=False)
+
+    assert updated_folders == 1
+    assert updated_files == 1
+    assert parent.is_public
+    assert not folder_tree["child"].is_public
+
+
+@pytest.fixture
+def wide_folder(user_repository, folder_repository, file_repository):
+    user = user_repository.save(UserEntity(username="testuser", password="password"))
+    root = folder_repository.save(FolderEntity(name=user.id, owner=user))
+    for index in range(5):
+        folder_repository.save(FolderEntity(name=f"folder{index}", parent_folder=root, owner=user))
+        file_repository.save(
+            FileEntity(name=f"file{index}", folder=root, owner=user, blob_key=f"blob{index}")
+        )
+    return root
+
+
+def test_subfolders_page_seeks_past_name(folder_repository, wide_folder):
+    page = folder_repository.get_subfolders_page(wide_folder.id, after_name="folder1", limit=2)
+
+    assert [folder.name for folder in page] == ["folder2", "folder3"]
+
+
+def test_folder_page_without_limit_returns_rest(file_repository, wide_folder):
+    page = file_repository.get_folder_page(wide_folder.id, after_name="file2")
+
+    assert [file.name for file in page] == ["file3", "file4"]
+
+
+@pytest.mark.parametrize(
+    "table, parent_column, index",
+    [
+        ("folders", "parent_folder_id", "ix_folders_parent_folder_id_name"),
+        ("files", "folder_id", "ix_files_folder_id_name"),
+    ],
+)
+def test_page_queries_use_lookup_index(db_session, table, parent_column, index):
+    plan = db_session.execute(
+        text(
+            f"EXPLAIN QUERY PLAN SELECT * FROM {table} "
+            f"WHERE {parent_column} = 'id' AND name > 'name' ORDER BY name LIMIT 10"
+        )
+    ).all()
+
+    assert any(index in row[-1] for row in plan)
+
+
+def ref_counts(blob_repository):
+    return {blob.id: blob.ref_count for blob in blob_repository.filter()}
+
+
+def test_get_subtree_usage(file_repository, folder_tree, db_session):
+    file_repository.filter(FileEntity.name == "file_a")[0].size = 10
+    file_repository.filter(FileEntity.name == "file_c")[0].size = 5
+    db_session.commit()
+
+    assert file_repository.get_subtree_usage(folder_tree["parent"].id) == (15, 3)
+    assert file_repository.get_subtree_usage(folder_tree["sibling"].id) == (0, 1)
+
+
+@pytest.fixture
+def user(user_repository):
+    return user_repository.save(UserEntity(username="testuser", password="password"))
+
+
+def test_add_usage(user_repository, user):
+    user_repository.add_usage(user.id, 100, 2)
+    user_repository.add_usage(user.id, -30, -1)
+
+    assert (user.used_bytes, user.file_count) == (70, 1)
+
+
+def test_charge_usage_within_quota(user_repository, user):
+    user.quota_bytes = 100
+    user_repository.save(user)
+
+    assert user_repository.charge_usage(user.id, 60, 1)
+    assert not user_repository.charge_usage(user.id, 60, 1)
+    assert user_repository.charge_usage(user.id, 40, 1)
+    assert (user.used_bytes, user.file_count) == (100, 2)
+
+
+def test_charge_usage_default_quota(user_repository, user):
+    assert user_repository.charge_usage(user.id, 1000, 1)
+    assert not user_repository.charge_usage(user.id, 1, 1, default_quota=1000)
+
+    user.quota_bytes = 2000
+    user_repository.save(user)
+    assert user_repository.charge_usage(user.id, 1, 1, default_quota=1000)
+
+
+def test_add_reference_registers_and_counts_blob(blob_repository):
+    with blob_repository.transaction():
+        blob_repository.add_reference("blob")
+        blob_repository.add_reference("blob")
+
+    assert ref_counts(blob_repository) == {"blob": 2}
+
+
+def test_blob_inserts_on_unsupported_database(blob_repository, db_session, monkeypatch):
+    monkeypatch.setattr(db_session.get_bind().dialect, "name", "mysql")
+
+    with pytest.raises(NotImplementedError, match="not on mysql"):
+        blob_repository.add_reference("blob")
+    with pytest.raises(NotImplementedError, match="not on mysql"):
+        blob_repository.adopt(["blob"])
+
+
+def test_release(blob_repository, folder_tree):
+    blob_repository.release("shared")
+
+    assert ref_counts(blob_repository) == {"shared": 2, "blob_c": 1}
+
+
+def test_release_files_in_subtree(blob_repository, folder_tree):
+    blob_repository.release_files_in_subtree(folder_tree["parent"].id)
+
+    assert ref_counts(blob_repository) == {"shared": 1, "blob_c": 0}
+
+
+def test_collect_unreferenced_deletes_batch(blob_repository, db_session):
+    db_session.add_all([BlobEntity(id=f"blob{index}", ref_count=index % 2) for index in range(6)])
+    db_session.commit()
+
+    with blob_repository.transaction():
+        assert blob_repository.collect_unreferenced(2) == ["blob0", "blob2"]
+    with blob_repository.transaction():
+        assert blob_repository.collect_unreferenced(2) == ["blob4"]
+
+    assert ref_counts(blob_repository) == {"blob1": 1, "blob3": 1, "blob5": 1}
+
+
+@pytest.fixture
+def upload_session(upload_session_repository, user):
+    return upload_session_repository.save(UploadSessionEntity(path="file.txt", size=10, owner=user))
+
+
+def test_upload_session_created_at_is_utc(upload_session_repository, upload_session, db_session):
+    db_session.expire_all()
+
+    created_at = upload_session_repository.get_by_id(upload_session.id).created_at
+    assert created_at.utcoffset() == timedelta(0)
+
+
+def test_add_chunk_retried_keeps_larger_size(upload_session_repository, upload_session):
+    upload_session_repository.add_chunk(upload_session.id, 0, 4)
+    upload_session_repository.add_chunk(upload_session.id, 0, 6)
+    upload_session_repository.add_chunk(upload_session.id, 0, 5)
+    upload_session_repository.add_chunk(upload_session.id, 6, 4)
+
+    assert sorted(upload_session_repository.get_chunk_ranges(upload_session.id)) == [
+        (0, 6),
+        (6, 10),
+    ]
+
+
+def test_delete_with_chunks(upload_session_repository, upload_session, db_session):
+    upload_session_repository.add_chunk(upload_session.id, 0, 4)
+
+    with upload_session_repository.transaction():
+        upload_session_repository.delete_with_chunks(upload_session)
+
+    assert db_session.query(UploadSessionEntity).count() == 0
+    assert db_session.query(UploadChunkEntity).count() == 0
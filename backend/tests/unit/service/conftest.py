@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from skylock.service.path_resolver import PathResolver
 from skylock.service.resource_service import ResourceService
+from skylock.service.usage_service import UsageService
 from skylock.utils.storage import FileStorageService
 
 
@@ -12,7 +13,10 @@ def mock_file_repository():
 
 @pytest.fixture
 def mock_folder_repository():
-    return MagicMock()
+    folder_repository = MagicMock()
+    folder_repository.has_children.return_value = False
+    folder_repository.has_child_named.return_value = False
+    return folder_repository
 
 
 @pytest.fixture
@@ -20,6 +24,11 @@ def mock_user_repository():
     return MagicMock()
 
 
+@pytest.fixture
+def mock_blob_repository():
+    return MagicMock()
+
+
 @pytest.fixture
 def path_resolver(mock_file_repository, mock_folder_repository, mock_user_repository):
     return PathResolver(
@@ -35,10 +44,24 @@ def storage_service(tmp_path):
 
 
 @pytest.fixture
-def resource_service(mock_file_repository, mock_folder_repository, path_resolver, storage_service):
+def usage_service(mock_user_repository, path_resolver):
+    return UsageService(user_repository=mock_user_repository, path_resolver=path_resolver)
+
+
+@pytest.fixture
+def resource_service(
+    mock_file_repository,
+    mock_folder_repository,
+    path_resolver,
+    storage_service,
+    mock_blob_repository,
+    usage_service,
+):
     return ResourceService(
         file_repository=mock_file_repository,
         folder_repository=mock_folder_repository,
         path_resolver=path_resolver,
         file_storage_service=storage_service,
+        blob_repository=mock_blob_repository,
+        usage_service=usage_service,
     )
@@ -0,0 +1,103 @@
+from io import BytesIO
+
+import anyio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from skylock.database.async_repository import AsyncFileRepository, AsyncFolderRepository
+from skylock.database.models import Base, FileEntity, FolderEntity, UserEntity
+from skylock.database.session import AsyncDatabaseEngine
+from skylock.service.async_resource_service import AsyncResourceService
+from skylock.service.path_resolver import AsyncPathResolver
+from skylock.utils.exceptions import ForbiddenActionException, ResourceNotFoundException
+from skylock.utils.path import UserPath
+
+
+@pytest.fixture
+def database_url(tmp_path_factory):
+    return f"sqlite:///{tmp_path_factory.mktemp('database') / 'db.sqlite'}"
+
+
+@pytest.fixture
+def user(database_url, storage_service):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    blob = storage_service.stage_blob(BytesIO(b"content"))
+    storage_service.store_blob(blob)
+
+    with Session(engine, expire_on_commit=False) as session:
+        user = UserEntity(username="user", password="password")
+        session.add(user)
+        session.flush()
+        root = FolderEntity(name=user.id, owner=user)
+        folder = FolderEntity(name="docs", parent_folder=root, owner=user)
+        for name, is_public in (("public.txt", True), ("private.txt", False)):
+            session.add(
+                FileEntity(
+                    id=name,
+                    name=name,
+                    folder=folder,
+                    owner=user,
+                    is_public=is_public,
+                    blob_key=blob.key,
+                )
+            )
+        session.commit()
+    engine.dispose()
+    return user
+
+
+def run(database_url, storage_service, action):
+    engine = AsyncDatabaseEngine(database_url)
+
+    async def main():
+        try:
+            async with engine.session_factory() as session:
+                file_repository = AsyncFileRepository(session)
+                path_resolver = AsyncPathResolver(file_repository, AsyncFolderRepository(session))
+                service = AsyncResourceService(file_repository, path_resolver, storage_service)
+                return await action(service)
+        finally:
+            await engine.dispose()
+
+    return anyio.run(main)
+
+
+def test_get_file(database_url, storage_service, user):
+    file = run(
+        database_url,
+        storage_service,
+        lambda service: service.get_file(UserPath("docs/private.txt", user)),
+    )
+
+    assert file.id == "private.txt"
+
+
+@pytest.mark.parametrize(
+    "path, missing", [("docs/missing.txt", "missing.txt"), ("other/private.txt", "other")]
+)
+def test_get_file_not_found(database_url, storage_service, user, path, missing):
+    with pytest.raises(ResourceNotFoundException) as error:
+        run(database_url, storage_service, lambda service: service.get_file(UserPath(path, user)))
+
+    assert error.value.missing_resource_name == missing
+
+
+def test_get_public_file(database_url, storage_service, user):
+    file = run(database_url, storage_service, lambda service: service.get_public_file("public.txt"))
+
+    assert file.name == "public.txt"
+    with pytest.raises(ForbiddenActionException):
+        run(database_url, storage_service, lambda service: service.get_public_file("private.txt"))
+    with pytest.raises(ResourceNotFoundException):
+        run(database_url, storage_service, lambda service: service.get_public_file("missing"))
+
+
+def test_get_file_data(database_url, storage_service, user):
+    async def read(service):
+        file = await service.get_file(UserPath("docs/public.txt", user))
+        with await service.get_file_data(file) as data:
+            return data.read()
+
+    assert run(database_url, storage_service, read) == b"content"
@@ -0,0 +1,115 @@
+import os
+import time
+from contextlib import nullcontext
+from io import BytesIO
+
+import pytest
+
+from skylock.database.models import BlobEntity, UploadSessionEntity, UserEntity
+from skylock.database.repository import BlobRepository
+from skylock.service.blob_collector import BlobCollector
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def collector(db_session, storage_service):
+    return BlobCollector(
+        lambda: nullcontext(db_session), storage_service, batch_size=2, grace_period=DAY
+    )
+
+
+def store_blob(storage_service, data, age=2 * DAY):
+    blob = storage_service.stage_blob(BytesIO(data))
+    storage_service.store_blob(blob)
+    blob_path = storage_service.storage_path / blob.key[:2] / blob.key[2:4] / blob.key
+    modified = time.time() - age
+    os.utime(blob_path, (modified, modified))
+    return blob.key
+
+
+def register(db_session, *keys):
+    db_session.add_all([BlobEntity(id=key, ref_count=1) for key in keys])
+    db_session.commit()
+
+
+def stored_keys(storage_service):
+    return {key for key, _ in storage_service.backend.iter_blobs()}
+
+
+@pytest.fixture
+def blobs(db_session, storage_service):
+    known = [store_blob(storage_service, f"known-{index}".encode()) for index in range(3)]
+    orphans = [store_blob(storage_service, f"orphan-{index}".encode()) for index in range(5)]
+    young = store_blob(storage_service, b"young orphan", age=0)
+    register(db_session, *known, "dangling-key")
+    return known, orphans, young
+
+
+def test_collect_dry_run_reports_without_changes(collector, storage_service, blobs):
+    known, orphans, young = blobs
+
+    report = collector.collect(dry_run=True)
+
+    assert report.scanned == 9
+    assert report.orphaned == 5
+    assert report.orphaned_bytes == sum(len(f"orphan-{index}") for index in range(5))
+    assert report.dangling == 1
+    assert report.dangling_sample == ["dangling-key"]
+    assert report.collected == 0
+    assert stored_keys(storage_service) == {*known, *orphans, young}
+
+
+def test_collect_removes_old_orphans(collector, db_session, storage_service, blobs):
+    known, _, young = blobs
+
+    report = collector.collect()
+
+    assert report.orphaned == 5
+    assert report.collected == 5
+    assert stored_keys(storage_service) == {*known, young}
+    assert {blob.id for blob in db_session.query(BlobEntity)} == {*known, "dangling-key"}
+
+
+def test_collect_ignores_legacy_blobs(collector, db_session, storage_service):
+    (storage_service.storage_path / "legacy-key").write_bytes(b"legacy")
+    register(db_session, "legacy-key")
+
+    report = collector.collect()
+
+    assert report.dangling == 0
+    assert (storage_service.storage_path / "legacy-key").exists()
+
+
+def test_adopt_keeps_blobs_registered_meanwhile(db_session):
+    blob_repository = BlobRepository(db_session)
+    blob_repository.add_reference("shared")
+
+    blob_repository.adopt(["shared", "orphan"])
+
+    assert blob_repository.collect_unreferenced(10) == ["orphan"]
+    assert blob_repository.get_keys_page() == ["shared"]
+
+
+def test_collect_sweeps_stale_incoming_files(collector, db_session, storage_service):
+    user = UserEntity(username="user", password="password")
+    db_session.add(user)
+    db_session.flush()
+    open_session = UploadSessionEntity(path="file", size=4, owner_id=user.id)
+    db_session.add(open_session)
+    db_session.commit()
+    storage_service.create_upload(open_session.id, 4)
+    storage_service.create_upload("crashed-upload", 4)
+    storage_service.stage_blob(BytesIO(b"young staged blob"))
+    stale_time = time.time() - 2 * DAY
+    for name in (open_session.id, "crashed-upload"):
+        os.utime(storage_service.storage_path / ".incoming" / name, (stale_time, stale_time))
+
+    dry_run_report = collector.collect(dry_run=True)
+    report = collector.collect()
+
+    assert dry_run_report.stale_incoming == report.stale_incoming == 1
+    remaining = {name for name, _ in storage_service.iter_incoming()}
+    assert len(remaining) == 2
+    assert open_session.id in remaining
+    assert "crashed-upload" not in remaining
@@ -0,0 +1,66 @@
+from io import BytesIO
+from contextlib import nullcontext
+from unittest.mock import MagicMock
+
+import pytest
+
+from skylock.database.models import BlobEntity
+from skylock.database.repository import BlobRepository
+from skylock.service.blob_reaper import BlobReaper
+
+
+@pytest.fixture
+def blob_reaper(db_session, storage_service):
+    return BlobReaper(lambda: nullcontext(db_session), storage_service, batch_size=2)
+
+
+def queue_blobs(db_session, storage_service, count, ref_count=0):
+    keys = []
+    for index in range(count):
+        blob = storage_service.stage_blob(BytesIO(f"data-{index}".encode()))
+        storage_service.store_blob(blob)
+        db_session.add(BlobEntity(id=blob.key, ref_count=ref_count))
+        keys.append(blob.key)
+    db_session.commit()
+    return keys
+
+
+def stored_blobs(storage_service):
+    return [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
+
+
+def test_reap_removes_unreferenced_blobs(db_session, storage_service, blob_reaper):
+    queue_blobs(db_session, storage_service, 5)
+
+    assert blob_reaper.reap() == 5
+
+    assert not stored_blobs(storage_service)
+    assert BlobRepository(db_session).filter() == []
+
+
+def test_reap_keeps_referenced_blobs(db_session, storage_service, blob_reaper):
+    referenced_keys = queue_blobs(db_session, storage_service, 1, ref_count=1)
+    queue_blobs(db_session, storage_service, 2)
+
+    assert blob_reaper.reap() == 2
+
+    assert len(stored_blobs(storage_service)) == 1
+    assert [blob.id for blob in BlobRepository(db_session).filter()] == referenced_keys
+
+
+def test_reap_skips_already_removed_blobs(db_session, storage_service, blob_reaper):
+    queue_blobs(db_session, storage_service, 1)
+    db_session.add(BlobEntity(id="blob-missing", ref_count=0))
+    db_session.commit()
+
+    assert blob_reaper.reap() == 2
+
+
+def test_reap_keeps_blob_rows_when_storage_fails(db_session, storage_service, blob_reaper):
+    keys = queue_blobs(db_session, storage_service, 1)
+    storage_service.delete_blobs = MagicMock(side_effect=OSError("disk failure"))
+
+    with pytest.raises(OSError):
+        blob_reaper.reap()
+
+    assert [blob.id for blob in BlobRepository(db_session).filter()] == keys
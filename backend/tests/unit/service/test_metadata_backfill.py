@@ -0,0 +1,109 @@
+import hashlib
+from contextlib import nullcontext
+from datetime import timezone
+from io import BytesIO
+
+import pytest
+
+from skylock.database.models import FileEntity, FolderEntity, UserEntity
+from skylock.service.metadata_backfill import FileMetadataBackfill
+
+
+@pytest.fixture
+def backfill(db_session, storage_service):
+    return FileMetadataBackfill(lambda: nullcontext(db_session), storage_service, batch_size=2)
+
+
+@pytest.fixture
+def folder(db_session):
+    user = UserEntity(username="user", password="password")
+    folder = FolderEntity(name="folder", owner=user)
+    db_session.add(folder)
+    db_session.commit()
+    return folder
+
+
+def add_legacy_file(db_session, storage_service, folder, name, data):
+    blob = storage_service.stage_blob(BytesIO(data))
+    storage_service.store_blob(blob)
+    file = FileEntity(
+        name=name,
+        folder=folder,
+        owner=folder.owner,
+        blob_key=blob.key,
+        created_at=None,
+        modified_at=None,
+    )
+    db_session.add(file)
+    db_session.commit()
+    return file
+
+
+def test_backfill_records_metadata(db_session, storage_service, folder, backfill):
+    files = [
+        add_legacy_file(db_session, storage_service, folder, f"file{index}.txt", b"x" * index)
+        for index in range(5)
+    ]
+
+    assert backfill.pending() == 5
+    assert backfill.run() == 5
+    assert backfill.pending() == 0
+
+    for index, file in enumerate(files):
+        db_session.refresh(file)
+        assert file.size == index
+        assert file.sha256 == hashlib.sha256(b"x" * index).hexdigest()
+        assert file.mime_type == "text/plain"
+        assert file.created_at == file.modified_at
+        assert file.created_at.tzinfo == timezone.utc
+
+
+def test_backfill_counts_sizes_recorded_for_the_first_time(
+    db_session, storage_service, folder, backfill
+):
+    add_legacy_file(db_session, storage_service, folder, "legacy.txt", b"x" * 10)
+    sized = add_legacy_file(db_session, storage_service, folder, "sized.txt", b"x" * 20)
+    # Files uploaded with a size but no checksum were already counted by the migration
+    sized.size = 20
+    folder.owner.used_bytes = 20
+    db_session.commit()
+
+    assert backfill.run() == 2
+
+    db_session.refresh(folder.owner)
+    assert folder.owner.used_bytes == 30
+
+
+def test_backfill_sniffs_media_type_of_unnamed_type(db_session, storage_service, folder, backfill):
+    file = add_legacy_file(db_session, storage_service, folder, "picture", b"\x89PNG\r\n\x1a\n")
+
+    backfill.run()
+
+    db_session.refresh(file)
+    assert file.mime_type == "image/png"
+
+
+def test_backfill_skips_missing_blobs(db_session, storage_service, folder, backfill):
+    missing = add_legacy_file(db_session, storage_service, folder, "missing.txt", b"gone")
+    storage_service.delete_blobs([missing.blob_key])
+    add_legacy_file(db_session, storage_service, folder, "present.txt", b"here")
+
+    assert backfill.run() == 1
+    assert backfill.pending() == 1
+
+
+def test_backfill_skips_unreadable_blobs(db_session, storage_service, folder, backfill, caplog):
+    unreadable = add_legacy_file(db_session, storage_service, folder, "bad.txt", b"bad")
+    add_legacy_file(db_session, storage_service, folder, "good.txt", b"good")
+    original_get_file = storage_service.get_file
+
+    def get_file(file, *args, **kwargs):
+        if file.id == unreadable.id:
+            raise PermissionError("Permission denied")
+        return original_get_file(file, *args, **kwargs)
+
+    storage_service.get_file = get_file
+
+    assert backfill.run() == 1
+    assert backfill.pending() == 1
+    assert f"Skipping file {unreadable.id}: Permission denied" in caplog.text
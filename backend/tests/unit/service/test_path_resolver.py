@@ -5,37 +5,7 @@ from skylock.utils.exceptions import ResourceNotFoundException
 from skylock.utils.path import UserPath
 import pytest
 from skylock.service.path_resolver import PathResolver
-
-
-from sqlalchemy import StaticPool, create_engine
-from skylock.database.models import Base
-from sqlalchemy.orm import sessionmaker
-
-
-TEST_DATABASE_URL = "sqlite://"
-
-MOCK_USERNAME = "mockuser"
-MOCK_PASSWORD = "mockpasswd"
-
-
-@pytest.fixture
-def db_session():
-    engine = create_engine(
-        TEST_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-
-    Base.metadata.create_all(bind=engine)
-
-    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = factory()
-
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
+from sqlalchemy import event
 
 
 @pytest.fixture
@@ -86,27 +56,67 @@ def mock_file_repository(db_session, mock_folder_repository):
     fr = FileRepository(db_session)
 
     root_level_file = FileEntity(
-        id="file-123", name="test_file", folder_id="folder-123", owner_id="user-123"
+        id="file-123",
+        name="test_file",
+        folder_id="folder-123",
+        owner_id="user-123",
+        blob_key="file-123",
     )
     fr.save(root_level_file)
 
     test_subfile = FileEntity(
-        id="file-456", name="test_subfile", folder_id="folder-456", owner_id="user-123"
+        id="file-456",
+        name="test_subfile",
+        folder_id="folder-456",
+        owner_id="user-123",
+        blob_key="file-456",
     )
     fr.save(test_subfile)
 
     return fr
 
 
+@pytest.fixture(params=[False, True], ids=["per_segment", "single_query"])
+def path_resolver(request, mock_file_repository, mock_folder_repository, mock_user_repository):
+    return PathResolver(
+        file_repository=mock_file_repository,
+        folder_repository=mock_folder_repository,
+        user_repository=mock_user_repository,
+        single_query=request.param,
+    )
+
+
 @pytest.fixture
-def path_resolver(mock_file_repository, mock_folder_repository, mock_user_repository):
+def single_query_path_resolver(mock_file_repository, mock_folder_repository, mock_user_repository):
     return PathResolver(
         file_repository=mock_file_repository,
         folder_repository=mock_folder_repository,
         user_repository=mock_user_repository,
+        single_query=True,
     )
 
 
+@pytest.fixture
+def count_path_queries(db_session):
+    def count(resolve, user_path):
+        statements = []
+
+        # Every query counts, including lazy loads of the resolved entities' attributes
+        def on_execute(_conn, _cursor, statement, *_args):
+            if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            resolve(user_path)
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+        return len(statements)
+
+    return count
+
+
 def test_folder_from_path_root_success(path_resolver):
     user = path_resolver._user_repository.get_by_username("testuser")
     user_path = UserPath.root_folder_of(user)
@@ -219,3 +229,72 @@ def test_path_from_folder_LookupError(path_resolver):
 
     with pytest.raises(LookupError):
         path_resolver.path_from_folder(folder)
+
+
+def test_single_query_folder_resolution_issues_one_query(
+    single_query_path_resolver, count_path_queries
+):
+    user = single_query_path_resolver._user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/test_subfolder", owner=user)
+
+    assert count_path_queries(single_query_path_resolver.folder_from_path, user_path) == 1
+
+
+def test_single_query_file_resolution_issues_one_query(
+    single_query_path_resolver, count_path_queries
+):
+    user = single_query_path_resolver._user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/test_subfile", owner=user)
+
+    assert count_path_queries(single_query_path_resolver.file_from_path, user_path) == 1
+
+
+def test_single_query_reports_first_missing_segment(single_query_path_resolver):
+    user = single_query_path_resolver._user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/non-existing/deeper", owner=user)
+
+    with pytest.raises(ResourceNotFoundException) as exc_info:
+        single_query_path_resolver.folder_from_path(user_path)
+
+    assert exc_info.value.missing_resource_name == "non-existing"
+
+
+def test_deepest_folder_from_path_existing_folder(path_resolver):
+    user = path_resolver._user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/test_subfolder", owner=user)
+
+    folder, depth = path_resolver.deepest_folder_from_path(user_path)
+
+    assert folder.id == "folder-789"
+    assert depth == 2
+
+
+def test_deepest_folder_from_path_missing_segments(path_resolver):
+    user = path_resolver._user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/missing/deeper", owner=user)
+
+    folder, depth = path_resolver.deepest_folder_from_path(user_path)
+
+    assert folder.id == "folder-456"
+    assert depth == 1
+
+
+def test_deepest_folder_from_path_root_LookupError(path_resolver):
+    user = UserEntity(id="user-456", username="otheruser")
+
+    with pytest.raises(LookupError):
+        path_resolver.deepest_folder_from_path(UserPath(path="test_folder", owner=user))
+
+
+def test_per_segment_folder_resolution_issues_query_per_segment(
+    mock_file_repository, mock_folder_repository, mock_user_repository, count_path_queries
+):
+    path_resolver = PathResolver(
+        file_repository=mock_file_repository,
+        folder_repository=mock_folder_repository,
+        user_repository=mock_user_repository,
+    )
+    user = mock_user_repository.get_by_username("testuser")
+    user_path = UserPath(path="test_folder/test_subfolder", owner=user)
+
+    assert count_path_queries(path_resolver.folder_from_path, user_path) == 3
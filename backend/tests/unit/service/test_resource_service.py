@@ -1,13 +1,17 @@
+from io import BytesIO
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
+from sqlalchemy.exc import IntegrityError
 from skylock.utils.exceptions import (
     FolderNotEmptyException,
     ForbiddenActionException,
+    QuotaExceededException,
     ResourceAlreadyExistsException,
     ResourceNotFoundException,
     RootFolderAlreadyExistsException,
 )
 from skylock.database.models import FileEntity, FolderEntity, UserEntity
+from skylock.utils.pagination import Cursor, ResourceType
 from skylock.utils.path import UserPath
 
 
@@ -62,6 +66,78 @@ def test_get_subfolder_nonexistent(resource_service, mock_folder_repository):
         resource_service.get_folder(user_path)
 
 
+def test_get_folder_contents_page_spans_folders_and_files(
+    resource_service, mock_folder_repository, mock_file_repository
+):
+    folder = FolderEntity(id="folder-123", name="folder")
+    mock_folder_repository.get_subfolders_page.return_value = [FolderEntity(name="subfolder")]
+    mock_file_repository.get_folder_page.return_value = [
+        FileEntity(name="file1"),
+        FileEntity(name="file2"),
+    ]
+
+    page = resource_service.get_folder_contents(folder, limit=2)
+
+    assert [resource.name for resource in page.folders + page.files] == ["subfolder", "file1"]
+    assert page.next_cursor == Cursor(ResourceType.FILE, "file1")
+    mock_folder_repository.get_subfolders_page.assert_called_once_with(
+        "folder-123", after_name=None, limit=3
+    )
+    mock_file_repository.get_folder_page.assert_called_once_with(
+        "folder-123", after_name=None, limit=2
+    )
+
+
+def test_get_folder_contents_file_cursor_skips_folders(
+    resource_service, mock_folder_repository, mock_file_repository
+):
+    folder = FolderEntity(id="folder-123", name="folder")
+    mock_file_repository.get_folder_page.return_value = [FileEntity(name="file2")]
+
+    page = resource_service.get_folder_contents(
+        folder, limit=2, cursor=Cursor(ResourceType.FILE, "file1")
+    )
+
+    assert page.files == mock_file_repository.get_folder_page.return_value
+    assert page.next_cursor is None
+    mock_folder_repository.get_subfolders_page.assert_not_called()
+    mock_file_repository.get_folder_page.assert_called_once_with(
+        "folder-123", after_name="file1", limit=3
+    )
+
+
+def test_get_folder_contents_full_page_of_folders(
+    resource_service, mock_folder_repository, mock_file_repository
+):
+    folder = FolderEntity(id="folder-123", name="folder")
+    mock_folder_repository.get_subfolders_page.return_value = [
+        FolderEntity(name="a"),
+        FolderEntity(name="b"),
+        FolderEntity(name="c"),
+    ]
+
+    page = resource_service.get_folder_contents(folder, limit=2)
+
+    assert [subfolder.name for subfolder in page.folders] == ["a", "b"]
+    assert not page.files
+    assert page.next_cursor == Cursor(ResourceType.FOLDER, "b")
+    mock_file_repository.get_folder_page.assert_not_called()
+
+
+def test_get_folder_contents_type_filter(
+    resource_service, mock_folder_repository, mock_file_repository
+):
+    folder = FolderEntity(id="folder-123", name="folder")
+    mock_file_repository.get_folder_page.return_value = []
+
+    resource_service.get_folder_contents(folder, resource_type=ResourceType.FILE)
+
+    mock_folder_repository.get_subfolders_page.assert_not_called()
+    mock_file_repository.get_folder_page.assert_called_once_with(
+        "folder-123", after_name=None, limit=None
+    )
+
+
 def test_create_folder_success(resource_service, mock_folder_repository):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath("subfolder", user)
@@ -73,6 +149,41 @@ def test_create_folder_success(resource_service, mock_folder_repository):
     mock_folder_repository.save.assert_called_once()
 
 
+def test_create_folder_with_parents_creates_only_missing_segments(
+    resource_service, mock_folder_repository
+):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("existing/a/b", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    existing = FolderEntity(id="folder-existing", name="existing", parent_folder=root_folder)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, existing, None]
+    mock_folder_repository.save.side_effect = lambda folder: folder
+
+    result = resource_service.create_folder_with_parents(user_path, public=True)
+
+    assert result.name == "b"
+    assert result.is_public
+    assert result.parent_folder.name == "a"
+    assert result.parent_folder.parent_folder == existing
+    assert mock_folder_repository.get_by_name_and_parent_id.call_count == 3
+    assert mock_folder_repository.save.call_count == 2
+
+
+def test_create_folder_with_parents_existing_folder(resource_service, mock_folder_repository):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("existing", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    existing = FolderEntity(id="folder-existing", name="existing", parent_folder=root_folder)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, existing]
+
+    with pytest.raises(ResourceAlreadyExistsException):
+        resource_service.create_folder_with_parents(user_path)
+
+    mock_folder_repository.save.assert_not_called()
+
+
 def test_create_folder_root_forbidden(resource_service):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath.root_folder_of(user)
@@ -85,12 +196,60 @@ def test_create_folder_duplicate_name(resource_service, mock_folder_repository):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath("subfolder", user)
     root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
-    existing_folder = FolderEntity(id="folder-456", name="subfolder", parent_folder=root_folder)
 
     mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder]
+    mock_folder_repository.has_child_named.return_value = True
 
     with pytest.raises(ResourceAlreadyExistsException):
         resource_service.create_folder(user_path)
+    mock_folder_repository.has_child_named.assert_called_once_with("folder-root", "subfolder")
+
+
+def test_create_folder_concurrent_duplicate_name(resource_service, mock_folder_repository):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("subfolder", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder]
+    mock_folder_repository.save.side_effect = IntegrityError("INSERT", {}, Exception())
+
+    with pytest.raises(ResourceAlreadyExistsException):
+        resource_service.create_folder(user_path)
+
+
+def test_update_folder_recursive_uses_bulk_updates(
+    resource_service, mock_folder_repository, mock_file_repository
+):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("subfolder", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    subfolder = FolderEntity(id="folder-456", name="subfolder", parent_folder_id=root_folder.id)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, subfolder]
+    mock_folder_repository.update_visibility.return_value = 3
+    mock_file_repository.update_visibility_in_folder.return_value = 5
+
+    result = resource_service.update_folder(user_path, is_public=True, recursive=True)
+
+    assert result == (subfolder, 8)
+    mock_folder_repository.update_visibility.assert_called_once_with("folder-456", True, True)
+    mock_file_repository.update_visibility_in_folder.assert_called_once_with(
+        "folder-456", True, True
+    )
+    mock_file_repository.save.assert_not_called()
+
+
+def test_update_folder_deleted_meanwhile(resource_service, mock_folder_repository):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("subfolder", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    subfolder = FolderEntity(id="folder-456", name="subfolder", parent_folder_id=root_folder.id)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, subfolder]
+    mock_folder_repository.update_visibility.return_value = 0
+
+    with pytest.raises(ResourceNotFoundException):
+        resource_service.update_folder(user_path, is_public=True, recursive=True)
 
 
 def test_delete_folder_success(resource_service, mock_folder_repository):
@@ -113,49 +272,58 @@ def test_delete_folder_not_empty(resource_service, mock_folder_repository):
     user_path = UserPath("subfolder", user)
     root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
     subfolder = FolderEntity(id="folder-456", name="subfolder", parent_folder_id=root_folder.id)
-    sub_subfolder = FolderEntity(
-        id="folder-789", name="sub_subfolder", parent_folder_id=subfolder.id
-    )
-    subfolder.subfolders.append(sub_subfolder)
 
     mock_folder_repository.get_by_name_and_parent_id.side_effect = [
         root_folder,
         subfolder,
     ]
+    mock_folder_repository.has_children.return_value = True
 
     with pytest.raises(FolderNotEmptyException):
         resource_service.delete_folder(user_path, is_recursively=False)
+    mock_folder_repository.has_children.assert_called_once_with("folder-456")
+    mock_folder_repository.delete.assert_not_called()
 
 
-def test_delete_folder_recursive_calls_file_deletion(
-    resource_service, mock_folder_repository, mock_file_repository
+def test_delete_folder_recursive_uses_bulk_deletes(
+    resource_service,
+    mock_folder_repository,
+    mock_file_repository,
+    mock_blob_repository,
+    mock_user_repository,
 ):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath("parent_folder", user)
     root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
     parent_folder = FolderEntity(
-        id="folder-123", name="parent_folder", parent_folder_id=root_folder.id
+        id="folder-123", name="parent_folder", parent_folder_id=root_folder.id, owner_id=user.id
     )
     subfolder = FolderEntity(id="folder-456", name="subfolder", parent_folder_id=parent_folder.id)
-    file_in_subfolder = MagicMock()
-
     parent_folder.subfolders.append(subfolder)
-    subfolder.files.append(file_in_subfolder)
     mock_folder_repository.get_by_name_and_parent_id.side_effect = [
         root_folder,
         parent_folder,
     ]
-
-    with patch.object(resource_service, "_delete_file_data") as mock_delete_file_data, patch.object(
-        resource_service, "_delete_folder", wraps=resource_service._delete_folder
-    ):
-        resource_service.delete_folder(user_path, is_recursively=True)
-
-        mock_delete_file_data.assert_called_once_with(file_in_subfolder)
-        resource_service._delete_folder.assert_called_with(subfolder, is_recursively=True)
-        mock_file_repository.delete.assert_called_once_with(file_in_subfolder)
-        mock_folder_repository.delete.assert_any_call(subfolder)
-        mock_folder_repository.delete.assert_any_call(parent_folder)
+    mock_file_repository.get_subtree_usage.return_value = (30, 2)
+    calls = MagicMock()
+    calls.attach_mock(mock_user_repository.add_usage, "release_usage")
+    calls.attach_mock(mock_blob_repository.release_files_in_subtree, "release")
+    calls.attach_mock(mock_file_repository.delete_in_subtree, "delete_files")
+    calls.attach_mock(mock_folder_repository.delete_subtree, "delete_folders")
+
+    resource_service.delete_folder(user_path, is_recursively=True)
+
+    assert [call[0] for call in calls.mock_calls] == [
+        "release_usage",
+        "release",
+        "delete_files",
+        "delete_folders",
+    ]
+    mock_user_repository.add_usage.assert_called_once_with("user-123", -30, -2)
+    mock_blob_repository.release_files_in_subtree.assert_called_once_with("folder-123")
+    mock_file_repository.delete_in_subtree.assert_called_once_with("folder-123")
+    mock_folder_repository.delete_subtree.assert_called_once_with("folder-123")
+    mock_file_repository.delete.assert_not_called()
 
 
 def test_delete_folder_forbidden_root(resource_service):
@@ -166,21 +334,70 @@ def test_delete_folder_forbidden_root(resource_service):
         resource_service.delete_folder(user_path)
 
 
-def test_create_file_success(resource_service, mock_folder_repository, mock_file_repository):
+def test_create_file_success(
+    resource_service,
+    mock_folder_repository,
+    mock_file_repository,
+    mock_blob_repository,
+    mock_user_repository,
+    storage_service,
+):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath("subfolder/file.txt", user)
     root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
     subfolder = FolderEntity(id="folder-123", name="subfolder", parent_folder_id=root_folder.id)
 
-    mock_folder_repository.get_by_name_and_parent_id.side_effect = [
-        root_folder,
-        subfolder,
-    ]
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, subfolder] * 2
+    mock_file_repository.save.side_effect = lambda file: file
+
+    file = resource_service.create_file(user_path, data=BytesIO(b"file content"))
 
-    with patch.object(resource_service, "_save_file_data") as mock_save_file_data:
-        resource_service.create_file(user_path, data=b"file content")
-        mock_save_file_data.assert_called_once()
-        mock_file_repository.save.assert_called_once()
+    mock_file_repository.save.assert_called_once()
+    mock_blob_repository.add_reference.assert_called_once_with(file.blob_key)
+    mock_user_repository.charge_usage.assert_called_once_with("user-123", 12, 1, None)
+    with storage_service.get_file(file) as data:
+        assert data.read() == b"file content"
+
+
+def test_create_file_over_quota(
+    resource_service,
+    mock_folder_repository,
+    mock_file_repository,
+    mock_blob_repository,
+    mock_user_repository,
+    storage_service,
+):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("subfolder/file.txt", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    subfolder = FolderEntity(id="folder-123", name="subfolder", parent_folder_id=root_folder.id)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, subfolder] * 2
+    mock_user_repository.charge_usage.return_value = False
+
+    with pytest.raises(QuotaExceededException):
+        resource_service.create_file(user_path, data=BytesIO(b"file content"))
+
+    mock_file_repository.save.assert_not_called()
+    mock_blob_repository.add_reference.assert_not_called()
+    assert not [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
+
+
+def test_create_file_rejected_while_streaming(
+    resource_service, mock_folder_repository, mock_user_repository, storage_service
+):
+    user = UserEntity(id="user-123", username="testuser", used_bytes=90, quota_bytes=100)
+    user_path = UserPath("file.txt", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    mock_folder_repository.get_by_name_and_parent_id.return_value = root_folder
+    data = BytesIO(b"x" * 1024 * 1024)
+
+    with pytest.raises(QuotaExceededException):
+        resource_service.create_file(user_path, data=data)
+
+    assert data.tell() < len(data.getvalue())
+    mock_user_repository.charge_usage.assert_not_called()
+    assert not [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
 
 
 def test_create_file_with_duplicate_name(resource_service, mock_folder_repository):
@@ -188,17 +405,39 @@ def test_create_file_with_duplicate_name(resource_service, mock_folder_repositor
     user_path = UserPath("subfolder/existing_file.txt", user)
     root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
     subfolder = FolderEntity(id="folder-123", name="subfolder", parent_folder_id=root_folder.id)
-    existing_file = FileEntity(id="file-123", name="existing_file.txt", owner=user)
-
-    subfolder.files.append(existing_file)
 
     mock_folder_repository.get_by_name_and_parent_id.side_effect = [
         root_folder,
         subfolder,
     ]
+    mock_folder_repository.has_child_named.return_value = True
+    data = BytesIO(b"file content")
 
     with pytest.raises(ResourceAlreadyExistsException):
-        resource_service.create_file(user_path, data=b"file content")
+        resource_service.create_file(user_path, data=data)
+    assert data.tell() == 0
+
+
+def test_create_file_concurrent_duplicate_name(
+    resource_service,
+    mock_folder_repository,
+    mock_file_repository,
+    mock_blob_repository,
+    storage_service,
+):
+    user = UserEntity(id="user-123", username="testuser")
+    user_path = UserPath("subfolder/file.txt", user)
+    root_folder = FolderEntity(id="folder-root", name=user_path.root_folder_name, owner=user)
+    subfolder = FolderEntity(id="folder-123", name="subfolder", parent_folder_id=root_folder.id)
+
+    mock_folder_repository.get_by_name_and_parent_id.side_effect = [root_folder, subfolder] * 2
+    mock_file_repository.save.side_effect = IntegrityError("INSERT", {}, Exception())
+
+    with pytest.raises(ResourceAlreadyExistsException):
+        resource_service.create_file(user_path, data=BytesIO(b"file content"))
+
+    mock_blob_repository.add_reference.assert_not_called()
+    assert not [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
 
 
 def test_get_file_not_found(resource_service, mock_file_repository):
@@ -215,21 +454,25 @@ def test_create_file_empty_name_forbidden(resource_service):
     user_path = UserPath("", user)
 
     with pytest.raises(ForbiddenActionException):
-        resource_service.create_file(user_path, data=b"file content")
+        resource_service.create_file(user_path, data=BytesIO(b"file content"))
 
 
-def test_delete_file_success(resource_service, mock_file_repository):
+def test_delete_file_success(
+    resource_service, mock_file_repository, mock_blob_repository, mock_user_repository
+):
     user = UserEntity(id="user-123", username="testuser")
     user_path = UserPath("subfolder/file.txt", user)
     file = MagicMock()
     file.owner_id = user.id
+    file.size = 5
 
     mock_file_repository.get_by_name_and_parent.return_value = file
 
-    with patch.object(resource_service, "_delete_file_data") as mock_delete_file_data:
-        resource_service.delete_file(user_path)
-        mock_delete_file_data.assert_called_once_with(file)
-        mock_file_repository.delete.assert_called_once_with(file)
+    resource_service.delete_file(user_path)
+
+    mock_file_repository.delete.assert_called_once_with(file)
+    mock_user_repository.add_usage.assert_called_once_with(user.id, -5, -1)
+    mock_blob_repository.release.assert_called_once_with(file.blob_key)
 
 
 def test_create_root_folder_success(resource_service, mock_folder_repository):
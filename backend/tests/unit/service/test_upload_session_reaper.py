@@ -0,0 +1,61 @@
+from contextlib import nullcontext
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+
+from skylock.database.models import UploadSessionEntity, UserEntity, utc_now
+from skylock.database.repository import UploadSessionRepository
+from skylock.service.upload_session_reaper import UploadSessionReaper
+
+
+@pytest.fixture
+def upload_session_reaper(db_session, storage_service):
+    return UploadSessionReaper(
+        lambda: nullcontext(db_session), storage_service, ttl=timedelta(hours=1), batch_size=2
+    )
+
+
+@pytest.fixture
+def user(db_session):
+    user = UserEntity(username="user", password="password")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def start_upload(db_session, storage_service, user, age):
+    upload_session = UploadSessionEntity(
+        path="file.txt", size=4, owner=user, created_at=utc_now() - age
+    )
+    db_session.add(upload_session)
+    db_session.commit()
+    storage_service.create_upload(upload_session.id, 4)
+    return upload_session.id
+
+
+def staged_files(storage_service):
+    return sorted(path.name for path in storage_service.storage_path.rglob("*") if path.is_file())
+
+
+def test_reap_discards_expired_sessions(db_session, storage_service, user, upload_session_reaper):
+    for _ in range(3):
+        expired_id = start_upload(db_session, storage_service, user, timedelta(hours=2))
+        storage_service.write_upload_chunk(expired_id, 0, BytesIO(b"data"), 4)
+        UploadSessionRepository(db_session).add_chunk(expired_id, 0, 4)
+    active_id = start_upload(db_session, storage_service, user, timedelta(minutes=5))
+
+    assert upload_session_reaper.reap() == 3
+
+    assert [upload_session.id for upload_session in db_session.query(UploadSessionEntity)] == [
+        active_id
+    ]
+    assert UploadSessionRepository(db_session).get_chunk_ranges(expired_id) == []
+    assert staged_files(storage_service) == [active_id]
+
+
+def test_reap_without_expired_sessions(db_session, storage_service, user, upload_session_reaper):
+    start_upload(db_session, storage_service, user, timedelta(minutes=5))
+
+    assert upload_session_reaper.reap() == 0
+    assert len(staged_files(storage_service)) == 1
@@ -0,0 +1,39 @@
+import pytest
+
+from skylock.database.models import FileEntity, UserEntity
+from skylock.service.usage_service import UsageService
+from skylock.utils.exceptions import QuotaExceededException
+from skylock.utils.path import UserPath
+
+
+def test_quota_falls_back_to_default(mock_user_repository, path_resolver):
+    usage_service = UsageService(mock_user_repository, path_resolver, default_quota=1000)
+
+    assert usage_service.get_quota(UserEntity(quota_bytes=100)) == 100
+    assert usage_service.get_quota(UserEntity()) == 1000
+
+
+def test_upload_allowance(usage_service, mock_file_repository):
+    user = UserEntity(id="user-123", username="testuser", used_bytes=70, quota_bytes=100)
+    mock_file_repository.get_by_name_and_parent.return_value = FileEntity(name="file", size=20)
+
+    assert usage_service.get_upload_allowance(UserPath("file", user)) == 30
+    assert usage_service.get_upload_allowance(UserPath("file", user), force=True) == 50
+
+    user.quota_bytes = None
+    assert usage_service.get_upload_allowance(UserPath("file", user)) is None
+
+
+def test_charge_over_quota(usage_service, mock_user_repository):
+    mock_user_repository.charge_usage.return_value = False
+
+    with pytest.raises(QuotaExceededException):
+        usage_service.charge(UserEntity(id="user-123"), 10)
+
+    mock_user_repository.charge_usage.assert_called_once_with("user-123", 10, 1, None)
+
+
+def test_release(usage_service, mock_user_repository):
+    usage_service.release("user-123", 10, 2)
+
+    mock_user_repository.add_usage.assert_called_once_with("user-123", -10, -2)
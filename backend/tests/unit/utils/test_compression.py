@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from skylock.utils.compression import (
+    accepted_encodings,
+    is_compressible,
+    is_compressible_media_type,
+    sample_entropy,
+)
+
+
+def test_sample_entropy():
+    assert sample_entropy(b"aaaa") == 0
+    assert sample_entropy(bytes(range(256))) == 8
+
+
+@pytest.mark.parametrize(
+    "sample, media_type, expected",
+    [
+        (b"plain text " * 100, None, True),
+        (os.urandom(4096), None, False),
+        (os.urandom(4096), "text/csv", True),
+        (os.urandom(4096), "application/vnd.api+json", True),
+        (b"plain text " * 100, "image/png", False),
+        (b"plain text " * 100, "application/zip", False),
+        (b"plain text " * 100, "application/octet-stream", True),
+        (b"", "text/plain", False),
+    ],
+)
+def test_is_compressible(sample, media_type, expected):
+    assert is_compressible(sample, media_type) is expected
+
+
+@pytest.mark.parametrize(
+    "media_type, expected",
+    [
+        ("text/plain", True),
+        ("image/svg+xml", True),
+        ("video/mp4", False),
+        ("application/zip", False),
+        ("application/octet-stream", None),
+        (None, None),
+    ],
+)
+def test_is_compressible_media_type(media_type, expected):
+    assert is_compressible_media_type(media_type) is expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, set()),
+        ("gzip, deflate, br", {"gzip"}),
+        ("x-gzip", {"gzip"}),
+        ("GZIP;q=0.5", {"gzip"}),
+        ("gzip;q=0", set()),
+        ("identity", set()),
+        ("*", {"gzip"}),
+        ("*;q=1, gzip;q=0", set()),
+        ("gzip;q=abc", set()),
+    ],
+)
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from skylock.utils import durability
+from skylock.utils.durability import DurabilityMode, FileSyncer
+
+
+@pytest.fixture
+def fsynced(monkeypatch):
+    paths = []
+    monkeypatch.setattr(durability, "fsync_path", paths.append)
+    return paths
+
+
+def test_none_mode_does_not_flush(tmp_path, fsynced):
+    FileSyncer(DurabilityMode.NONE).sync(tmp_path)
+
+    assert not fsynced
+
+
+@pytest.mark.parametrize("mode", [DurabilityMode.ALWAYS, DurabilityMode.BATCHED])
+def test_sync_flushes_path(tmp_path, fsynced, mode):
+    FileSyncer(mode).sync(tmp_path)
+
+    assert fsynced == [tmp_path]
+
+
+def test_fsync_path_flushes_files_and_folders(tmp_path):
+    file_path = tmp_path / "file"
+    file_path.write_bytes(b"data")
+
+    durability.fsync_path(file_path)
+    durability.fsync_path(tmp_path)
+
+
+def test_batched_mode_flushes_waiting_callers_together(tmp_path, monkeypatch):
+    syncer = FileSyncer(DurabilityMode.BATCHED)
+    first_flush_started = threading.Event()
+    release_first_flush = threading.Event()
+    groups = []
+
+    def flush(group):
+        groups.append(sorted(request.path.name for request in group))
+        if len(groups) == 1:
+            first_flush_started.set()
+            release_first_flush.wait()
+        for request in group:
+            request.done = True
+
+    monkeypatch.setattr(syncer, "_flush", flush)
+    leader = threading.Thread(target=syncer.sync, args=(tmp_path / "a",))
+    leader.start()
+    first_flush_started.wait()
+    followers = [
+        threading.Thread(target=syncer.sync, args=(tmp_path / name,)) for name in ["b", "c"]
+    ]
+    for follower in followers:
+        follower.start()
+    while len(syncer._pending) < 2:
+        time.sleep(0.001)
+    release_first_flush.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert groups == [["a"], ["b", "c"]]
+
+
+def test_batched_mode_raises_error_of_failed_path(tmp_path):
+    syncer = FileSyncer(DurabilityMode.BATCHED)
+
+    with pytest.raises(FileNotFoundError):
+        syncer.sync(tmp_path / "missing")
+    syncer.sync(tmp_path)
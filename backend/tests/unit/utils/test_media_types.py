@@ -0,0 +1,18 @@
+import pytest
+
+from skylock.utils.media_types import detect_media_type
+
+
+@pytest.mark.parametrize(
+    "filename, sample, expected",
+    [
+        ("report.csv", b"a,b", "text/csv"),
+        ("photo.jpg", b"not really a jpeg", "image/jpeg"),
+        ("picture", b"\x89PNG\r\n\x1a\n...", "image/png"),
+        ("archive.unknownext", b"PK\x03\x04...", "application/zip"),
+        (None, b"%PDF-1.7", "application/pdf"),
+        ("noextension", b"plain data", None),
+    ],
+)
+def test_detect_media_type(filename, sample, expected):
+    assert detect_media_type(filename, sample) == expected
@@ -0,0 +1,33 @@
+import base64
+
+import pytest
+
+from skylock.utils.exceptions import InvalidCursorException
+from skylock.utils.pagination import Cursor, ResourceType
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        Cursor(ResourceType.FOLDER, "folder"),
+        Cursor(ResourceType.FILE, "file with spaces.txt"),
+        Cursor(ResourceType.FILE, "zażółć.txt"),
+    ],
+)
+def test_cursor_round_trip(cursor):
+    assert Cursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        base64.urlsafe_b64encode(b'["folder"]').decode(),
+        base64.urlsafe_b64encode(b'["unknown", "name"]').decode(),
+        base64.urlsafe_b64encode(b'["file", 1]').decode(),
+    ],
+)
+def test_cursor_decode_invalid(value):
+    with pytest.raises(InvalidCursorException):
+        Cursor.decode(value)
@@ -0,0 +1,48 @@
+import pytest
+
+from skylock.utils.rate_limit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limiter_paces_operations():
+    clock = FakeClock()
+    limiter = RateLimiter(10, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        limiter.acquire()
+    limiter.acquire(5)
+    limiter.acquire()
+
+    assert clock.slept == pytest.approx([0.1, 0.1, 0.1, 0.5])
+
+
+def test_rate_limiter_does_not_sleep_when_caller_is_slower():
+    clock = FakeClock()
+    limiter = RateLimiter(10, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire()
+    clock.now += 1
+    limiter.acquire()
+
+    assert clock.slept == []
+
+
+def test_rate_limiter_without_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(1000)
+
+    assert clock.slept == []
@@ -0,0 +1,129 @@
+import os
+from io import BytesIO
+
+import anyio
+import pytest
+
+moto = pytest.importorskip("moto")
+
+import boto3
+
+from skylock.api.responses import ZERO_COPY_SEND_EXTENSION, BlobResponse
+from skylock.utils.s3_storage import S3StorageBackend
+from skylock.utils.storage import FileStorageService
+
+BUCKET = "skylock-test"
+
+# S3 rejects multipart uploads with parts smaller than 5 MiB, except for the last one
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3_client():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def backend(s3_client):
+    return S3StorageBackend(BUCKET, client=s3_client, prefix="blobs/", part_size=PART_SIZE)
+
+
+@pytest.fixture
+def large_data():
+    return os.urandom(2 * PART_SIZE + 1024)
+
+
+def test_put_file_uploads_in_parts(backend, s3_client, tmp_path, large_data):
+    path = tmp_path / "staged"
+    path.write_bytes(large_data)
+
+    backend.put_file("key", path)
+
+    assert not path.exists()
+    head = s3_client.head_object(Bucket=BUCKET, Key="blobs/key")
+    assert head["ETag"].endswith('-3"')
+    with backend.open("key") as data:
+        assert data.read() == large_data
+
+
+def test_put_stream(backend):
+    backend.put("key", BytesIO(b"content"))
+
+    assert backend.stat("key").size == 7
+    with backend.open("key") as data:
+        assert data.read() == b"content"
+
+
+def test_open_reads_range_after_seek(backend, large_data):
+    backend.put("key", BytesIO(large_data))
+    start = PART_SIZE - 10
+
+    with backend.open("key") as data:
+        data.seek(start)
+        assert data.read(20) == large_data[start : start + 20]
+        data.seek(-5, os.SEEK_END)
+        assert data.read() == large_data[-5:]
+        assert data.read(1) == b""
+
+
+def test_open_missing_blob_raises_error(backend):
+    with pytest.raises(ValueError):
+        backend.open("missing")
+
+
+def test_exists_and_delete_many(backend):
+    for key in ["first", "second", "third"]:
+        backend.put(key, BytesIO(key.encode()))
+
+    backend.delete_many(["first", "second", "missing"])
+    backend.delete("third")
+
+    assert not any(backend.exists(key) for key in ["first", "second", "third"])
+
+
+def test_iter_blobs_lists_keys_under_prefix(backend, s3_client):
+    for key in ["b", "a", "c"]:
+        backend.put(key, BytesIO(key.encode() * 2))
+    s3_client.put_object(Bucket=BUCKET, Key="other/key", Body=b"")
+
+    assert [(key, blob_stat.size) for key, blob_stat in backend.iter_blobs()] == [
+        ("a", 2),
+        ("b", 2),
+        ("c", 2),
+    ]
+
+
+def test_storage_service_deduplicates_in_bucket(backend, s3_client, tmp_path):
+    storage_service = FileStorageService(tmp_path, content_addressed=True, backend=backend)
+
+    for _ in range(2):
+        storage_service.store_blob(storage_service.stage_blob(BytesIO(b"same content")))
+
+    assert s3_client.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 1
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+
+def test_blob_response_streams_remote_blob_range(backend, large_data):
+    backend.put("key", BytesIO(large_data))
+    response = BlobResponse(backend.open("key"), filename="file.bin")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "extensions": {ZERO_COPY_SEND_EXTENSION: {}},
+        "headers": [(b"range", f"bytes={PART_SIZE}-".encode())],
+    }
+    anyio.run(response, scope, None, send)
+
+    assert messages[0]["status"] == 206
+    assert b"".join(message.get("body", b"") for message in messages[1:]) == (
+        large_data[PART_SIZE:]
+    )
+    assert response.file.closed
@@ -1,11 +1,13 @@
+import anyio
 import pytest
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from jose import jwt
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 from skylock.utils.security import (
     get_user_from_jwt,
+    get_user_from_jwt_async,
     create_jwt_for_user,
     decode_jwt,
     ALGORITHM,
@@ -73,3 +75,17 @@ def test_get_user_from_jwt_user_not_found():
 
     assert excinfo.value.status_code == 401
     assert excinfo.value.detail == "Invalid token"
+
+
+def test_get_user_from_jwt_async():
+    user = db_models.UserEntity(id=1, username="testuser")
+    user_repository = AsyncMock()
+    user_repository.get_by_id.return_value = user
+
+    token = create_jwt_for_user(user)
+
+    assert anyio.run(get_user_from_jwt_async, token, user_repository) == user
+    user_repository.get_by_id.return_value = None
+    with pytest.raises(HTTPException) as excinfo:
+        anyio.run(get_user_from_jwt_async, token, user_repository)
+    assert excinfo.value.status_code == 401
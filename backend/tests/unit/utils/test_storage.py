@@ -1,6 +1,12 @@
+from io import BytesIO
+import gzip
+import hashlib
+import os
 import pytest
+import time
 import uuid
-from skylock.utils.storage import FileStorageService
+from skylock.utils.exceptions import InvalidChunkException, QuotaExceededException
+from skylock.utils.storage import FileStorageService, LocalStorageBackend, stat_blob
 from skylock.database.models import FileEntity, FolderEntity, UserEntity
 
 
@@ -22,50 +28,211 @@ def test_folder(test_user):
 @pytest.fixture
 def test_file(test_folder, test_user):
     """Fixture to create a test file entity."""
+    file_id = str(uuid.uuid4())
     return FileEntity(
-        id=str(uuid.uuid4()), name="test_file.txt", folder=test_folder, owner=test_user
+        id=file_id, name="test_file.txt", folder=test_folder, owner=test_user, blob_key=file_id
     )
 
 
-def test_save_file(temp_storage_service, test_file):
+def sharded_path(storage_service, key):
+    return storage_service.storage_path / key[:2] / key[2:4] / key
+
+
+def stored_blobs(storage_service):
+    return [path for path in storage_service.storage_path.rglob("*") if path.is_file()]
+
+
+def store(storage_service, data):
+    blob = storage_service.stage_blob(BytesIO(data))
+    storage_service.store_blob(blob)
+    return blob.key
+
+
+def test_stage_blob(temp_storage_service):
+    data = b"This is test file content"
+
+    blob = temp_storage_service.stage_blob(BytesIO(data))
+
+    assert blob.path.read_bytes() == data
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    assert blob.size == len(data)
+    assert blob.key != blob.sha256
+
+
+def test_store_blob(temp_storage_service):
     """Test saving a file to storage."""
     data = b"This is test file content"
 
-    temp_storage_service.save_file(data, test_file)
+    key = store(temp_storage_service, data)
 
-    expected_path = temp_storage_service.storage_path / test_file.id
-    assert expected_path.exists()
+    expected_path = sharded_path(temp_storage_service, key)
     assert expected_path.read_bytes() == data
+    assert stored_blobs(temp_storage_service) == [expected_path]
 
 
-def test_get_file(temp_storage_service, test_file):
-    data = b"This is test file content"
+def test_discard_blob(temp_storage_service):
+    blob = temp_storage_service.stage_blob(BytesIO(b"data"))
+
+    temp_storage_service.discard_blob(blob)
+
+    assert not stored_blobs(temp_storage_service)
+
+
+def test_upload_chunks_written_out_of_order(temp_storage_service):
+    temp_storage_service.create_upload("upload", 8)
+
+    assert temp_storage_service.write_upload_chunk("upload", 4, BytesIO(b"5678"), 4) == 4
+    temp_storage_service.write_upload_chunk("upload", 0, BytesIO(b"1234"), 8)
+    blob = temp_storage_service.stage_upload("upload")
 
-    temp_storage_service.save_file(data, test_file)
+    assert blob.path.read_bytes() == b"12345678"
+    assert blob.sha256 == hashlib.sha256(b"12345678").hexdigest()
+    assert blob.size == 8
 
-    file_stream = temp_storage_service.get_file(test_file)
-    assert file_stream.read() == data
 
+def test_upload_chunk_past_end_raises_error(temp_storage_service):
+    temp_storage_service.create_upload("upload", 4)
+    temp_storage_service.write_upload_chunk("upload", 0, BytesIO(b"1234"), 4)
 
-def test_delete_file(temp_storage_service, test_file):
+    with pytest.raises(InvalidChunkException):
+        temp_storage_service.write_upload_chunk("upload", 2, BytesIO(b"345"), 2)
+
+    assert temp_storage_service.stage_upload("upload").path.read_bytes() == b"1234"
+
+
+def test_upload_chunk_with_wrong_checksum_keeps_received_data(temp_storage_service):
+    temp_storage_service.create_upload("upload", 4)
+    temp_storage_service.write_upload_chunk("upload", 0, BytesIO(b"1234"), 4)
+
+    with pytest.raises(InvalidChunkException):
+        temp_storage_service.write_upload_chunk(
+            "upload", 0, BytesIO(b"abcd"), 4, checksum=hashlib.sha256(b"1234").hexdigest()
+        )
+    temp_storage_service.write_upload_chunk(
+        "upload", 2, BytesIO(b"34"), 2, checksum=hashlib.sha256(b"34").hexdigest().upper()
+    )
+
+    assert temp_storage_service.stage_upload("upload").path.read_bytes() == b"1234"
+
+
+def test_stage_upload_keeps_upload(temp_storage_service):
+    temp_storage_service.create_upload("upload", 4)
+    temp_storage_service.write_upload_chunk("upload", 0, BytesIO(b"1234"), 4)
+
+    blob = temp_storage_service.stage_upload("upload")
+    temp_storage_service.discard_blob(blob)
+    blob = temp_storage_service.stage_upload("upload")
+    temp_storage_service.discard_upload("upload")
+
+    assert stored_blobs(temp_storage_service) == [blob.path]
+    assert blob.path.read_bytes() == b"1234"
+
+
+def test_stage_upload_staging_file_is_new(temp_storage_service):
+    temp_storage_service.create_upload("upload", 4)
+    temp_storage_service.write_upload_chunk("upload", 0, BytesIO(b"1234"), 4)
+    upload_path = temp_storage_service.storage_path / ".incoming" / "upload"
+    os.utime(upload_path, (0, 0))
+
+    blob = temp_storage_service.stage_upload("upload")
+
+    staged = dict(temp_storage_service.iter_incoming())[blob.path.name]
+    assert staged.modified > time.time() - 60
+
+
+def test_store_blob_content_addressed_deduplicates(tmp_path):
+    storage_service = FileStorageService(storage_path=tmp_path, content_addressed=True)
     data = b"This is test file content"
 
-    temp_storage_service.save_file(data, test_file)
+    first_key = store(storage_service, data)
+    second_key = store(storage_service, data)
+    other_key = store(storage_service, b"Other content")
+
+    assert first_key == second_key == hashlib.sha256(data).hexdigest()
+    assert other_key != first_key
+    assert len(stored_blobs(storage_service)) == 2
+
+
+def test_stage_blob_compresses_compressible_data(tmp_path):
+    storage_service = FileStorageService(storage_path=tmp_path, compression=True)
+    data = b"line of a log file\n" * 1000
+
+    blob = storage_service.stage_blob(BytesIO(data), "app.log")
+
+    assert blob.encoding == "gzip"
+    assert blob.size == len(data)
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    assert gzip.decompress(blob.path.read_bytes()) == data
+
+
+@pytest.mark.parametrize(
+    "data, filename",
+    [(os.urandom(4096), "random.bin"), (b"text" * 1000, "photo.jpg"), (b"", "empty.txt")],
+)
+def test_stage_blob_skips_incompressible_data(tmp_path, data, filename):
+    storage_service = FileStorageService(storage_path=tmp_path, compression=True)
+
+    blob = storage_service.stage_blob(BytesIO(data), filename)
+
+    assert blob.encoding is None
+    assert blob.path.read_bytes() == data
+
+
+def test_content_addressed_key_includes_encoding(tmp_path):
+    storage_service = FileStorageService(tmp_path, content_addressed=True, compression=True)
+    data = b"same content" * 100
 
-    temp_storage_service.delete_file(test_file)
+    blob = storage_service.stage_blob(BytesIO(data), "data.txt")
 
-    expected_path = temp_storage_service.storage_path / test_file.id
-    assert not expected_path.exists()
+    assert blob.key == f"{hashlib.sha256(data).hexdigest()}.gzip"
 
 
-def test_save_existing_file_raises_error(temp_storage_service, test_file):
-    """Test saving a file with the same name raises an error."""
+def test_get_compressed_file(tmp_path, test_file):
+    storage_service = FileStorageService(storage_path=tmp_path, compression=True)
+    data = b"0123456789" * 1000
+    blob = storage_service.stage_blob(BytesIO(data), "digits.txt")
+    storage_service.store_blob(blob)
+    test_file.blob_key, test_file.blob_encoding, test_file.size = blob.key, blob.encoding, blob.size
+
+    with storage_service.get_file(test_file) as decoded:
+        assert stat_blob(decoded).size == len(data)
+        decoded.seek(-5, os.SEEK_END)
+        assert decoded.read() == data[-5:]
+        decoded.seek(10)
+        assert decoded.read(10) == data[10:20]
+    with storage_service.get_file(test_file, accepted_encodings={"gzip"}) as encoded:
+        assert gzip.decompress(encoded.read()) == data
+
+
+def test_stage_upload_compresses_staging_file(tmp_path):
+    storage_service = FileStorageService(storage_path=tmp_path, compression=True)
+    data = b"a,b,c\n" * 1000
+    storage_service.create_upload("upload", len(data))
+    storage_service.write_upload_chunk("upload", 0, BytesIO(data), len(data))
+
+    blob = storage_service.stage_upload("upload", "table.csv")
+
+    assert blob.encoding == "gzip"
+    assert blob.size == len(data)
+    assert gzip.decompress(blob.path.read_bytes()) == data
+    storage_service.discard_upload("upload")
+    assert stored_blobs(storage_service) == [blob.path]
+
+
+def test_get_file(temp_storage_service, test_file):
     data = b"This is test file content"
+    test_file.blob_key = store(temp_storage_service, data)
+
+    with temp_storage_service.get_file(test_file) as file_stream:
+        assert file_stream.read() == data
+
+
+def test_delete_blobs(temp_storage_service):
+    keys = [store(temp_storage_service, b"first"), store(temp_storage_service, b"second")]
 
-    temp_storage_service.save_file(data, test_file)
+    temp_storage_service.delete_blobs(keys + ["missing"])
 
-    with pytest.raises(ValueError, match="File of given path: .* already exists"):
-        temp_storage_service.save_file(data, test_file)
+    assert not stored_blobs(temp_storage_service)
 
 
 def test_get_nonexistent_file_raises_error(temp_storage_service, test_file):
@@ -74,7 +241,98 @@ def test_get_nonexistent_file_raises_error(temp_storage_service, test_file):
         temp_storage_service.get_file(test_file)
 
 
-def test_delete_nonexistent_file_raises_error(temp_storage_service, test_file):
-    """Test deleting a nonexistent file raises an error."""
-    with pytest.raises(ValueError, match="File of given path: .* does not exist"):
-        temp_storage_service.delete_file(test_file)
+class FailingStream(BytesIO):
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionError("client disconnected")
+        return super().read(4)
+
+
+def test_stage_blob_removes_partial_blob_on_failure(temp_storage_service):
+    with pytest.raises(ConnectionError):
+        temp_storage_service.stage_blob(FailingStream(b"partial data"))
+
+    assert not stored_blobs(temp_storage_service)
+
+
+def test_stage_blob_max_size(temp_storage_service):
+    assert temp_storage_service.stage_blob(BytesIO(b"1234"), max_size=4).size == 4
+
+    with pytest.raises(QuotaExceededException):
+        temp_storage_service.stage_blob(BytesIO(b"12345"), max_size=4)
+
+    assert len(stored_blobs(temp_storage_service)) == 1
+
+
+@pytest.fixture
+def legacy_blob(temp_storage_service, test_file):
+    path = temp_storage_service.storage_path / test_file.blob_key
+    path.write_bytes(b"legacy content")
+    return path
+
+
+def test_get_file_reads_legacy_blob(temp_storage_service, test_file, legacy_blob):
+    with temp_storage_service.get_file(test_file) as data:
+        assert data.read() == b"legacy content"
+
+
+def test_delete_blobs_removes_legacy_blob(temp_storage_service, test_file, legacy_blob):
+    temp_storage_service.delete_blobs([test_file.blob_key])
+
+    assert not legacy_blob.exists()
+
+
+def test_migrate_legacy_blobs(temp_storage_service, test_file, legacy_blob):
+    store(temp_storage_service, b"sharded content")
+
+    assert temp_storage_service.backend.migrate_legacy_blobs() == 1
+    assert temp_storage_service.backend.migrate_legacy_blobs() == 0
+
+    assert not legacy_blob.exists()
+    assert sharded_path(temp_storage_service, test_file.blob_key).read_bytes() == b"legacy content"
+    with temp_storage_service.get_file(test_file) as data:
+        assert data.read() == b"legacy content"
+
+
+def test_local_backend_put_and_stat(temp_storage_service):
+    backend = temp_storage_service.backend
+
+    backend.put("key", BytesIO(b"streamed content"))
+
+    assert backend.exists("key")
+    assert backend.stat("key").size == len(b"streamed content")
+    assert stored_blobs(temp_storage_service) == [sharded_path(temp_storage_service, "key")]
+
+
+def test_local_backend_flushes_blob_before_rename_and_folder_after(tmp_path, monkeypatch):
+    backend = LocalStorageBackend(tmp_path)
+    staged = tmp_path / "staged"
+    staged.write_bytes(b"data")
+    blob_path = tmp_path / "ke" / "y1" / "key1"
+    calls = []
+    monkeypatch.setattr(
+        backend._syncer, "sync", lambda path: calls.append((path, blob_path.exists()))
+    )
+
+    backend.put_file("key1", staged)
+
+    assert calls == [
+        (tmp_path, False),
+        (tmp_path / "ke", False),
+        (staged, False),
+        (blob_path.parent, True),
+    ]
+
+
+def test_local_backend_iter_blobs_in_key_order(temp_storage_service):
+    backend = temp_storage_service.backend
+    keys = ["abcd2", "abcd1", "abce0", "ffff", "0000"]
+    for key in keys:
+        backend.put(key, BytesIO(key.encode()))
+    (temp_storage_service.storage_path / "legacy").write_bytes(b"legacy")
+    temp_storage_service.stage_blob(BytesIO(b"staged"))
+
+    listed = list(backend.iter_blobs())
+
+    assert [key for key, _ in listed] == sorted(keys)
+    assert all(blob_stat.size == 5 for key, blob_stat in listed if key.startswith("abc"))
@@ -0,0 +1,74 @@
+from io import BytesIO
+
+import anyio
+import pytest
+
+from skylock.utils.streaming import AsyncStreamReader, iter_chunks
+
+
+def collect(stream, chunk_size):
+    async def read_all():
+        return [chunk async for chunk in iter_chunks(stream, chunk_size)]
+
+    return anyio.run(read_all)
+
+
+def test_iter_chunks_yields_fixed_size_chunks():
+    chunks = collect(BytesIO(b"0123456789"), chunk_size=4)
+
+    assert chunks == [b"0123", b"4567", b"89"]
+
+
+def test_iter_chunks_ignores_line_breaks():
+    chunks = collect(BytesIO(b"a\nb\nc\n"), chunk_size=64)
+
+    assert chunks == [b"a\nb\nc\n"]
+
+
+def test_iter_chunks_closes_stream():
+    stream = BytesIO(b"data")
+
+    collect(stream, chunk_size=2)
+
+    assert stream.closed
+
+
+def test_iter_chunks_empty_stream():
+    assert not collect(BytesIO(b""), chunk_size=4)
+
+
+async def async_chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def read_in_thread(reader, size=-1):
+    async def read():
+        return await anyio.to_thread.run_sync(reader.read, size)
+
+    return anyio.run(read)
+
+
+def test_async_stream_reader_reads_all_chunks():
+    reader = AsyncStreamReader(async_chunks(b"abc", b"", b"def"))
+
+    assert read_in_thread(reader) == b"abcdef"
+
+
+def test_async_stream_reader_splits_chunks_to_requested_size():
+    async def read_parts():
+        reader = AsyncStreamReader(async_chunks(b"abcdef", b"gh"))
+        return [await anyio.to_thread.run_sync(reader.read, 4) for _ in range(4)]
+
+    assert anyio.run(read_parts) == [b"abcd", b"ef", b"gh", b""]
+
+
+def test_async_stream_reader_propagates_stream_errors():
+    async def failing_chunks():
+        yield b"abc"
+        raise ConnectionError("client disconnected")
+
+    reader = AsyncStreamReader(failing_chunks())
+
+    with pytest.raises(ConnectionError):
+        read_in_thread(reader)
@@ -0,0 +1,131 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from skylock.utils import zip_stream
+from skylock.utils.zip_stream import DEFLATE_BLOCK_SIZE, ZipEntry, iter_zip
+
+TEXT = b"".join(b"line %d of a compressible text file\n" % index for index in range(100_000))
+
+
+def file_entry(name, data, size="exact", **options):
+    return ZipEntry(
+        name=name,
+        open=lambda: io.BytesIO(data),
+        size=len(data) if size == "exact" else size,
+        **options,
+    )
+
+
+def read_archive(chunks):
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    return archive
+
+
+def test_archive_is_readable():
+    entries = [
+        file_entry("folder/a.txt", b"hello " * 1000),
+        file_entry("folder/empty.txt", b""),
+        file_entry("folder/zażółć.bin", bytes(range(256)) * 1000),
+        ZipEntry(name="folder/nothing/"),
+    ]
+
+    archive = read_archive(iter_zip(entries))
+
+    assert archive.namelist() == [entry.name for entry in entries]
+    assert archive.read("folder/a.txt") == b"hello " * 1000
+    assert archive.read("folder/empty.txt") == b""
+    assert archive.read("folder/zażółć.bin") == bytes(range(256)) * 1000
+    assert archive.getinfo("folder/nothing/").is_dir()
+    assert archive.getinfo("folder/a.txt").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_entries_of_unknown_size_use_zip64():
+    archive = read_archive(iter_zip([file_entry("file.txt", b"data", size=None)]))
+
+    assert archive.read("file.txt") == b"data"
+
+
+def test_large_archive_uses_zip64_records(monkeypatch):
+    monkeypatch.setattr(zip_stream, "ZIP64_LIMIT", 100)
+    monkeypatch.setattr(zip_stream, "ZIP64_ENTRY_LIMIT", 3)
+    entries = [file_entry(f"file{index}.txt", bytes(range(50))) for index in range(4)]
+
+    chunks = list(iter_zip(entries))
+    archive = read_archive(chunks)
+
+    assert b"".join(chunks).find(b"PK\x06\x06") > 0
+    assert [info.header_offset for info in archive.infolist()][-1] > 100
+    assert [archive.read(entry.name) for entry in entries] == [bytes(range(50))] * 4
+
+
+def test_entry_larger_than_recorded_size(monkeypatch):
+    monkeypatch.setattr(zip_stream, "ZIP64_LIMIT", 100)
+
+    with pytest.raises(ValueError):
+        list(iter_zip([file_entry("file.txt", bytes(range(200)), size=10)]))
+
+
+def test_files_are_read_as_the_archive_is_consumed():
+    opened = []
+
+    def entry(name):
+        return ZipEntry(name=name, open=lambda: opened.append(name) or io.BytesIO(b"x"), size=1)
+
+    chunks = iter_zip([entry("a.txt"), entry("b.txt")])
+
+    next(chunks)
+    assert opened == []
+    list(chunks)
+    assert opened == ["a.txt", "b.txt"]
+
+
+def test_modification_time():
+    modified = datetime(2024, 5, 17, 12, 30, 44, tzinfo=timezone.utc)
+
+    archive = read_archive(iter_zip([file_entry("file.txt", b"data", modified=modified)]))
+
+    assert archive.getinfo("file.txt").date_time == modified.astimezone().timetuple()[:6]
+
+
+def test_parallel_compression_output_matches_sequential():
+    entries = [
+        file_entry("big.txt", TEXT),
+        file_entry("small.txt", b"small"),
+        file_entry("random.bin", os.urandom(3 * DEFLATE_BLOCK_SIZE), compressible=False),
+    ]
+
+    sequential = b"".join(iter_zip(entries))
+    with ThreadPoolExecutor(4) as executor:
+        parallel = b"".join(iter_zip(entries, executor=executor, max_pending_blocks=8))
+
+    assert parallel == sequential
+    archive = read_archive([parallel])
+    assert archive.read("big.txt") == TEXT
+    assert archive.getinfo("big.txt").compress_size < len(TEXT) // 10
+
+
+def test_incompressible_entries_are_not_deflated():
+    data = os.urandom(DEFLATE_BLOCK_SIZE + 1)
+
+    archive = read_archive(iter_zip([file_entry("random.bin", data, compressible=False)]))
+
+    assert archive.read("random.bin") == data
+    assert archive.getinfo("random.bin").compress_size > len(data)
+
+
+def test_blocks_are_read_ahead_up_to_the_limit():
+    data = io.BytesIO(TEXT)
+    chunks = iter_zip(
+        [ZipEntry(name="big.txt", open=lambda: data, size=len(TEXT))], max_pending_blocks=2
+    )
+
+    next(chunks)
+    next(chunks)
+
+    assert data.tell() <= 3 * DEFLATE_BLOCK_SIZE